@@ -0,0 +1,86 @@
+"""
+Benchmark: p95 time-to-audio per listener as the number of listeners grows
+Compares first-come first-served API quota with fair sharing (on-demand first)
+
+Each simulated listener reads one book: every --read-interval seconds it asks
+for its next page (--calls-per-page rate-limited API calls), while
+--prefetchers threads per book keep prefetching ahead. All listeners share one
+token bucket, as they do in the server process. API calls are rate-limit
+waits plus a sleep, so results do not depend on the network.
+
+Usage:
+    python benchmarks/bench_fair_share.py [--users 1 2 4] [--rate 10] [--seconds 6]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from fair_share import LatencyTracker, work_context
+from rate_limiter import TokenBucket
+
+
+def api_call(limiter, latency):
+    limiter.acquire()
+    time.sleep(latency)
+
+
+def run(users, fair, args):
+    """Simulate `users` listeners; returns the overall time-to-audio summary"""
+    limiter = TokenBucket(args.rate, capacity=1, fair=fair)
+    latencies = LatencyTracker(window=10000)
+    stop = threading.Event()
+
+    def listener(user):
+        book = f'book-{user}'
+        while not stop.is_set():
+            started = time.monotonic()
+            with work_context(book, on_demand=True):
+                for _ in range(args.calls_per_page):
+                    api_call(limiter, args.latency)
+            latencies.record(user, time.monotonic() - started)
+            stop.wait(args.read_interval)
+
+    def prefetcher(user):
+        with work_context(f'book-{user}', on_demand=False):
+            while not stop.is_set():
+                api_call(limiter, args.latency)
+
+    threads = [threading.Thread(target=listener, args=(user,), daemon=True) for user in range(users)]
+    threads += [threading.Thread(target=prefetcher, args=(user,), daemon=True)
+                for user in range(users) for _ in range(args.prefetchers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return latencies.summary()['overall']
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--users', type=int, nargs='+', default=[1, 2, 4])
+    arg_parser.add_argument('--rate', type=float, default=10, help='Shared API requests/second')
+    arg_parser.add_argument('--calls-per-page', type=int, default=3, help='API calls for one page')
+    arg_parser.add_argument('--prefetchers', type=int, default=2, help='Prefetch threads per book')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='Seconds per API call')
+    arg_parser.add_argument('--read-interval', type=float, default=1.0, help='Seconds between page requests')
+    arg_parser.add_argument('--seconds', type=float, default=6, help='Duration of each run')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print(f"Shared quota {args.rate}/s, {args.calls_per_page} calls/page, {args.prefetchers} prefetchers/book")
+    print(f"{'Users':>5}  {'FIFO p50':>9} {'FIFO p95':>9}  {'Fair p50':>9} {'Fair p95':>9}")
+    for users in args.users:
+        fifo = run(users, False, args)
+        fair = run(users, True, args)
+        print(f"{users:>5}  {fifo['p50']:>8.2f}s {fifo['p95']:>8.2f}s  {fair['p50']:>8.2f}s {fair['p95']:>8.2f}s")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
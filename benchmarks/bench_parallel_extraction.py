@@ -0,0 +1,94 @@
+"""
+Benchmark: serial vs process-pool whole-book extraction
+Builds a synthetic PDF and times BookParser.iter_pages in both modes
+
+Usage:
+    python benchmarks/bench_parallel_extraction.py [--pages 1000] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from parser import BookParser
+
+
+LINE = "Line {line} of page {page}: the quick brown fox jumps over the lazy dog again and again."
+
+
+def write_synthetic_pdf(path, page_count, lines_per_page=40):
+    """Write a minimal text-only PDF with page_count pages"""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+    for page in range(page_count):
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        kids.append(page_id)
+        shows = b" ".join(
+            b"(" + LINE.format(line=line, page=page).encode('ascii') + b") '"
+            for line in range(lines_per_page)
+        )
+        stream = b"BT /F1 10 Tf 40 760 Td 12 TL " + shows + b" ET"
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), page_count)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % next_id
+    for obj_id in range(1, next_id):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def time_extraction(path, parallel, max_workers=None):
+    """Return (seconds, page texts) for one full extraction"""
+    start = time.perf_counter()
+    with BookParser(path) as parser:
+        texts = [page['text'] for page in parser.iter_pages(parallel=parallel, max_workers=max_workers)]
+    return time.perf_counter() - start, texts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--pages', type=int, default=1000)
+    arg_parser.add_argument('--workers', type=int, default=None)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, 'synthetic.pdf')
+        write_synthetic_pdf(pdf_path, args.pages)
+        print(f"Synthetic PDF: {args.pages} pages, {os.path.getsize(pdf_path) / 1024:.0f} KB")
+
+        serial_time, serial_texts = time_extraction(pdf_path, parallel=False)
+        parallel_time, parallel_texts = time_extraction(pdf_path, parallel=True, max_workers=args.workers)
+
+    workers = args.workers or os.cpu_count()
+    print("=" * 60)
+    print(f"Serial:   {serial_time:7.2f}s  ({args.pages / serial_time:7.1f} pages/s)")
+    print(f"Parallel: {parallel_time:7.2f}s  ({args.pages / parallel_time:7.1f} pages/s, {workers} workers)")
+    print(f"Speedup:  {serial_time / parallel_time:7.2f}x")
+    print(f"Output identical: {serial_texts == parallel_texts}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
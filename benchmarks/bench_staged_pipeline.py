@@ -0,0 +1,97 @@
+"""
+Benchmark: sequential vs staged page processing on a whole book
+Reports pages/minute for both with simulated translation and TTS latencies
+
+Sequential runs process_page (extract → translate → TTS in one thread) for
+every page. Staged queues every page through the prefetch stages, so
+translation of page N+1 overlaps TTS of page N. API calls are replaced by
+sleeps, so results do not depend on the network or rate limits.
+
+Usage:
+    python benchmarks/bench_staged_pipeline.py [--pages 24] [--translate-latency 0.4] [--tts-latency 0.8]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_pipeline import make_pipeline as make_fake_pipeline
+
+
+WORDS = ("the river ran past the old mill where a young shepherd named Santiago "
+         "rested with his flock and dreamt of treasure near the pyramids").split()
+
+
+def write_book(path, pages, seed=42):
+    """TXT book with one distinct ~200-word paragraph per page"""
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(pages):
+        sentences = [' '.join(rng.choice(WORDS) for _ in range(12)).capitalize() + f' {i}.'
+                     for _ in range(16)]
+        paragraphs.append(' '.join(sentences))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join(paragraphs))
+
+
+def make_pipeline(book_path, cache_dir, args, prefetch_count=3):
+    """Pipeline whose translation and TTS calls sleep instead of hitting the network"""
+    def fake_translate(text, retry_count=3):
+        time.sleep(args.translate_latency)
+        return text
+
+    return make_fake_pipeline(book_path, cache_dir, translate=fake_translate, tts_delay=args.tts_latency,
+                              prefetch_count=prefetch_count, adaptive_prefetch=False, prefetch_cap=prefetch_count)
+
+
+def run_sequential(book_path, cache_dir, args):
+    pipeline = make_pipeline(book_path, cache_dir, args)
+    total_pages = pipeline.parser.get_total_pages()  # Wait for background indexing
+    start = time.perf_counter()
+    for page_num in range(total_pages):
+        assert pipeline.process_page(page_num)['status'] == 'completed'
+    elapsed = time.perf_counter() - start
+    pipeline.cleanup()
+    return total_pages, elapsed
+
+
+def run_staged(book_path, cache_dir, args):
+    # Fast-start pages split the first paragraphs, so the book has a few more pages than paragraphs
+    pipeline = make_pipeline(book_path, cache_dir, args, prefetch_count=args.pages * 2)
+    total_pages = pipeline.parser.get_total_pages()  # Wait for background indexing
+    start = time.perf_counter()
+    pipeline.prefetch_pages(0)
+    for page_num in range(total_pages):
+        assert pipeline.page_futures[page_num].result()['status'] == 'completed'
+    elapsed = time.perf_counter() - start
+    pipeline.cleanup()
+    return total_pages, elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--pages', type=int, default=24)
+    arg_parser.add_argument('--translate-latency', type=float, default=0.4, help='Seconds per translation request')
+    arg_parser.add_argument('--tts-latency', type=float, default=0.8, help='Seconds per page of audio')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        book_path = os.path.join(tmp_dir, 'book.txt')
+        write_book(book_path, args.pages)
+        pages, sequential = run_sequential(book_path, os.path.join(tmp_dir, 'cache-seq'), args)
+        _, staged = run_staged(book_path, os.path.join(tmp_dir, 'cache-staged'), args)
+
+    print("=" * 60)
+    print(f"Book: {pages} pages, translate {args.translate_latency}s/request, TTS {args.tts_latency}s/page")
+    print(f"Sequential: {sequential:6.2f}s  ({pages / sequential * 60:7.1f} pages/min)")
+    print(f"Staged:     {staged:6.2f}s  ({pages / staged * 60:7.1f} pages/min)")
+    print(f"Speedup:    {sequential / staged:6.2f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Test helper: ProcessingPipeline over a small TXT book with its API calls faked
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from pipeline import ProcessingPipeline
+
+
+def write_book(tmp_dir, paragraphs=6, numbered=False):
+    """
+    Write tmp_dir/book.txt with one ~200-word paragraph per page
+
+    Args:
+        numbered: Start each paragraph with 'Paragraph <i>.' so pages differ
+
+    Returns:
+        Path of the book
+    """
+    book_path = os.path.join(tmp_dir, 'book.txt')
+    with open(book_path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join((f'Paragraph {i}. ' if numbered else '') + ' '.join(['word'] * 200) + '.'
+                            for i in range(paragraphs)))
+    return book_path
+
+
+def make_pipeline(book_path, cache_dir=None, runs=None, translate=None, tts_delay=0.0, audio_bytes=None,
+                  **kwargs):
+    """
+    Pipeline whose translation and TTS never touch the network
+
+    Translation upper-cases the text unless translate(text, retry_count) is
+    given. TTS appends each page number to runs, sleeps tts_delay and returns
+    an audio path; with audio_bytes it also writes that much audio to the TTS
+    cache and keeps it in memory, like gTTS.
+
+    Args:
+        book_path: Book file
+        cache_dir: Cache folder (default: 'cache' next to the book)
+        kwargs: Passed to ProcessingPipeline
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(book_path), 'cache')
+    pipeline = ProcessingPipeline(book_path, cache_dir, **kwargs)
+
+    def fake_audio(text, page_num=None):
+        if runs is not None:
+            runs.append(page_num)
+        time.sleep(tts_delay)
+        if audio_bytes is None:
+            return os.path.join(cache_dir, f'{page_num}.mp3')
+        cache_key = pipeline.tts.cache_key(text)
+        audio_path = pipeline.tts.get_audio_path(cache_key)
+        with open(audio_path, 'wb') as f:
+            f.write(b'\x00' * audio_bytes)
+        pipeline.tts.memory_cache[cache_key] = b'\x00' * audio_bytes
+        return audio_path
+
+    pipeline.translator._translate_single = translate or (lambda text, retry_count=3: text.upper())
+    pipeline.tts.generate_audio = fake_audio
+    return pipeline
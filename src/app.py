@@ -2,15 +2,20 @@
 Flask Web Application
 Main server for AI Audiobook Translator
 """
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, session
 import os
 import sys
+import tempfile
+import time
+import uuid
 from werkzeug.utils import secure_filename
 
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from pipeline import ProcessingPipeline
+from coordination import Coordinator
+from fair_share import LatencyTracker
+from registry import PipelineRegistry
 
 
 app = Flask(__name__, 
@@ -18,17 +23,34 @@ app = Flask(__name__,
             static_folder='../static')
 
 # Configuration
-# Use /tmp on Render (ephemeral filesystem) or local directories
-UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/books') if os.environ.get('RENDER') else 'books'
-CACHE_FOLDER = os.environ.get('CACHE_FOLDER', '/tmp/cache') if os.environ.get('RENDER') else 'cache'
+# Use /tmp on Render (ephemeral filesystem) or local directories, unless set in the environment
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/books' if os.environ.get('RENDER') else 'books')
+CACHE_FOLDER = os.environ.get('CACHE_FOLDER', '/tmp/cache' if os.environ.get('RENDER') else 'cache')
 ALLOWED_EXTENSIONS = {'pdf', 'epub', 'txt'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['CACHE_FOLDER'] = CACHE_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 
-# Global pipeline instance
-current_pipeline = None
+# State shared by the gunicorn worker processes: sessions' books and page claims
+coordinator = Coordinator(CACHE_FOLDER)
+
+# The session cookie only maps a browser to the book it is listening to; every
+# worker must sign it with the same key
+app.secret_key = os.environ.get('SECRET_KEY') or coordinator.secret_key()
+
+# Open books, shared by every session listening to them; idle and least recently
+# used books are closed to stay within the limits
+registry = PipelineRegistry(
+    CACHE_FOLDER,
+    max_books=int(os.environ.get('MAX_OPEN_BOOKS', 2 if os.environ.get('RENDER') else 4)),
+    idle_timeout=int(os.environ.get('BOOK_IDLE_TIMEOUT', 1800)),
+    memory_budget=int(os.environ.get('PIPELINE_MEMORY_MB', 128 if os.environ.get('RENDER') else 512)) * 1024 * 1024,
+    coordinator=coordinator
+)
+
+# Time from a page request to its audio being ready, per session
+time_to_audio = LatencyTracker()
 
 
 def allowed_file(filename):
@@ -36,6 +58,48 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def session_id():
+    """Id of the calling browser session (created on first use)"""
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+    return session['sid']
+
+
+def book_entry(filename=None):
+    """
+    Get the open book for a request
+    
+    Book-scoped routes name the book (reopening it if it was evicted);
+    other routes use the book the session loaded last, or for a client
+    without a session cookie, the book loaded last.
+    
+    Returns:
+        Registry entry, or None if there is no such book
+    """
+    if filename is None:
+        return registry.for_session(session_id())
+    
+    # Security: prevent directory traversal
+    filename = secure_filename(filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    entry = registry.get(filepath)
+    if entry is None and allowed_file(filename) and os.path.exists(filepath):
+        entry, _ = registry.open(filepath)
+    return entry
+
+
+def book_response(entry):
+    """JSON for a freshly loaded book (total_pages is None until indexing finishes)"""
+    status = entry.pipeline.get_status()
+    return jsonify({
+        'success': True,
+        'filename': entry.filename,
+        'total_pages': status['total_pages'],
+        'pages_indexed': status['pages_indexed'],
+        'indexing': status['indexing']
+    })
+
+
 @app.route('/')
 def index():
     """Home page with upload interface"""
@@ -77,7 +141,9 @@ def delete_book(filename):
         if not os.path.exists(filepath):
             return jsonify({'error': 'Book not found'}), 404
         
+        # Workers still reading the file keep the unlinked inode until they close it
         os.remove(filepath)
+        registry.close(filepath)
         return jsonify({'success': True, 'message': f'Deleted {filename}'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -86,8 +152,6 @@ def delete_book(filename):
 @app.route('/books/<filename>/load', methods=['POST'])
 def load_book(filename):
     """Load a book from the bookshelf"""
-    global current_pipeline
-    
     try:
         # Security: prevent directory traversal
         filename = secure_filename(filename)
@@ -99,14 +163,12 @@ def load_book(filename):
         if not allowed_file(filename):
             return jsonify({'error': 'Invalid file type'}), 400
         
-        # Initialize processing pipeline
-        current_pipeline = ProcessingPipeline(filepath, app.config['CACHE_FOLDER'])
+        # Reuse the book's pipeline if it is still open; start on the first
+        # pages before the client asks
+        entry, _ = registry.open(filepath, session_id())
+        entry.pipeline.start_speculative()
         
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'total_pages': current_pipeline.total_pages
-        })
+        return book_response(entry)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -114,8 +176,6 @@ def load_book(filename):
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file upload"""
-    global current_pipeline
-    
     try:
         # Check if file is present
         if 'file' not in request.files:
@@ -133,28 +193,38 @@ def upload_file():
         filename = secure_filename(file.filename)
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Initialize processing pipeline
-        current_pipeline = ProcessingPipeline(filepath, app.config['CACHE_FOLDER'])
-        
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'total_pages': current_pipeline.total_pages
-        })
+        # Save beside the book and swap it in: workers with the old file open (or
+        # mapped) keep reading the old inode instead of a truncated file
+        fd, tmp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], prefix='.upload-', suffix='.part')
+        os.close(fd)
+        try:
+            file.save(tmp_path)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # A re-uploaded file replaces the book: close its old pipeline here and
+        # have other workers drop theirs
+        registry.close(filepath)
+        
+        # Open the book's pipeline and start on the first pages before the client asks
+        entry, _ = registry.open(filepath, session_id())
+        entry.pipeline.start_speculative()
+        
+        return book_response(entry)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/process/<int:page_num>', methods=['GET'])
-def process_page(page_num):
+@app.route('/books/<filename>/process/<int:page_num>', methods=['GET'])
+def process_page(page_num, filename=None):
     """Process a specific page"""
-    global current_pipeline
-    
     try:
-        if not current_pipeline:
+        entry = book_entry(filename)
+        if not entry:
             return jsonify({'error': 'No book uploaded'}), 400
         
         print(f"\n{'='*60}")
@@ -162,7 +232,9 @@ def process_page(page_num):
         print(f"{'='*60}")
         
         # Get page with prefetch
-        page_data = current_pipeline.get_page_with_prefetch(page_num)
+        started = time.monotonic()
+        page_data = entry.pipeline.get_page_with_prefetch(page_num)
+        time_to_audio.record(session_id(), time.monotonic() - started)
         
         print(f"Page data status: {page_data.get('status')}")
         
@@ -176,7 +248,7 @@ def process_page(page_num):
             'success': True,
             'page_num': page_data['page_num'],
             'translated_text': page_data['translated_text'],
-            'audio_url': f'/audio/{page_num}'
+            'audio_url': f'/books/{entry.filename}/audio/{page_num}'
         })
         
     except Exception as e:
@@ -187,19 +259,19 @@ def process_page(page_num):
 
 
 @app.route('/audio/<int:page_num>', methods=['GET'])
-def get_audio(page_num):
+@app.route('/books/<filename>/audio/<int:page_num>', methods=['GET'])
+def get_audio(page_num, filename=None):
     """Serve audio file for a specific page"""
-    global current_pipeline
-    
     try:
         print(f"\n[AUDIO] Request for page {page_num}", flush=True)
         
-        if not current_pipeline:
+        entry = book_entry(filename)
+        if not entry:
             print(f"[AUDIO] ERROR: No pipeline", flush=True)
             return jsonify({'error': 'No book uploaded'}), 400
         
         print(f"[AUDIO] Getting page data...", flush=True)
-        page_data = current_pipeline.get_page(page_num)
+        page_data = entry.pipeline.get_page(page_num)
         print(f"[AUDIO] Page data status: {page_data.get('status')}", flush=True)
         
         if page_data['status'] == 'error':
@@ -215,7 +287,7 @@ def get_audio(page_num):
         print(f"[AUDIO] Getting audio data from memory...", flush=True)
         
         # Try to get audio from memory cache
-        audio_data = current_pipeline.tts.get_audio_data(translated_text)
+        audio_data = entry.pipeline.tts.get_audio_data(translated_text)
         
         if audio_data:
             print(f"[AUDIO] Serving audio from memory cache", flush=True)
@@ -252,17 +324,77 @@ def get_audio(page_num):
 
 
 @app.route('/status', methods=['GET'])
-def get_status():
+@app.route('/books/<filename>/status', methods=['GET'])
+def get_status(filename=None):
     """Get processing status"""
-    global current_pipeline
-    
-    if not current_pipeline:
+    entry = book_entry(filename)
+    if not entry:
         return jsonify({'error': 'No book uploaded'}), 400
     
-    status = current_pipeline.get_status()
+    status = entry.pipeline.get_status()
+    status['filename'] = entry.filename
     return jsonify(status)
 
 
+@app.route('/chapters', methods=['GET'])
+@app.route('/books/<filename>/chapters', methods=['GET'])
+def get_chapters(filename=None):
+    """Get chapter to page mapping for navigation"""
+    entry = book_entry(filename)
+    if not entry:
+        return jsonify({'error': 'No book uploaded'}), 400
+    
+    try:
+        return jsonify({'chapters': entry.pipeline.get_chapters()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Time-to-audio percentiles per session (ids shortened) and overall"""
+    summary = time_to_audio.summary()
+    return jsonify({
+        'time_to_audio': {
+            'sessions': {sid[:8]: stats for sid, stats in summary['keys'].items()},
+            'overall': summary['overall']
+        }
+    })
+
+
+@app.route('/books/open', methods=['GET'])
+def open_books():
+    """List the books with an open pipeline"""
+    return jsonify(registry.get_status())
+
+
+@app.route('/render/<action>', methods=['POST'])
+@app.route('/books/<filename>/render/<action>', methods=['POST'])
+def control_render(action, filename=None):
+    """Start, pause or resume rendering the whole book in the background"""
+    entry = book_entry(filename)
+    if not entry:
+        return jsonify({'error': 'No book uploaded'}), 400
+    
+    actions = {'start': entry.render.start, 'pause': entry.render.pause, 'resume': entry.render.resume}
+    if action not in actions:
+        return jsonify({'error': f'Unknown render action: {action}'}), 404
+    
+    success = actions[action]()
+    return jsonify({'success': success, **entry.render.get_status()})
+
+
+@app.route('/render/status', methods=['GET'])
+@app.route('/books/<filename>/render/status', methods=['GET'])
+def render_status(filename=None):
+    """Get whole-book render progress"""
+    entry = book_entry(filename)
+    if not entry:
+        return jsonify({'error': 'No book uploaded'}), 400
+    
+    return jsonify(entry.render.get_status())
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
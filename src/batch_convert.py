@@ -0,0 +1,223 @@
+"""
+Batch Conversion Module
+Headless command-line conversion of a folder of books to Hindi audio
+
+Usage:
+    python src/batch_convert.py books/ [--output audio] [--cache-dir cache]
+                                [--processes 1] [--threads 2] [--report report.json]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import shutil
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parser import BookParser
+from pipeline import EMPTY_PAGE_TRANSLATION
+from rate_limiter import DEFAULT_LIMITS, configured_limit
+from translator import TranslationService
+from tts import TTSEngine
+
+
+BOOK_EXTENSIONS = ('.pdf', '.epub', '.txt')
+
+
+def find_books(input_dir):
+    """Sorted paths of the PDF/EPUB/TXT files in a folder"""
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(BOOK_EXTENSIONS) and os.path.isfile(os.path.join(input_dir, name))
+    )
+
+
+def split_rate_limits(processes):
+    """
+    Environment overrides that give each of `processes` workers an equal share of every API limit
+
+    Rate limiters are per process, so without this N processes would send N
+    times the configured request rate.
+    """
+    env = {}
+    for name in DEFAULT_LIMITS:
+        rate, burst = configured_limit(name)
+        env[f'{name.upper()}_RATE_LIMIT'] = str(rate / processes)
+        env[f'{name.upper()}_BURST'] = str(max(1, burst // processes))
+    return env
+
+
+def _init_worker(env):
+    """Process pool initializer: apply this process's share of the rate limits"""
+    os.environ.update(env)
+
+
+def convert_book(book_path, output_dir, cache_dir='cache', threads=2):
+    """
+    Convert one book to per-page MP3 files
+
+    Pages whose audio is already in the output folder are skipped, so an
+    interrupted run can be restarted with the same arguments.
+
+    Args:
+        book_path: PDF/EPUB/TXT file
+        output_dir: Audio is written to <output_dir>/<book name>/page_0001.mp3, ...
+        cache_dir: Shared translation/audio cache
+        threads: Pages processed at the same time
+
+    Returns:
+        Report dict for the book
+    """
+    name = os.path.splitext(os.path.basename(book_path))[0]
+    book_dir = os.path.join(output_dir, name)
+    report = {
+        'book': os.path.basename(book_path),
+        'output_dir': book_dir,
+        'pages': 0,
+        'completed': 0,
+        'skipped': 0,
+        'failed': [],
+        'audio_seconds': 0.0,
+        'seconds': 0.0,
+        'pages_per_minute': None
+    }
+    start = time.monotonic()
+
+    parser = BookParser(book_path, cache_dir)
+    translator = TranslationService(cache_dir)
+    tts = TTSEngine(cache_dir)
+    try:
+        total_pages = parser.get_total_pages()
+        report['pages'] = total_pages
+        os.makedirs(book_dir, exist_ok=True)
+        width = max(4, len(str(total_pages)))
+
+        def convert_page(page_num):
+            target = os.path.join(book_dir, f"page_{page_num + 1:0{width}d}.mp3")
+            if os.path.exists(target):
+                return 'skipped', None
+            text = parser.extract_page(page_num)
+            if not text or not text.strip():
+                translated_text = EMPTY_PAGE_TRANSLATION
+            else:
+                translated_text = translator.translate(text)
+            audio_path = tts.generate_audio(translated_text, page_num)
+            duration = tts.get_audio_duration(translated_text)
+            # Copy via a temp name so a crash never leaves a partial page that looks done
+            shutil.copyfile(audio_path, target + '.tmp')
+            os.replace(target + '.tmp', target)
+            tts.release_audio(translated_text)
+            return 'completed', duration
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            futures = {page_num: executor.submit(convert_page, page_num) for page_num in range(total_pages)}
+            for page_num, future in futures.items():
+                try:
+                    status, duration = future.result()
+                except Exception as e:
+                    print(f"[{name}] Page {page_num + 1} failed: {e}")
+                    report['failed'].append({'page': page_num, 'error': str(e)})
+                    continue
+                report[status] += 1
+                report['audio_seconds'] += duration or 0.0
+                if status == 'completed':
+                    print(f"[{name}] Page {page_num + 1}/{total_pages} done")
+    except Exception as e:
+        print(f"[{name}] Book failed: {e}")
+        report['error'] = str(e)
+    finally:
+        translator.close()
+        parser.close()
+
+    report['seconds'] = round(time.monotonic() - start, 2)
+    report['audio_seconds'] = round(report['audio_seconds'], 1)
+    if report['completed'] and report['seconds']:
+        report['pages_per_minute'] = round(report['completed'] / report['seconds'] * 60, 1)
+    return report
+
+
+def convert_books(book_paths, output_dir, cache_dir='cache', processes=1, threads=2):
+    """
+    Convert several books, one per worker process at a time
+
+    Args:
+        book_paths: Books to convert
+        output_dir: Root folder for per-book audio
+        cache_dir: Shared translation/audio cache
+        processes: Books converted at the same time (each in its own process);
+            the configured API rate limits are split evenly between them
+        threads: Pages converted at the same time within each book
+
+    Returns:
+        Run report dict with per-book reports and totals
+    """
+    start = time.monotonic()
+    if processes > 1 and len(book_paths) > 1:
+        processes = min(processes, len(book_paths))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(split_rate_limits(processes),)) as pool:
+            futures = [pool.submit(convert_book, path, output_dir, cache_dir, threads) for path in book_paths]
+            books = [future.result() for future in futures]
+    else:
+        processes = 1
+        books = [convert_book(path, output_dir, cache_dir, threads) for path in book_paths]
+
+    elapsed = time.monotonic() - start
+    completed = sum(book['completed'] for book in books)
+    return {
+        'output_dir': output_dir,
+        'processes': processes,
+        'threads': threads,
+        'seconds': round(elapsed, 2),
+        'books': books,
+        'totals': {
+            'books': len(books),
+            'pages': sum(book['pages'] for book in books),
+            'completed': completed,
+            'skipped': sum(book['skipped'] for book in books),
+            'failed': sum(len(book['failed']) for book in books),
+            'failed_books': sum(1 for book in books if 'error' in book),
+            'audio_seconds': round(sum(book['audio_seconds'] for book in books), 1),
+            'pages_per_minute': round(completed / elapsed * 60, 1) if completed and elapsed else None
+        }
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Convert a folder of PDF/EPUB/TXT books to Hindi audio')
+    arg_parser.add_argument('input_dir', help='Folder of books')
+    arg_parser.add_argument('--output', default='audio', help='Root folder for per-book audio')
+    arg_parser.add_argument('--cache-dir', default='cache', help='Translation and audio cache')
+    arg_parser.add_argument('--processes', type=int, default=1, help='Books converted in parallel processes')
+    arg_parser.add_argument('--threads', type=int, default=2, help='Pages converted in parallel per book')
+    arg_parser.add_argument('--report', help='JSON report path (default: <output>/report.json)')
+    args = arg_parser.parse_args(argv)
+
+    book_paths = find_books(args.input_dir)
+    if not book_paths:
+        print(f"No PDF/EPUB/TXT files in {args.input_dir}")
+        return 1
+
+    print(f"Converting {len(book_paths)} books with {args.processes} processes x {args.threads} threads")
+    report = convert_books(book_paths, args.output, args.cache_dir, args.processes, args.threads)
+
+    report_path = args.report or os.path.join(args.output, 'report.json')
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    totals = report['totals']
+    print("=" * 60)
+    print(f"Books: {totals['books']}  Pages: {totals['completed']} converted, "
+          f"{totals['skipped']} skipped, {totals['failed']} failed")
+    print(f"Time: {report['seconds']}s ({totals['pages_per_minute']} pages/min)")
+    print(f"Report: {report_path}")
+    print("=" * 60)
+    return 1 if totals['failed'] or totals['failed_books'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Coordination Module
+State shared by the server's worker processes: sessions, page claims and the session secret
+"""
+import os
+import pathlib
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+
+from translation_cache import ThreadConnections
+
+
+# Shared page states
+SHARED_RUNNING = 'running'
+SHARED_DONE = 'done'
+SHARED_FAILED = 'failed'
+
+
+class Coordinator:
+    """
+    Shared view of books and pages for every process using one cache folder
+
+    gunicorn runs several worker processes, each with its own open pipelines.
+    This keeps what they must agree on in <cache_dir>/coordination.db (SQLite,
+    WAL mode, so it only needs the local disk):
+        - the session cookie secret, so any worker accepts any session,
+        - which book each session is listening to, so a request landing on
+          another worker can reopen it,
+        - a generation number per book file, bumped when the file is replaced
+          or deleted, so other workers drop their stale pipeline,
+        - a leased claim per page being processed, so two workers never
+          process the same page; the other worker waits for the claim to be
+          released and then reads the result from the shared translation and
+          audio caches.
+    While a process holds claims, a heartbeat thread renews their leases
+    every lease_seconds / 3, so a page that takes longer than the lease
+    (e.g. TTS backing off for over 10 minutes) is never claimed twice. A
+    claim left by a worker that died expires after lease_seconds.
+
+    Args:
+        cache_dir: Cache folder shared by the worker processes
+        lease_seconds: How long a page claim lasts once its process stops renewing it
+        poll_interval: Seconds between checks while waiting for another worker
+    """
+
+    def __init__(self, cache_dir='cache', lease_seconds=300, poll_interval=0.25):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'coordination.db')
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._host = socket.gethostname()
+
+        self._connections = ThreadConnections(self._connect)
+        self._heartbeat = None  # (pid, stop event) of the lease renewal thread
+        self._heartbeat_lock = threading.Lock()
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS settings ('
+                'name TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'session_id TEXT PRIMARY KEY, book_path TEXT NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS books ('
+                'book_path TEXT PRIMARY KEY, generation INTEGER NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID;'
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'book TEXT NOT NULL, page INTEGER NOT NULL, state TEXT NOT NULL, owner TEXT, '
+                'lease_until REAL NOT NULL DEFAULT 0, updated_at REAL NOT NULL, '
+                'PRIMARY KEY (book, page)) WITHOUT ROWID;'
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @property
+    def owner(self):
+        """Claim owner id of the calling process"""
+        return f"{self._host}:{os.getpid()}"
+
+    def _connect(self):
+        """Open a connection (autocommit; transactions are explicit)"""
+        # Never recreate the db if the cache folder was removed under us
+        uri = pathlib.Path(self.db_path).absolute().as_uri() + '?mode=rw'
+        conn = sqlite3.connect(uri, uri=True, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _conn(self):
+        """Get this thread's connection (closed when the thread ends, reopened after fork)"""
+        return self._connections.get()
+
+    def _write(self, sql, params=()):
+        """Run one write statement in its own immediate transaction; returns the row count"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rowcount = conn.execute(sql, params).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return rowcount
+
+    def secret_key(self):
+        """Session cookie secret shared by every worker (created by the first one to ask)"""
+        self._write('INSERT OR IGNORE INTO settings (name, value) VALUES (?, ?)',
+                    ('secret_key', secrets.token_hex(32)))
+        row = self._conn().execute("SELECT value FROM settings WHERE name = 'secret_key'").fetchone()
+        return bytes.fromhex(row[0])
+
+    def set_session_book(self, session_id, book_path):
+        """Remember the book a session is listening to"""
+        self._write('INSERT OR REPLACE INTO sessions (session_id, book_path, updated_at) VALUES (?, ?, ?)',
+                    (session_id, book_path, time.time()))
+
+    def session_book(self, session_id):
+        """Book path a session is listening to, or None"""
+        row = self._conn().execute(
+            'SELECT book_path FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def latest_session_book(self):
+        """Book path a session picked most recently, or None"""
+        row = self._conn().execute(
+            'SELECT book_path FROM sessions ORDER BY updated_at DESC LIMIT 1'
+        ).fetchone()
+        return row[0] if row else None
+
+    def forget_book(self, book_path):
+        """Drop the sessions listening to a book (e.g. it was deleted)"""
+        self._write('DELETE FROM sessions WHERE book_path = ?', (book_path,))
+
+    def book_generation(self, book_path):
+        """Generation of a book file (0 if it was never replaced)"""
+        row = self._conn().execute(
+            'SELECT generation FROM books WHERE book_path = ?', (book_path,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_book_generation(self, book_path):
+        """Mark a book file as replaced or deleted; returns its new generation"""
+        self._write(
+            'INSERT INTO books (book_path, generation, updated_at) VALUES (?, 1, ?) '
+            'ON CONFLICT (book_path) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at',
+            (book_path, time.time())
+        )
+        return self.book_generation(book_path)
+
+    def claim_page(self, book, page):
+        """
+        Claim a page for this process unless another live process is running it
+
+        Claims are re-entrant: a process that already holds the claim gets it
+        again (with a fresh lease).
+
+        Args:
+            book: Book content hash
+            page: Page number
+
+        Returns:
+            True if this process now holds the claim
+        """
+        now = time.time()
+        claimed = self._write(
+            'INSERT INTO pages (book, page, state, owner, lease_until, updated_at) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (book, page) DO UPDATE SET state = excluded.state, owner = excluded.owner, '
+            'lease_until = excluded.lease_until, updated_at = excluded.updated_at '
+            'WHERE pages.state != ? OR pages.owner = ? OR pages.lease_until < ?',
+            (book, page, SHARED_RUNNING, self.owner, now + self.lease_seconds, now,
+             SHARED_RUNNING, self.owner, now)
+        )
+        if claimed:
+            self._start_heartbeat()
+        return claimed > 0
+
+    def renew_claims(self):
+        """Extend the lease of every page this process is running; returns the number renewed"""
+        now = time.time()
+        return self._write(
+            'UPDATE pages SET lease_until = ?, updated_at = ? WHERE owner = ? AND state = ?',
+            (now + self.lease_seconds, now, self.owner, SHARED_RUNNING)
+        )
+
+    def _start_heartbeat(self):
+        """Start renewing this process's claims (once per process; a forked child starts its own)"""
+        with self._heartbeat_lock:
+            if self._heartbeat is not None and self._heartbeat[0] == os.getpid():
+                return
+            stop = threading.Event()
+            self._heartbeat = (os.getpid(), stop)
+        threading.Thread(target=self._renew_leases, args=(stop,), daemon=True, name='claim-heartbeat').start()
+
+    def _renew_leases(self, stop):
+        """Heartbeat thread: renew claims until the coordinator is closed"""
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                self.renew_claims()
+            except Exception as e:
+                print(f"Error renewing page claims: {e}")
+
+    def finish_page(self, book, page, state):
+        """Release this process's claim on a page and record how it ended (done or failed)"""
+        self._write(
+            'UPDATE pages SET state = ?, owner = NULL, lease_until = 0, updated_at = ? '
+            'WHERE book = ? AND page = ? AND owner = ?',
+            (state, time.time(), book, page, self.owner)
+        )
+
+    def release_page(self, book, page):
+        """Give up this process's claim on a page without recording a result"""
+        self._write('DELETE FROM pages WHERE book = ? AND page = ? AND owner = ? AND state = ?',
+                    (book, page, self.owner, SHARED_RUNNING))
+
+    def release_book(self, book):
+        """Give up every claim this process holds on a book (e.g. the book was closed)"""
+        self._write('DELETE FROM pages WHERE book = ? AND owner = ? AND state = ?',
+                    (book, self.owner, SHARED_RUNNING))
+
+    def page_state(self, book, page):
+        """
+        Shared state of a page
+
+        Returns:
+            (state, owner) or (None, None); a running page whose lease
+            expired counts as unclaimed
+        """
+        row = self._conn().execute(
+            'SELECT state, owner, lease_until FROM pages WHERE book = ? AND page = ?', (book, page)
+        ).fetchone()
+        if row is None or (row[0] == SHARED_RUNNING and row[2] < time.time()):
+            return None, None
+        return row[0], row[1]
+
+    def wait_for_page(self, book, page, timeout=None):
+        """
+        Wait while another process is running a page
+
+        Returns:
+            True once the page is no longer claimed by another process,
+            False if timeout seconds passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state, owner = self.page_state(book, page)
+            if state != SHARED_RUNNING or owner == self.owner:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def page_counts(self, book):
+        """Number of a book's pages per shared state, across all processes"""
+        now = time.time()
+        counts = {SHARED_RUNNING: 0, SHARED_DONE: 0, SHARED_FAILED: 0}
+        rows = self._conn().execute(
+            'SELECT state, COUNT(*) FROM pages WHERE book = ? AND (state != ? OR lease_until >= ?) '
+            'GROUP BY state', (book, SHARED_RUNNING, now)
+        )
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        """Stop renewing claims and close every connection this coordinator opened"""
+        with self._heartbeat_lock:
+            heartbeat, self._heartbeat = self._heartbeat, None
+        if heartbeat is not None and heartbeat[0] == os.getpid():
+            heartbeat[1].set()
+        self._connections.close_all()
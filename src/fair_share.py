@@ -0,0 +1,207 @@
+"""
+Fair Share Module
+Orders access to shared API quota across listeners: on-demand work first, then
+weighted round-robin between books
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import itertools
+import math
+import threading
+
+
+class Work:
+    """
+    Who the current thread is working for
+
+    on_demand may be switched to True while the work runs (e.g. a listener
+    starts waiting for a page being prefetched); every later turn, and a
+    turn already being waited for, is then served as on-demand.
+    """
+
+    __slots__ = ('tenant', 'on_demand', 'weight')
+
+    def __init__(self, tenant=None, on_demand=True, weight=1):
+        self.tenant = tenant
+        self.on_demand = on_demand
+        self.weight = max(1, weight)
+
+
+# Work outside any context (e.g. the batch CLI) counts as on-demand
+DEFAULT_WORK = Work()
+
+_current_work = ContextVar('current_work', default=DEFAULT_WORK)
+
+
+def current_work():
+    """The Work the calling thread is doing"""
+    return _current_work.get()
+
+
+@contextmanager
+def work_context(tenant, on_demand=None, weight=1):
+    """
+    Mark the API calls made inside the block as done for a tenant (book)
+
+    Args:
+        tenant: Book or session the work is for
+        on_demand: True for pages a listener is waiting on, False for
+            prefetch; None keeps the enclosing context's class
+        weight: Share of prefetch quota relative to other tenants
+    """
+    if on_demand is None:
+        on_demand = current_work().on_demand
+    with use_work(Work(tenant, on_demand, weight)):
+        yield
+
+
+@contextmanager
+def use_work(work):
+    """Mark the API calls made inside the block as done for an existing Work (which may be promoted later)"""
+    token = _current_work.set(work)
+    try:
+        yield work
+    finally:
+        _current_work.reset(token)
+
+
+def submit_with_context(executor, fn, *args):
+    """executor.submit that runs fn in a copy of the caller's work context"""
+    return executor.submit(copy_context().run, fn, *args)
+
+
+class FairQueue:
+    """
+    Grants turns to waiting threads, one at a time
+
+    On-demand waiters go first, in arrival order. Prefetch waiters are served
+    by smooth weighted round-robin between tenants (each tenant in arrival
+    order), so one book's prefetch cannot starve another's. A prefetch waiter
+    whose Work is promoted to on-demand joins the on-demand waiters.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._on_demand = deque()
+        self._prefetch = {}  # tenant -> deque of waiters
+        self._credit = {}  # tenant -> smooth WRR current weight
+        self._busy = False
+
+    @contextmanager
+    def turn(self, work=None):
+        """Block until it is this thread's turn; the next waiter is chosen when the block exits"""
+        work = work or current_work()
+        waiter = (next(self._seq), work)
+        with self._cond:
+            if work.on_demand:
+                self._on_demand.append(waiter)
+            else:
+                self._prefetch.setdefault(work.tenant, deque()).append(waiter)
+            while self._busy or self._pick() is not waiter:
+                self._cond.wait()
+            self._grant(waiter)
+            self._busy = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _pick(self):
+        """The waiter that gets the next turn (lock held)"""
+        self._promote()
+        if self._on_demand:
+            return self._on_demand[0]
+        best = None
+        for tenant, waiters in self._prefetch.items():
+            score = (self._credit.get(tenant, 0) + waiters[0][1].weight, -waiters[0][0])
+            if best is None or score > best[0]:
+                best = (score, waiters[0])
+        return best[1] if best else None
+
+    def _promote(self):
+        """Move prefetch waiters whose Work was promoted to the on-demand queue (lock held)"""
+        for tenant, waiters in list(self._prefetch.items()):
+            promoted = [waiter for waiter in waiters if waiter[1].on_demand]
+            if not promoted:
+                continue
+            for waiter in promoted:
+                waiters.remove(waiter)
+            self._on_demand.extend(promoted)
+            if not waiters:
+                del self._prefetch[tenant]
+                self._credit.pop(tenant, None)
+
+    def _grant(self, waiter):
+        """Remove the chosen waiter and update round-robin credit (lock held)"""
+        work = waiter[1]
+        if self._on_demand and self._on_demand[0] is waiter:
+            self._on_demand.popleft()
+            return
+        total = 0
+        for tenant, waiters in self._prefetch.items():
+            weight = waiters[0][1].weight
+            self._credit[tenant] = self._credit.get(tenant, 0) + weight
+            total += weight
+        self._credit[work.tenant] -= total
+        queue = self._prefetch[work.tenant]
+        queue.popleft()
+        if not queue:
+            # Idle tenants do not bank credit
+            del self._prefetch[work.tenant]
+            del self._credit[work.tenant]
+
+    def waiting(self):
+        """Number of waiting threads as (on_demand, prefetch)"""
+        with self._cond:
+            return len(self._on_demand), sum(len(waiters) for waiters in self._prefetch.values())
+
+
+class LatencyTracker:
+    """
+    Recent latencies per key (e.g. time-to-audio per session)
+
+    Args:
+        window: Measurements kept per key
+    """
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def forget(self, key):
+        with self._lock:
+            self._samples.pop(key, None)
+
+    @staticmethod
+    def percentile(samples, pct):
+        """Nearest-rank percentile of a list of numbers (None if empty)"""
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def summary(self):
+        """Per-key and overall count, p50 and p95 (seconds)"""
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+
+        def stats(values):
+            return {
+                'count': len(values),
+                'p50': round(self.percentile(values, 50), 3) if values else None,
+                'p95': round(self.percentile(values, 95), 3) if values else None
+            }
+
+        return {
+            'keys': {key: stats(values) for key, values in samples.items()},
+            'overall': stats([value for values in samples.values() for value in values])
+        }
@@ -0,0 +1,105 @@
+"""
+HTML Text Extraction Module
+Fast streaming XHTML-to-text for EPUB chapters, with BeautifulSoup as fallback
+"""
+from html import unescape
+import re
+
+from bs4 import BeautifulSoup
+
+
+# One token per match: comment, CDATA, tag (quote-aware attributes), declaration/PI, text
+_TOKEN = re.compile(
+    r'<!--.*?(?:-->|$)'
+    r'|<!\[CDATA\[(?P<cdata>.*?)(?:\]\]>|$)'
+    r'|<(?P<close>/?)(?P<tag>[a-zA-Z][^\s/>]*)(?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+    r'|<[!?][^>]*>'
+    r'|(?P<text>[^<]+|<)',
+    re.S
+)
+
+# Elements whose content is never read aloud, with the pattern that ends them
+_SKIP_TAGS = {tag: re.compile(r'</%s\s*>' % tag, re.I) for tag in ('script', 'style')}
+
+# Elements that start a new paragraph
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'dd', 'div',
+    'dl', 'dt', 'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td',
+    'th', 'title', 'tr', 'ul'
+}
+
+
+def _fast_text(markup):
+    """Tokenize markup in one pass, joining block-level content with blank lines"""
+    blocks = []
+    current = []
+    pos = 0
+    size = len(markup)
+
+    while pos < size:
+        for match in _TOKEN.finditer(markup, pos):
+            text = match.group('text')
+            if text is not None:
+                current.append(text)
+                continue
+
+            tag = match.group('tag')
+            if tag is None:
+                cdata = match.group('cdata')
+                if cdata:
+                    current.append(cdata)
+                continue
+
+            tag = tag.lower()
+            if tag in _BLOCK_TAGS:
+                if current:
+                    blocks.append(current)
+                    current = []
+            elif tag in _SKIP_TAGS and not match.group('close') and not match.group(0).endswith('/>'):
+                # Jump past the element body; its text may contain '<' that is not a tag
+                end = _SKIP_TAGS[tag].search(markup, match.end())
+                pos = end.end() if end else size
+                break
+        else:
+            pos = size
+
+    blocks.append(current)
+    paragraphs = []
+    for parts in blocks:
+        text = ''.join(parts)
+        if '&' in text:
+            text = unescape(text)
+        text = ' '.join(text.split())
+        if text:
+            paragraphs.append(text)
+    return '\n\n'.join(paragraphs)
+
+
+def _soup_text(content):
+    """Reference extractor: full BeautifulSoup parse"""
+    return BeautifulSoup(content, 'html.parser').get_text().strip()
+
+
+def extract_text(content, engine='fast'):
+    """
+    Extract readable text from an XHTML document
+
+    Args:
+        content: Markup as bytes (UTF-8) or str
+        engine: 'fast' for the streaming tokenizer, 'bs4' for BeautifulSoup
+
+    Returns:
+        Plain text with paragraphs separated by blank lines ('fast'),
+        or BeautifulSoup's get_text() output ('bs4')
+    """
+    if engine == 'bs4':
+        return _soup_text(content)
+
+    try:
+        markup = content.decode('utf-8-sig') if isinstance(content, bytes) else content
+        return _fast_text(markup)
+    except Exception as e:
+        # Non-UTF-8 or otherwise unexpected input: let BeautifulSoup sort it out
+        print(f"Fast HTML extraction failed ({e}), falling back to BeautifulSoup")
+        return _soup_text(content)
@@ -0,0 +1,166 @@
+"""
+Page Manifest Module
+Append-only per-book record of finished pages, so processed state survives restarts
+"""
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, no locking needed
+    fcntl = None
+
+
+# Manifest entry statuses
+ENTRY_COMPLETED = 'completed'
+ENTRY_FAILED = 'failed'
+
+# Rewrite the log on load once superseded lines outnumber live entries by this factor
+COMPACT_RATIO = 2
+
+
+def text_hash(text):
+    """Content hash of a page's text"""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+class PageManifest:
+    """
+    Durable page results for one book, keyed by book content hash
+
+    Stored as JSON lines in <cache_dir>/manifests/<hash>.jsonl, one line per
+    finished page:
+        {"page": 3, "status": "completed", "text_hash": ..., "translation_key": ...,
+         "audio_key": ..., "audio_duration": 14.2}
+
+    Lines are appended as pages finish and replayed on load; the last line
+    for a page wins. A torn last line (crash mid-write) is skipped.
+
+    Several processes may share a manifest. Appends hold a shared flock on
+    <hash>.jsonl.lock and compaction an exclusive one, and an appender whose
+    file was replaced by another process's compaction reopens the new file,
+    so no record is written to an unlinked log.
+    """
+
+    def __init__(self, cache_dir, book_hash):
+        self.manifest_dir = os.path.join(cache_dir, 'manifests')
+        self.path = os.path.join(self.manifest_dir, f"{book_hash}.jsonl")
+        self.lock_path = self.path + '.lock'
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._closed = False
+
+    def load(self):
+        """
+        Replay the manifest from disk
+
+        Returns:
+            Number of pages with an entry
+        """
+        with self._lock:
+            self._entries = {}
+            if not os.path.exists(self.path):
+                return 0  # Nothing to replay; the first record() creates the files
+            # Exclusive: no other process appends between reading and compacting
+            with self._file_lock(exclusive=True):
+                lines = 0
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            lines += 1
+                            try:
+                                entry = json.loads(line)
+                                self._entries[int(entry['page'])] = entry
+                            except (ValueError, KeyError, TypeError):
+                                continue
+                if lines > COMPACT_RATIO * len(self._entries):
+                    self._compact()
+            return len(self._entries)
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """Hold the manifest's inter-process lock"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self):
+        """Rewrite the log with one line per page (locks held)"""
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for page_num in sorted(self._entries):
+                    f.write(json.dumps(self._entries[page_num], ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error compacting page manifest: {e}")
+
+    def record(self, page_num, status, **fields):
+        """
+        Append a page's result
+
+        Args:
+            page_num: Page number
+            status: ENTRY_COMPLETED or ENTRY_FAILED
+            **fields: text_hash, translation_key, audio_key, audio_duration, ...
+        """
+        entry = {'page': page_num, 'status': status, **fields}
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._closed:
+                return  # Work finishing after shutdown is not recorded
+            with self._file_lock(exclusive=False):
+                self._open_append()
+                self._file.write(line)
+                self._file.flush()
+            self._entries[page_num] = entry
+
+    def _open_append(self):
+        """Open the append handle, reopening it if the log was replaced by a compaction (locks held)"""
+        if self._file is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(self._file.fileno())
+                replaced = (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+            except FileNotFoundError:
+                replaced = True
+            if replaced:
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def get(self, page_num):
+        """Latest entry for a page, or None"""
+        with self._lock:
+            return self._entries.get(page_num)
+
+    def pages(self, status=ENTRY_COMPLETED):
+        """Sorted page numbers whose latest entry has the given status"""
+        with self._lock:
+            return sorted(page for page, entry in self._entries.items() if entry['status'] == status)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def close(self):
+        """Close the append handle; entries stay readable, later records are ignored"""
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+            self._file = None
@@ -5,16 +5,48 @@ Extracts text from PDF and EPUB files with page-level granularity
 import PyPDF2
 from ebooklib import epub
 from ebooklib import ITEM_DOCUMENT
-from bs4 import BeautifulSoup
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import threading
 import os
 
+from html_text import extract_text
+from text_store import PageTextStore, hash_file
+from txt_paginator import iter_paginate, open_txt, paginate
+
 
 class BookParser:
     """Parser for PDF and EPUB files"""
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache_dir=None, page_cache_size=32):
         self.file_path = file_path
         self.file_type = self._detect_file_type()
+        self.cache_dir = cache_dir
+        
+        # Persisted page text, keyed by book content hash (None without a cache dir)
+        self._store = None
+        self._book_hash = None
+        
+        # Open document handles, built lazily and kept until close(); a closed
+        # parser never reopens them
+        self._lock = threading.RLock()
+        self._closed = False
+        self._pdf_file = None
+        self._pdf_reader = None
+        self._epub_pages = None
+        self._chapter_map = None
+        self._txt_file = None
+        self._txt_buffer = None
+        self._txt_index = None
+        
+        # Progressive page index of the source document (see build_index)
+        self._indexer = None
+        self._indexed_pages = 0
+        self._index_complete = False
+        
+        # Bounded LRU of extracted page text
+        self._page_cache = OrderedDict()
+        self._page_cache_size = page_cache_size
         
     def _detect_file_type(self):
         """Detect file type based on extension"""
@@ -29,173 +61,416 @@ class BookParser:
             raise ValueError(f"Unsupported file type: {ext}")
     
     def get_total_pages(self):
-        """Get total number of pages/chapters"""
+        """Get total number of pages/chapters (indexes the whole book if needed)"""
+        self.build_index()
+        with self._lock:
+            if self._store_loaded():
+                return self._store.page_count
+            return self._indexed_pages
+    
+    def build_index(self):
+        """
+        Index every page of the book
+        
+        Uses the persisted page store when there is one. Otherwise the source is
+        paginated in small steps, releasing the lock between steps so pages
+        already indexed can be extracted while the rest of the book is scanned.
+        """
+        started = False
+        while True:
+            with self._lock:
+                if self._closed or (started and self._indexer is None):
+                    return  # Parser was closed while indexing
+                if self._load_text_store() or self._index_complete:
+                    return
+                self._index_step()
+                started = True
+    
+    def index_status(self):
+        """
+        Get indexing progress without doing any indexing work
+        
+        Returns:
+            dict with pages_indexed and complete
+        """
+        with self._lock:
+            if self._store_loaded():
+                return {'pages_indexed': self._store.page_count, 'complete': True}
+            return {'pages_indexed': self._indexed_pages, 'complete': self._index_complete}
+    
+    def page_exists(self, page_num):
+        """Check whether a page exists, indexing only as far as needed to know"""
+        if page_num < 0:
+            return False
+        while True:
+            with self._lock:
+                if self._store_loaded():
+                    return page_num < self._store.page_count
+                if self._index_complete or page_num < self._indexed_pages:
+                    return page_num < self._indexed_pages
+                self._index_step()
+    
+    def _ensure_indexed(self, page_num):
+        """Index the source until page_num is known (lock held); True if the page exists"""
+        while not self._index_complete and self._indexed_pages <= page_num:
+            self._index_step()
+        return 0 <= page_num < self._indexed_pages
+    
+    def _index_step(self):
+        """Advance the source page index by one step (lock held)"""
+        self._check_open()
+        if self._indexer is None:
+            self._indexer = self._iter_index()
+        try:
+            self._indexed_pages = next(self._indexer)
+        except StopIteration:
+            self._index_complete = True
+        except Exception as e:
+            # Start over from scratch on the next attempt
+            self._close_documents()
+            names = {'pdf': 'PDF', 'epub': 'EPUB', 'txt': 'TXT file'}
+            raise Exception(f"Error reading {names[self.file_type]}: {str(e)}")
+    
+    def _iter_index(self):
+        """Index the source document, yielding the number of pages indexed so far"""
         if self.file_type == 'pdf':
-            return self._get_pdf_pages()
+            yield len(self._open_pdf().pages)
         elif self.file_type == 'epub':
-            return self._get_epub_chapters()
+            yield from self._iter_epub_index()
         elif self.file_type == 'txt':
-            return self._get_txt_pages()
+            yield from self._iter_txt_index()
     
     def extract_page(self, page_num):
         """Extract text from specific page/chapter"""
-        if self.file_type == 'pdf':
+        with self._lock:
+            self._check_open()
+            if page_num in self._page_cache:
+                self._page_cache.move_to_end(page_num)
+                return self._page_cache[page_num]
+            
+            text = self._extract_uncached(page_num)
+            
+            self._page_cache[page_num] = text
+            if len(self._page_cache) > self._page_cache_size:
+                self._page_cache.popitem(last=False)
+            return text
+    
+    def _extract_uncached(self, page_num):
+        """Extract page text from the store or the source document"""
+        if self._store_loaded():
+            return self._read_stored_page(page_num)
+        elif self.file_type == 'pdf':
             return self._extract_pdf_page(page_num)
         elif self.file_type == 'epub':
-            return self._extract_epub_chapter(page_num)
+            return self._extract_epub_page(page_num)
         elif self.file_type == 'txt':
             return self._extract_txt_page(page_num)
     
-    def _get_pdf_pages(self):
-        """Get number of pages in PDF"""
-        try:
-            with open(self.file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                return len(reader.pages)
-        except Exception as e:
-            raise Exception(f"Error reading PDF: {str(e)}")
+    def _check_open(self):
+        """Raise if the parser was closed (e.g. its book was evicted while a page was requested)"""
+        if self._closed:
+            raise ValueError(f"{os.path.basename(self.file_path)} is closed")
     
-    def _extract_pdf_page(self, page_num):
-        """Extract text from specific PDF page"""
+    def _store_loaded(self):
+        """Check whether the page store is open, without hashing the book"""
+        return self._store is not None and self._store.is_loaded
+    
+    def _load_text_store(self):
+        """Open the persisted page store for this book if one exists"""
+        if not self.cache_dir or self._closed:
+            return False
+        if self._store is None:
+            self._store = PageTextStore(self.cache_dir, self.book_hash())
+        return self._store.load()
+    
+    def book_hash(self):
+        """Content hash of the book file (computed once)"""
+        with self._lock:
+            if self._book_hash is None:
+                self._book_hash = hash_file(self.file_path)
+            return self._book_hash
+    
+    def _read_stored_page(self, page_num):
+        """Extract page text from the persisted page store"""
         try:
-            with open(self.file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                if page_num >= len(reader.pages):
-                    raise ValueError(f"Page {page_num} out of range")
-                page = reader.pages[page_num]
-                text = page.extract_text()
-                return text.strip()
+            return self._store.read_page(page_num)
         except Exception as e:
-            raise Exception(f"Error extracting PDF page {page_num}: {str(e)}")
+            raise Exception(f"Error extracting page {page_num}: {str(e)}")
     
-    def _get_epub_chapters(self):
-        """Get number of chapters in EPUB"""
+    def has_text_store(self):
+        """Check whether page text is served from the persisted store"""
+        with self._lock:
+            return self._load_text_store()
+    
+    def build_text_store(self, parallel=False):
+        """
+        One-time extraction pass that persists every page's text
+        
+        Later loads read page count and text from the store without re-parsing.
+        Does nothing when no cache dir is configured or the store already exists.
+        
+        Args:
+            parallel: Extract with a process pool (see iter_pages)
+        """
+        with self._lock:
+            if not self.cache_dir or self._load_text_store():
+                return
+        # Indexes outside the lock so early pages stay available meanwhile
+        total_pages = self.get_total_pages()
+        
+        with self._lock:
+            store = self._store
+            if store is None or store.is_loaded:
+                return
+        if parallel:
+            pages = (page['text'] for page in self.iter_pages(parallel=True))
+        else:
+            pages = self._iter_source_pages(total_pages)
+        
+        meta = {'chapters': self.get_chapters()} if self.file_type == 'epub' else None
+        
+        # Pages stream straight to disk, so whole-book text never sits in memory
         try:
-            book = epub.read_epub(self.file_path)
-            chapters = [item for item in book.get_items() if item.get_type() == ITEM_DOCUMENT]
-            return len(chapters)
+            store.write(pages, meta)
+            print(f"Page store written: {store.index_path} ({total_pages} pages)")
         except Exception as e:
-            raise Exception(f"Error reading EPUB: {str(e)}")
+            print(f"Error writing page store: {e}")
+            return
+        
+        with self._lock:
+            # Page text now comes from the store; release the source document
+            if self._store is store:
+                self._close_documents()
+    
+    def _iter_source_pages(self, total_pages):
+        """Yield page text from the source document, locking per page"""
+        for i in range(total_pages):
+            # Lock per page so on-demand page fetches can interleave
+            with self._lock:
+                if self._closed:
+                    raise Exception("Parser was closed while extracting")
+                yield self._extract_uncached(i)
+    
+    def _open_pdf(self):
+        """Open the PDF once and keep the reader for later page fetches"""
+        self._check_open()
+        if self._pdf_reader is None:
+            self._pdf_file = open(self.file_path, 'rb')
+            try:
+                self._pdf_reader = PyPDF2.PdfReader(self._pdf_file)
+            except Exception:
+                self._pdf_file.close()
+                self._pdf_file = None
+                raise
+        return self._pdf_reader
+    
+    def _iter_epub_index(self):
+        """Read the EPUB once and split its chapters into playback-sized pages, one chapter per step"""
+        book = epub.read_epub(self.file_path)
+        titles = _toc_titles(book.toc)
+        chapters = [item for item in book.get_items() if item.get_type() == ITEM_DOCUMENT]
+        
+        self._epub_pages = []
+        self._chapter_map = []
+        for chapter_num, chapter in enumerate(chapters):
+            # Same word budget as TXT files; every chapter keeps at least one page.
+            # Each chapter starts with small fast-start pages, so chapter jumps play sooner.
+            data = self._epub_chapter_text(chapter).encode('utf-8')
+            index = paginate(data)
+            self._chapter_map.append({
+                'chapter': chapter_num,
+                'title': titles.get(chapter.get_name()),
+                'start_page': len(self._epub_pages),
+                'page_count': len(index)
+            })
+            self._epub_pages.extend((data, index, i) for i in range(len(index)))
+            yield len(self._epub_pages)
     
-    def _extract_epub_chapter(self, chapter_num):
-        """Extract text from specific EPUB chapter"""
+    def _extract_pdf_page(self, page_num):
+        """Extract text from specific PDF page"""
         try:
-            book = epub.read_epub(self.file_path)
-            chapters = [item for item in book.get_items() if item.get_type() == ITEM_DOCUMENT]
-            
-            if chapter_num >= len(chapters):
-                raise ValueError(f"Chapter {chapter_num} out of range")
-            
-            chapter = chapters[chapter_num]
-            content = chapter.get_content()
-            soup = BeautifulSoup(content, 'html.parser')
-            text = soup.get_text()
+            reader = self._open_pdf()
+            if page_num >= len(reader.pages):
+                raise ValueError(f"Page {page_num} out of range")
+            page = reader.pages[page_num]
+            text = page.extract_text()
             return text.strip()
         except Exception as e:
-            raise Exception(f"Error extracting EPUB chapter {chapter_num}: {str(e)}")
+            raise Exception(f"Error extracting PDF page {page_num}: {str(e)}")
     
-    def _get_txt_pages(self):
-        """Get number of pages in TXT file (smart pagination)"""
+    def _epub_chapter_text(self, chapter):
+        """Extract plain text from an EPUB chapter's XHTML"""
+        return extract_text(chapter.get_content())
+    
+    def _extract_epub_page(self, page_num):
+        """Extract text from specific EPUB page"""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            # Handle empty or whitespace-only files
-            content = content.strip()
-            if not content:
-                self._txt_pages = [""]  # Empty page for empty files
-                return 1
-            
-            # Break into small pages (200-250 words max for faster processing)
-            MAX_WORDS_PER_PAGE = 250
-            pages = []
-            
-            # Split by double newlines (paragraphs) first
-            paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-            
-            # If no paragraphs (continuous text), use word-based chunking
-            if len(paragraphs) <= 1:
-                # File has no paragraph breaks - split by words directly
-                all_words = content.split()
-                
-                # Create pages of MAX_WORDS_PER_PAGE words each
-                for i in range(0, len(all_words), MAX_WORDS_PER_PAGE):
-                    page_words = all_words[i:i + MAX_WORDS_PER_PAGE]
-                    pages.append(' '.join(page_words))
-            else:
-                # Normal paragraph processing
-                current_page = []
-                word_count = 0
-                
-                for para in paragraphs:
-                    para_words = len(para.split())
-                    
-                    # If single paragraph is too large, split it further
-                    if para_words > MAX_WORDS_PER_PAGE:
-                        # Split long paragraph by sentences
-                        sentences = para.replace('! ', '!|').replace('? ', '?|').replace('. ', '.|').split('|')
-                        for sentence in sentences:
-                            sentence = sentence.strip()
-                            if not sentence:
-                                continue
-                            sentence_words = len(sentence.split())
-                            
-                            if word_count + sentence_words > MAX_WORDS_PER_PAGE and current_page:
-                                # Save current page
-                                pages.append(' '.join(current_page))
-                                current_page = [sentence]
-                                word_count = sentence_words
-                            else:
-                                current_page.append(sentence)
-                                word_count += sentence_words
-                    else:
-                        # Normal paragraph processing
-                        if word_count + para_words > MAX_WORDS_PER_PAGE and current_page:
-                            # Save current page
-                            pages.append('\n\n'.join(current_page))
-                            current_page = [para]
-                            word_count = para_words
-                        else:
-                            current_page.append(para)
-                            word_count += para_words
-                
-                # Add last page
-                if current_page:
-                    pages.append('\n\n'.join(current_page))
-            
-            # Store pages for later extraction
-            self._txt_pages = pages
-            return len(pages) if pages else 1
+            if not self._ensure_indexed(page_num):
+                raise ValueError(f"Page {page_num} out of range")
             
+            data, index, chapter_page = self._epub_pages[page_num]
+            return index.decode(data, chapter_page)
         except Exception as e:
-            raise Exception(f"Error reading TXT file: {str(e)}")
+            raise Exception(f"Error extracting EPUB page {page_num}: {str(e)}")
+    
+    def get_chapters(self, wait=True):
+        """
+        Get the chapter to page mapping for navigation
+        
+        Args:
+            wait: Index the whole book first; if False, return the chapters
+                indexed so far
+        
+        Returns:
+            List of dicts with chapter, title, start_page and page_count,
+            or an empty list for formats without chapters
+        """
+        if self.file_type != 'epub':
+            return []
+        if wait:
+            self.build_index()
+        with self._lock:
+            if self._store_loaded():
+                return self._store.meta.get('chapters', [])
+            return list(self._chapter_map or [])
+    
+    def _iter_txt_index(self):
+        """Map the TXT file and build its page index in one streaming pass, a few paragraphs per step"""
+        self._txt_file, self._txt_buffer = open_txt(self.file_path)
+        for index in iter_paginate(self._txt_buffer):
+            self._txt_index = index
+            yield len(index)
     
     def _extract_txt_page(self, page_num):
         """Extract text from specific TXT page"""
         try:
-            # Ensure pages are loaded
-            if not hasattr(self, '_txt_pages'):
-                self._get_txt_pages()
-            
-            if page_num >= len(self._txt_pages):
+            if not self._ensure_indexed(page_num):
                 raise ValueError(f"Page {page_num} out of range")
-            
-            return self._txt_pages[page_num]
+            return self._txt_index.decode(self._txt_buffer, page_num)
         except Exception as e:
             raise Exception(f"Error extracting TXT page {page_num}: {str(e)}")
     
-    def extract_all_pages(self):
+    def extract_all_pages(self, parallel=False, max_workers=None):
         """Extract text from all pages/chapters"""
+        return list(self.iter_pages(parallel=parallel, max_workers=max_workers))
+    
+    def iter_pages(self, parallel=False, max_workers=None, chunk_size=None):
+        """
+        Yield every page's text in page order
+        
+        Args:
+            parallel: Split the page range across a process pool
+            max_workers: Number of worker processes (default: CPU count)
+            chunk_size: Pages per worker task (default: ~4 tasks per worker)
+            
+        Yields:
+            dict with page_num and text
+        """
         total_pages = self.get_total_pages()
-        pages = []
-        for i in range(total_pages):
-            text = self.extract_page(i)
-            pages.append({
-                'page_num': i,
-                'text': text
-            })
-        return pages
+        
+        # Only PDF pages are independent of each other; TXT and EPUB pages come
+        # from one whole-document pagination pass, and stored pages are O(1) to read
+        use_pool = (parallel and total_pages > 1 and self.file_type == 'pdf'
+                    and not self._store_loaded())
+        if not use_pool:
+            for i in range(total_pages):
+                yield {'page_num': i, 'text': self.extract_page(i)}
+            return
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        if not chunk_size:
+            chunk_size = max(1, -(-total_pages // (max_workers * 4)))
+        
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                (start, pool.submit(_extract_page_range, self.file_path, start,
+                                    min(start + chunk_size, total_pages)))
+                for start in range(0, total_pages, chunk_size)
+            ]
+            # Wait on chunks in submission order so pages stream out in order; a
+            # page that failed raises after the pages before it, as in serial mode
+            for start, future in futures:
+                texts, error = future.result()
+                for offset, text in enumerate(texts):
+                    yield {'page_num': start + offset, 'text': text}
+                if error is not None:
+                    raise Exception(error)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _close_documents(self):
+        """Release open source document handles"""
+        if self._pdf_file is not None:
+            try:
+                self._pdf_file.close()
+            except Exception as e:
+                print(f"Error closing PDF: {e}")
+        self._pdf_file = None
+        self._pdf_reader = None
+        self._epub_pages = None
+        self._chapter_map = None
+        
+        if self._txt_buffer is not None and not isinstance(self._txt_buffer, bytes):
+            self._txt_buffer.close()
+        if self._txt_file is not None:
+            self._txt_file.close()
+        self._txt_file = None
+        self._txt_buffer = None
+        self._txt_index = None
+        
+        self._indexer = None
+        self._indexed_pages = 0
+        self._index_complete = False
+    
+    def close(self):
+        """Close open document handles and drop cached page text; later page requests raise"""
+        with self._lock:
+            self._closed = True
+            self._close_documents()
+            self._page_cache.clear()
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 
+def _toc_titles(toc):
+    """Map EPUB item file names to their table-of-contents titles"""
+    titles = {}
+    for entry in toc:
+        if isinstance(entry, tuple):
+            section, children = entry
+            titles.update(_toc_titles(children))
+            entry = section
+        href = getattr(entry, 'href', None)
+        if href:
+            titles.setdefault(href.split('#')[0], entry.title)
+    return titles
+
+
+def _extract_page_range(file_path, start, end):
+    """
+    Extract pages [start, end) in a worker process
+    
+    Returns:
+        (texts, error): the text of each page up to the first that failed,
+        and that page's error message (None if every page was extracted)
+    """
+    texts = []
+    with BookParser(file_path) as parser:
+        try:
+            for i in range(start, end):
+                texts.append(parser._extract_uncached(i))
+        except Exception as e:
+            return texts, str(e)
+    return texts, None
 
 
 def parse_book(file_path):
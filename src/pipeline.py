@@ -3,7 +3,9 @@ Async Processing Pipeline
 Coordinates background processing of pages for seamless playback
 """
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import math
+from concurrent.futures import Future, ThreadPoolExecutor
 import threading
 from queue import Queue
 import sys
@@ -13,37 +15,347 @@ import time
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from coordination import SHARED_DONE, SHARED_FAILED
+from fair_share import Work, current_work, use_work, work_context
+from page_manifest import ENTRY_COMPLETED, ENTRY_FAILED, PageManifest, text_hash
 from parser import BookParser
+from scheduler import PageScheduler
 from translator import TranslationService
 from tts import TTSEngine
 
 
+# Page processing states
+PAGE_QUEUED = 'queued'
+PAGE_RUNNING = 'running'
+PAGE_DONE = 'done'
+PAGE_FAILED = 'failed'
+PAGE_STATES = (PAGE_QUEUED, PAGE_RUNNING, PAGE_DONE, PAGE_FAILED)
+
+# Book indexing states
+INDEX_COUNTING = 'counting'
+INDEX_READY = 'ready'
+INDEX_FAILED = 'failed'
+
+# Placeholder for pages without text
+EMPTY_PAGE_TEXT = "Empty page"
+EMPTY_PAGE_TRANSLATION = "खाली पृष्ठ"  # "Empty page" in Hindi
+
+# Worker threads per prefetch stage (translation and TTS are separate API bottlenecks)
+STAGE_WORKERS = {'extract': 1, 'translate': 2, 'tts': 2}
+
+# Adaptive prefetch: keep enough pages ahead that processing outpaces playback by this factor
+PREFETCH_MARGIN = 1.5
+MIN_PREFETCH = 1
+MAX_PREFETCH = 10
+EWMA_ALPHA = 0.3  # Weight of the newest measurement
+
+
 class ProcessingPipeline:
     """Manages async processing of book pages"""
     
-    def __init__(self, book_path, cache_dir='cache', prefetch_count=3):
+    def __init__(self, book_path, cache_dir='cache', prefetch_count=3, adaptive_prefetch=True, prefetch_cap=None,
+                 coordinator=None):
         self.book_path = book_path
         self.cache_dir = cache_dir
         self.prefetch_count = prefetch_count
+        self.adaptive_prefetch = adaptive_prefetch
+        
+        # Shared page claims when several worker processes serve this book (optional)
+        self.coordinator = coordinator
+        
+        # Fair share of the API quota: this book's work is its own tenant, weighted by
+        # its number of listeners, and may have at most prefetch_cap prefetch pages
+        # outstanding (adaptive depth stays within it). A prefetch_count above an
+        # explicit cap is an error; the PREFETCH_CAP/default cap is raised to it.
+        self.tenant = os.path.abspath(book_path)
+        self.weight = 1
+        if prefetch_cap is not None and prefetch_cap < prefetch_count:
+            raise ValueError(f"prefetch_count {prefetch_count} exceeds prefetch_cap {prefetch_cap}")
+        self.prefetch_cap = max(prefetch_cap or int(os.environ.get('PREFETCH_CAP', MAX_PREFETCH)), prefetch_count)
+        
+        # Moving averages of page processing latency and audio length (seconds)
+        self.avg_page_seconds = None
+        self.avg_audio_seconds = None
         
         # Initialize services
-        self.parser = BookParser(book_path)
+        self.parser = BookParser(book_path, cache_dir)
         self.translator = TranslationService(cache_dir)
         self.tts = TTSEngine(cache_dir)
         
-        # Processing state
-        self.total_pages = self.parser.get_total_pages()
+        # Processing state (the page count is known once background indexing finishes)
+        self.indexing = INDEX_COUNTING
         self.current_page = 0
         self.processed_pages = {}
+        self.page_states = {}  # page_num -> PAGE_* state
+        self.page_futures = {}  # page_num -> Future of the page's latest run
+        self.page_started = {}  # page_num -> monotonic time its run started
+        self.page_work = {}  # page_num -> Works its API calls are running as (see _expedite)
+        self.expedited = set()  # Queued or running pages a listener is waiting for
         self.processing_lock = threading.Lock()
+        
+        # Durable record of finished pages, opened on first use (needs the book hash)
+        self.manifest = None
+        self._manifest_lock = threading.Lock()
+        
         self.executor = ThreadPoolExecutor(max_workers=2)
         
-        print(f"Pipeline initialized: {self.total_pages} pages")
+        # Prefetch runs as overlapping stages (extract → translate → TTS), each with
+        # its own workers and bounded priority queue. The extract queue takes new
+        # pages nearest-first and is cancelled on seek; later stages apply backpressure.
+        self.page_priorities = {}  # page_num -> priority of its prefetch run
+        self.stage_work = {}  # page_num -> partial results between stages
+        queue_size = max(prefetch_count, 1)
+        self.stages = {
+            'extract': PageScheduler(self._as_prefetch(self._extract_stage), workers=STAGE_WORKERS['extract'],
+                                     max_queued=queue_size * 2, on_drop=self._drop_queued, name='extract'),
+            'translate': PageScheduler(self._as_prefetch(self._translate_stage), workers=STAGE_WORKERS['translate'],
+                                       max_queued=queue_size, on_drop=self._drop_staged, name='translate'),
+            'tts': PageScheduler(self._as_prefetch(self._tts_stage), workers=STAGE_WORKERS['tts'],
+                                 max_queued=queue_size, on_drop=self._drop_staged, name='tts'),
+        }
+        
+        # Index the book in the background so loading returns at once; pages are
+        # served as soon as they are indexed
+        self.executor.submit(self._index_book)
+        
+        print(f"Pipeline initialized: indexing {os.path.basename(book_path)} in background")
+    
+    @property
+    def total_pages(self):
+        """Total number of pages, or None while the book is still being indexed"""
+        status = self.parser.index_status()
+        return status['pages_indexed'] if status['complete'] else None
+    
+    def _index_book(self):
+        """Index every page, then persist extracted text once so later loads skip re-parsing"""
+        self._get_manifest()
+        try:
+            self.parser.build_index()
+        except Exception as e:
+            print(f"Error indexing book: {e}")
+            self.indexing = INDEX_FAILED
+            return
+        if self.total_pages is None:
+            return  # Closed while indexing
+        self.indexing = INDEX_READY
+        print(f"Book indexed: {self.total_pages} pages")
+        self.parser.build_text_store()
+    
+    def prefetch_work(self):
+        """Context for API calls made ahead of the reader (yields to on-demand pages)"""
+        return work_context(self.tenant, on_demand=False, weight=self.weight)
+    
+    def _as_prefetch(self, handler):
+        """Wrap a stage handler so its API calls count as this book's prefetch work (until expedited)"""
+        def run(page_num):
+            with self._page_work([page_num], on_demand=False):
+                handler(page_num)
+        return run
+    
+    @contextmanager
+    def _page_work(self, page_nums, on_demand):
+        """
+        Make the block's API calls for some pages as one Work that _expedite can promote
+        
+        The Work is on-demand from the start if a listener already waits for
+        one of the pages.
+        """
+        with self.processing_lock:
+            on_demand = on_demand or any(page in self.expedited for page in page_nums)
+            work = Work(self.tenant, on_demand, self.weight)
+            for page in page_nums:
+                self.page_work.setdefault(page, []).append(work)
+        try:
+            with use_work(work):
+                yield work
+        finally:
+            with self.processing_lock:
+                for page in page_nums:
+                    works = self.page_work.get(page, [])
+                    if work in works:
+                        works.remove(work)
+                    if not works:
+                        self.page_work.pop(page, None)
+    
+    def _get_manifest(self):
+        """Open and replay this book's page manifest on first use (None without a cache dir)"""
+        with self._manifest_lock:
+            if self.manifest is None and self.cache_dir:
+                try:
+                    manifest = PageManifest(self.cache_dir, self.parser.book_hash())
+                    ready = manifest.load()
+                    self.manifest = manifest
+                    if ready:
+                        print(f"Page manifest: {len(manifest.pages())} pages ready from earlier runs")
+                except Exception as e:
+                    print(f"Error loading page manifest: {e}")
+            return self.manifest
+    
+    def _record_page(self, page_num, result):
+        """Append a finished page to the manifest"""
+        manifest = self._get_manifest()
+        if manifest is None:
+            return
+        try:
+            if result['status'] != 'completed':
+                manifest.record(page_num, ENTRY_FAILED, error=result.get('error'))
+                return
+            text = result['original_text']
+            translated_text = result['translated_text']
+            placeholder = (text, translated_text) == (EMPTY_PAGE_TEXT, EMPTY_PAGE_TRANSLATION)
+            manifest.record(
+                page_num, ENTRY_COMPLETED,
+                text_hash=text_hash(text),
+                translation_key=None if placeholder else self.translator.cache_key(text),
+                audio_key=self.tts.cache_key(translated_text),
+                audio_duration=result.get('audio_duration')
+            )
+        except Exception as e:
+            print(f"Error recording page {page_num + 1} in manifest: {e}")
+    
+    def is_page_recorded(self, page_num):
+        """Check whether the manifest has a page as completed (in this or an earlier run)"""
+        self._get_manifest()
+        entry = self.manifest.get(page_num) if self.manifest else None
+        return entry is not None and entry['status'] == ENTRY_COMPLETED
+    
+    def _restore_page(self, page_num):
+        """
+        Rebuild a page finished in an earlier run from its manifest entry
+        
+        Reads the page text and cached translation and checks the audio file
+        exists; no translation or TTS lookups by content are needed.
+        
+        Returns:
+            The page result, or None if the page must be processed
+        """
+        if not self.is_page_recorded(page_num):
+            return None
+        entry = self.manifest.get(page_num)
+        
+        try:
+            text = self.parser.extract_page(page_num)
+            if not text or not text.strip():
+                text, translated_text = EMPTY_PAGE_TEXT, EMPTY_PAGE_TRANSLATION
+            else:
+                translated_text = self.translator.get_cached(entry['translation_key'])
+            # The page text changed (e.g. new pagination rules) or a cache was cleared
+            if (text_hash(text) != entry['text_hash'] or translated_text is None
+                    or not self.tts.has_audio(entry['audio_key'])):
+                return None
+        except Exception as e:
+            print(f"Error restoring page {page_num + 1}: {e}")
+            return None
+        
+        result = {
+            'page_num': page_num,
+            'original_text': text,
+            'translated_text': translated_text,
+            'audio_path': self.tts.get_audio_path(entry['audio_key']),
+            'audio_duration': entry.get('audio_duration'),
+            'status': 'completed'
+        }
+        with self.processing_lock:
+            state = self.page_states.get(page_num)
+            if state == PAGE_RUNNING:
+                return None  # Being processed right now; let that run finish
+            if state == PAGE_DONE:
+                return self.processed_pages[page_num]
+            self.processed_pages[page_num] = result
+            self.page_states[page_num] = PAGE_DONE
+            future = self.page_futures.setdefault(page_num, Future())
+            self.page_priorities.pop(page_num, None)
+        if not future.done():
+            future.set_result(result)
+        return result
+    
+    def _claim_shared(self, page_num):
+        """
+        Take the page's claim across worker processes
+        
+        If another process is running the page, wait for it to finish; this
+        run then reads its translation and audio from the shared caches.
+        """
+        if self.coordinator is None:
+            return
+        try:
+            book = self.parser.book_hash()
+            while not self.coordinator.claim_page(book, page_num):
+                print(f"Page {page_num + 1}: being processed by another worker, waiting")
+                self.coordinator.wait_for_page(book, page_num)
+        except Exception as e:
+            print(f"Error claiming page {page_num + 1}: {e}")
+    
+    def _finish_shared(self, page_num, result):
+        """Publish a finished page's translations and release its claim"""
+        if self.coordinator is None:
+            return
+        try:
+            # Pending translations must be readable by the process that waited on this page
+            self.translator.flush()
+            state = SHARED_DONE if result['status'] == 'completed' else SHARED_FAILED
+            self.coordinator.finish_page(self.parser.book_hash(), page_num, state)
+        except Exception as e:
+            print(f"Error releasing page {page_num + 1}: {e}")
+    
+    def _extract(self, page_num):
+        """Extract a page's text"""
+        print(f"Processing page {page_num + 1}/{self.total_pages or '?'}")
+        return self.parser.extract_page(page_num)
+    
+    def _translate(self, page_num, text):
+        """
+        Translate a page's text
+        
+        Returns:
+            (text, translated_text); empty pages get a placeholder
+        """
+        # Handle empty pages gracefully
+        if not text or not text.strip():
+            print(f"Page {page_num + 1}: Empty page detected, using placeholder")
+            return EMPTY_PAGE_TEXT, EMPTY_PAGE_TRANSLATION
+        
+        print(f"Page {page_num + 1}: Extracted {len(text)} characters")
+        # Translate to Hindi
+        translated_text = self.translator.translate(text)
+        print(f"Page {page_num + 1}: Translated to Hindi ({len(translated_text)} chars)")
+        return text, translated_text
+    
+    def _synthesize(self, page_num, text, translated_text):
+        """Generate a page's audio and record the finished page"""
+        audio_path = self.tts.generate_audio(translated_text, page_num)
+        print(f"Page {page_num + 1}: Audio generated at {audio_path}")
+        
+        result = {
+            'page_num': page_num,
+            'original_text': text,
+            'translated_text': translated_text,
+            'audio_path': audio_path,
+            'audio_duration': self.tts.get_audio_duration(translated_text),
+            'status': 'completed'
+        }
+        
+        # Cache the result
+        with self.processing_lock:
+            self.processed_pages[page_num] = result
+        
+        return result
+    
+    def _error_result(self, page_num, e):
+        error_msg = f"Error processing page {page_num}: {str(e)}"
+        print(error_msg)
+        return {
+            'page_num': page_num,
+            'status': 'error',
+            'error': error_msg
+        }
     
     def process_page(self, page_num):
         """
         Process a single page: extract → translate → generate audio
         
+        Runs all steps in the calling thread (used for on-demand pages).
+        
         Args:
             page_num: Page number to process
             
@@ -51,60 +363,197 @@ class ProcessingPipeline:
             dict with page data and audio path
         """
         try:
-            print(f"Processing page {page_num + 1}/{self.total_pages}")
-            
-            # Extract text
-            text = self.parser.extract_page(page_num)
-            
-            # Handle empty pages gracefully
-            if not text or not text.strip():
-                print(f"Page {page_num + 1}: Empty page detected, using placeholder")
-                text = "Empty page"
-                translated_text = "खाली पृष्ठ"  # "Empty page" in Hindi
-            else:
-                print(f"Page {page_num + 1}: Extracted {len(text)} characters")
-                # Translate to Hindi
-                translated_text = self.translator.translate(text)
-                print(f"Page {page_num + 1}: Translated to Hindi ({len(translated_text)} chars)")
-            
-            # Generate audio
-            audio_path = self.tts.generate_audio(translated_text, page_num)
-            print(f"Page {page_num + 1}: Audio generated at {audio_path}")
-            
-            result = {
-                'page_num': page_num,
-                'original_text': text,
-                'translated_text': translated_text,
-                'audio_path': audio_path,
-                'status': 'completed'
-            }
-            
-            # Cache the result
-            with self.processing_lock:
-                self.processed_pages[page_num] = result
-            
-            return result
+            text = self._extract(page_num)
+            text, translated_text = self._translate(page_num, text)
+            return self._synthesize(page_num, text, translated_text)
+        except Exception as e:
+            return self._error_result(page_num, e)
+    
+    def _claim_page(self, page_num):
+        """
+        Claim a page for the calling thread
+        
+        Returns:
+            (future, should_run). should_run is False when the page is done or
+            another thread is already running it; then wait on the future.
+        """
+        with self.processing_lock:
+            state = self.page_states.get(page_num)
+            if state in (PAGE_RUNNING, PAGE_DONE):
+                return self.page_futures[page_num], False
+            if state != PAGE_QUEUED:
+                self.page_futures[page_num] = Future()
+            # A queued page is taken over so the caller does not wait behind the queue
+            self.page_states[page_num] = PAGE_RUNNING
+            self.page_started[page_num] = time.monotonic()
+            return self.page_futures[page_num], True
+    
+    def _run_page(self, page_num, future):
+        """Process a claimed page and resolve its future"""
+        self._claim_shared(page_num)
+        try:
+            with self._page_work([page_num], on_demand=current_work().on_demand):
+                result = self.process_page(page_num)
+        except BaseException as e:
+            result = self._error_result(page_num, e)
+        return self._complete_page(page_num, result)
+    
+    def _complete_page(self, page_num, result):
+        """Record a page's final state and wake everyone waiting on it"""
+        with self.processing_lock:
+            self.page_states[page_num] = PAGE_DONE if result['status'] == 'completed' else PAGE_FAILED
+            future = self.page_futures[page_num]
+            started = self.page_started.pop(page_num, None)
+            self.page_priorities.pop(page_num, None)
+            self.stage_work.pop(page_num, None)
+            self.expedited.discard(page_num)
+        if result['status'] == 'completed' and started is not None:
+            self._record_timing(time.monotonic() - started, result.get('audio_duration'))
+        if not future.done():
+            future.set_result(result)
+        self._record_page(page_num, result)
+        self._finish_shared(page_num, result)
+        return result
+    
+    def _record_timing(self, page_seconds, audio_seconds):
+        """Fold one page's processing time and audio length into the averages and adapt prefetch depth"""
+        def ewma(average, value):
+            return value if average is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * average
+        
+        with self.processing_lock:
+            self.avg_page_seconds = ewma(self.avg_page_seconds, page_seconds)
+            if audio_seconds:
+                self.avg_audio_seconds = ewma(self.avg_audio_seconds, audio_seconds)
+            if not self.adaptive_prefetch or not self.avg_audio_seconds:
+                return
             
+            # A page started now is needed after `depth` pages of playback, so depth
+            # must cover its processing time with some margin
+            depth = math.ceil(PREFETCH_MARGIN * self.avg_page_seconds / self.avg_audio_seconds)
+            depth = max(MIN_PREFETCH, min(MAX_PREFETCH, self.prefetch_cap, depth))
+            if depth != self.prefetch_count:
+                print(f"Prefetch depth {self.prefetch_count} -> {depth} "
+                      f"(page {self.avg_page_seconds:.1f}s, audio {self.avg_audio_seconds:.1f}s)")
+                self.prefetch_count = depth
+                self.stages['extract'].max_queued = depth * 2
+                self.stages['translate'].max_queued = depth
+                self.stages['tts'].max_queued = depth
+    
+    def _queue_pages(self, page_nums, limit=None):
+        """
+        Mark pages as queued for background processing
+        
+        Args:
+            page_nums: Pages to queue, in order
+            limit: Maximum number of pages to newly queue
+        
+        Returns:
+            The pages that were newly queued (not already queued, running or done)
+        """
+        queued = []
+        with self.processing_lock:
+            for page_num in page_nums:
+                if limit is not None and len(queued) >= limit:
+                    break
+                if self.page_states.get(page_num) in (None, PAGE_FAILED):
+                    self.page_states[page_num] = PAGE_QUEUED
+                    self.page_futures[page_num] = Future()
+                    queued.append(page_num)
+        return queued
+    
+    def _extract_stage(self, page_num):
+        """Stage 1: start a queued page (unless a caller took it over) and extract its text"""
+        # Pages queued before the page count was known may lie past the end of the book
+        try:
+            exists = self.parser.page_exists(page_num)
+        except Exception:
+            exists = True  # Extraction reports the error on the page
+        if not exists:
+            self._drop_queued(page_num)
+            return
+        
+        # Finished in an earlier run: nothing to process
+        if self._restore_page(page_num):
+            return
+        
+        with self.processing_lock:
+            if self.page_states.get(page_num) != PAGE_QUEUED:
+                return
+            self.page_states[page_num] = PAGE_RUNNING
+            self.page_started[page_num] = time.monotonic()
+        self._claim_shared(page_num)
+        try:
+            self.stage_work[page_num] = {'text': self._extract(page_num)}
         except Exception as e:
-            error_msg = f"Error processing page {page_num}: {str(e)}"
-            print(error_msg)
-            return {
-                'page_num': page_num,
-                'status': 'error',
-                'error': error_msg
-            }
+            self._complete_page(page_num, self._error_result(page_num, e))
+            return
+        self._advance(page_num, 'translate')
+    
+    def _translate_stage(self, page_num):
+        """Stage 2: translate an extracted page"""
+        work = self.stage_work.get(page_num)
+        if work is None:
+            return
+        try:
+            work['text'], work['translated_text'] = self._translate(page_num, work['text'])
+        except Exception as e:
+            self._complete_page(page_num, self._error_result(page_num, e))
+            return
+        self._advance(page_num, 'tts')
+    
+    def _tts_stage(self, page_num):
+        """Stage 3: generate audio for a translated page"""
+        work = self.stage_work.get(page_num)
+        if work is None:
+            return
+        try:
+            result = self._synthesize(page_num, work['text'], work['translated_text'])
+        except Exception as e:
+            result = self._error_result(page_num, e)
+        self._complete_page(page_num, result)
+    
+    def _advance(self, page_num, stage):
+        """Hand a page to the next stage, waiting while that stage's queue is full"""
+        with self.processing_lock:
+            priority = self.page_priorities.get(page_num, 0)
+        if not self.stages[stage].submit(page_num, priority, block=True):
+            self._drop_staged(page_num)
+    
+    def _drop_staged(self, page_num):
+        """Fail a page dropped between stages (only happens on shutdown)"""
+        self._complete_page(page_num, self._error_result(page_num, 'processing cancelled'))
+    
+    def _expedite(self, page_num, on_demand=True):
+        """
+        Move a page someone is waiting for to the front of whichever stage holds it
+        
+        If a listener is waiting (on_demand), the page's remaining API calls
+        also switch from prefetch to on-demand, so they no longer queue behind
+        other books' prefetch for API quota.
+        """
+        with self.processing_lock:
+            self.page_priorities[page_num] = 0
+            if on_demand and self.page_states.get(page_num) in (PAGE_QUEUED, PAGE_RUNNING):
+                self.expedited.add(page_num)
+                for work in self.page_work.get(page_num, []):
+                    work.on_demand = True
+        for stage in self.stages.values():
+            stage.reprioritize(page_num, 0)
     
     def get_page(self, page_num):
         """
         Get processed page data, process if not ready
         
+        Joins the page's in-flight run if one exists, so a page is never
+        processed twice at the same time.
+        
         Args:
             page_num: Page number to retrieve
             
         Returns:
             Processed page data
         """
-        if page_num >= self.total_pages:
+        if not self.parser.page_exists(page_num):
             raise ValueError(f"Page {page_num} out of range (total: {self.total_pages})")
         
         # Check if already processed
@@ -112,35 +561,107 @@ class ProcessingPipeline:
             if page_num in self.processed_pages:
                 return self.processed_pages[page_num]
         
-        # Process the page
-        return self.process_page(page_num)
+        restored = self._restore_page(page_num)
+        if restored:
+            return restored
+        
+        # On-demand unless the caller says otherwise (e.g. the render job)
+        with work_context(self.tenant, weight=self.weight):
+            on_demand = current_work().on_demand
+            future, should_run = self._claim_page(page_num)
+            if should_run:
+                return self._run_page(page_num, future)
+        if not future.done():
+            self._expedite(page_num, on_demand)
+        return future.result()
+    
+    def _drop_queued(self, page_num):
+        """Forget a queued page that the scheduler cancelled or dropped"""
+        with self.processing_lock:
+            if self.page_states.get(page_num) == PAGE_QUEUED:
+                del self.page_states[page_num]
+                del self.page_futures[page_num]
+                self.page_priorities.pop(page_num, None)
+                self.expedited.discard(page_num)
     
     def prefetch_pages(self, start_page):
         """
         Prefetch upcoming pages in background
         
+        Pages in the window are scheduled by distance from start_page (nearest
+        first); queued pages outside the window are cancelled.
+        
         Args:
             start_page: Starting page for prefetch
         """
-        def prefetch_worker():
-            # Increase delay on Render
-            delay = 4 if os.environ.get('RENDER') else 1.5
-            
-            for i in range(start_page, min(start_page + self.prefetch_count, self.total_pages)):
-                with self.processing_lock:
-                    if i in self.processed_pages:
-                        continue
-                
+        end_page = start_page + self.prefetch_count
+        total_pages = self.total_pages
+        if total_pages is not None:
+            end_page = min(end_page, total_pages)
+        self.stages['extract'].cancel_where(lambda page: page < start_page or page >= end_page)
+        
+        window = range(start_page, end_page)
+        with self.processing_lock:
+            room = max(0, self.prefetch_cap - len(self.page_priorities))
+        new_pages = self._queue_pages(window, limit=room)
+        with self.processing_lock:
+            active = [page for page in window if self.page_states.get(page) in (PAGE_QUEUED, PAGE_RUNNING)]
+            for page in active:
+                self.page_priorities[page] = page - start_page
+        for page in active:
+            if self.page_states.get(page) == PAGE_QUEUED:
+                self.stages['extract'].submit(page, page - start_page)
+            else:
+                for stage in self.stages.values():
+                    stage.reprioritize(page, page - start_page)
+        
+        if new_pages:
+            def translate_ahead():
+                # Page workers join these translations (single-flight) or hit the cache
                 try:
-                    self.process_page(i)
-                    # Add delay between prefetch requests to avoid rate limiting
-                    if i < min(start_page + self.prefetch_count, self.total_pages) - 1:
-                        time.sleep(delay)  # Longer delay on Render
+                    self.translate_pages(new_pages)
                 except Exception as e:
-                    print(f"Prefetch error for page {i}: {e}")
+                    print(f"Prefetch batch translation error: {e}")
+            
+            self.executor.submit(translate_ahead)
+    
+    def translate_pages(self, page_nums):
+        """
+        Translate several pages' text in packed requests, ahead of processing them
+        
+        Runs as prefetch work; a listener waiting for one of the pages promotes
+        the whole batch. Pages already finished are skipped.
         
-        # Run prefetch in background
-        self.executor.submit(prefetch_worker)
+        Args:
+            page_nums: Pages to translate
+        """
+        with self._page_work(page_nums, on_demand=False):
+            pages = [i for i in page_nums if self.parser.page_exists(i) and not self.is_page_recorded(i)]
+            texts = [self.parser.extract_page(i) for i in pages]
+            self.translator.translate_batch([text for text in texts if text and text.strip()])
+    
+    def start_speculative(self, first_page=0, count=2):
+        """
+        Start processing the first pages in the background as soon as a book is loaded
+        
+        The client's request for first_page then joins this work (or finds it
+        done) instead of starting it a round trip later.
+        
+        Args:
+            first_page: Page the client will open first
+            count: Number of pages to start
+        """
+        end_page = first_page + count
+        if self.total_pages is not None:
+            end_page = min(end_page, self.total_pages)
+        pages = self._queue_pages(range(first_page, end_page))
+        with self.processing_lock:
+            for page in pages:
+                self.page_priorities[page] = page - first_page
+        for page in pages:
+            self.stages['extract'].submit(page, page - first_page)
+        if pages:
+            print(f"Speculatively processing pages {[page + 1 for page in pages]}")
     
     def get_page_with_prefetch(self, page_num):
         """
@@ -152,30 +673,109 @@ class ProcessingPipeline:
         Returns:
             Processed page data
         """
+        self.current_page = page_num
+        
+        # Drop queued work the reader has moved away from before doing this page
+        self.stages['extract'].cancel_where(lambda page: not page_num <= page <= page_num + self.prefetch_count)
+        
         # Get current page
         page_data = self.get_page(page_num)
         
-        # Trigger prefetch for next pages
-        if page_num + 1 < self.total_pages:
+        # Trigger prefetch for next pages (pages past the end are dropped while the count is unknown)
+        total_pages = self.total_pages
+        if total_pages is None or page_num + 1 < total_pages:
             self.prefetch_pages(page_num + 1)
         
         return page_data
     
+    def get_chapters(self):
+        """Get chapter to page mapping (EPUB only, empty for other formats; partial while indexing)"""
+        return self.parser.get_chapters(wait=False)
+    
+    def memory_usage(self):
+        """Estimated bytes held by this book: processed page text plus cached audio"""
+        with self.processing_lock:
+            text_chars = sum(len(result.get('original_text', '')) + len(result.get('translated_text', ''))
+                             for result in self.processed_pages.values())
+        # Hindi text is mostly 3-byte characters in UTF-8; count every character as 3 bytes
+        return text_chars * 3 + self.tts.memory_usage()
+    
+    def release_page(self, page_num):
+        """
+        Drop a finished page's text and audio from memory (both stay on disk)
+        
+        Only pages recorded in the manifest are released, and never pages the
+        reader is about to play (just behind the current page up to the end of
+        the prefetch window). A released page is restored from the manifest
+        and caches when it is requested again.
+        
+        Returns:
+            True if the page was released
+        """
+        current_page = self.current_page
+        if current_page - 1 <= page_num <= current_page + self.prefetch_count:
+            return False
+        if not self.is_page_recorded(page_num):
+            return False
+        with self.processing_lock:
+            if self.page_states.get(page_num) != PAGE_DONE:
+                return False
+            result = self.processed_pages.pop(page_num, None)
+            del self.page_states[page_num]
+            self.page_futures.pop(page_num, None)
+        if result:
+            self.tts.release_audio(result['translated_text'])
+        return True
+    
     def get_status(self):
         """Get processing status"""
         with self.processing_lock:
             processed_count = len(self.processed_pages)
+            state_counts = {state: 0 for state in PAGE_STATES}
+            for state in self.page_states.values():
+                state_counts[state] += 1
         
-        return {
-            'total_pages': self.total_pages,
+        index_status = self.parser.index_status()
+        status = {
+            'total_pages': index_status['pages_indexed'] if index_status['complete'] else None,
+            'pages_indexed': index_status['pages_indexed'],
+            'indexing': self.indexing,
+            'pages_ready': len(self.manifest.pages()) if self.manifest else processed_count,
             'processed_pages': processed_count,
+            'page_states': state_counts,
+            'queued_pages': self.stages['extract'].queued(),
+            'prefetch_depth': self.prefetch_count,
+            'prefetch_outstanding': len(self.page_priorities),
+            'prefetch_cap': self.prefetch_cap,
+            'avg_page_seconds': round(self.avg_page_seconds, 2) if self.avg_page_seconds else None,
+            'avg_audio_seconds': round(self.avg_audio_seconds, 2) if self.avg_audio_seconds else None,
+            'stage_queues': {name: len(stage) for name, stage in self.stages.items()},
             'current_page': self.current_page
         }
+        if self.coordinator is not None:
+            # Pages running or finished in any worker process
+            try:
+                status['shared_pages'] = self.coordinator.page_counts(self.parser.book_hash())
+            except Exception as e:
+                print(f"Error reading shared page states: {e}")
+        return status
     
     def cleanup(self):
         """Cleanup resources"""
+        for stage in self.stages.values():
+            stage.shutdown()
         self.executor.shutdown(wait=False)
         self.tts.cleanup()
+        self.translator.close()
+        if self.manifest:
+            self.manifest.close()
+        if self.coordinator is not None:
+            # Pages this process was running are free for other workers at once
+            try:
+                self.coordinator.release_book(self.parser.book_hash())
+            except Exception as e:
+                print(f"Error releasing page claims: {e}")
+        self.parser.close()
 
 
 def create_pipeline(book_path, cache_dir='cache'):
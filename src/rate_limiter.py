@@ -0,0 +1,105 @@
+"""
+Rate Limiter Module
+Process-wide token buckets shared by every outbound API call
+"""
+import os
+import threading
+import time
+
+from fair_share import FairQueue
+
+
+# name -> (requests/second locally, requests/second on Render, burst size)
+# TTS is charged per gTTS request: one per ~100-character chunk, about 15 for a page
+DEFAULT_LIMITS = {
+    'translate': (5.0, 1.0, 5),
+    'tts': (5.0, 2.0, 5),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Callers reserve tokens up front and sleep off any deficit, so the
+    long-run rate never exceeds `rate`. With fair=True, callers take turns
+    through a FairQueue: pages a listener is waiting on go first, and
+    prefetch work is shared round-robin between books (see fair_share).
+    Otherwise waiters are served in arrival order.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum tokens that can accumulate (burst size)
+        fair: Order waiters by fair share instead of arrival
+    """
+
+    def __init__(self, rate, capacity=1, fair=False):
+        self.rate = float(rate)
+        self.capacity = max(1, capacity)
+        self.fair = fair
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue = FairQueue()
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, blocking until the bucket can cover them
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.fair:
+            return self._reserve(tokens)
+        # One caller at a time sleeps off its deficit, so whoever the queue picks
+        # next is not stuck behind reservations made earlier by prefetch work
+        started = time.monotonic()
+        with self._queue.turn():
+            self._reserve(tokens)
+        return time.monotonic() - started
+
+    def _reserve(self, tokens):
+        """Take tokens and sleep off any deficit; returns seconds slept"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """
+    Get the process-wide limiter for an API
+
+    Rates come from DEFAULT_LIMITS and can be overridden with
+    <NAME>_RATE_LIMIT (requests/second) and <NAME>_BURST environment variables.
+    Waiters are ordered by fair share unless FAIR_SHARE=0.
+    """
+    with _registry_lock:
+        if name not in _limiters:
+            rate, burst = configured_limit(name)
+            fair = os.environ.get('FAIR_SHARE', '1') != '0'
+            _limiters[name] = TokenBucket(rate, burst, fair=fair)
+        return _limiters[name]
+
+
+def configured_limit(name):
+    """
+    Get the configured (rate, burst) for an API
+
+    Returns:
+        (requests/second, burst size) after environment overrides
+    """
+    local_rate, render_rate, burst = DEFAULT_LIMITS.get(name, (1.0, 1.0, 1))
+    rate = float(os.environ.get(f'{name.upper()}_RATE_LIMIT',
+                                render_rate if os.environ.get('RENDER') else local_rate))
+    burst = int(os.environ.get(f'{name.upper()}_BURST', burst))
+    return rate, burst
@@ -0,0 +1,302 @@
+"""
+Pipeline Registry Module
+Keeps several books' pipelines open at once, keyed by book, with LRU/idle/memory eviction
+"""
+import os
+import threading
+import time
+
+from pipeline import ProcessingPipeline
+from render_job import RENDER_RUNNING, RenderJob
+
+
+class BookEntry:
+    """An open book: its pipeline, render job and when it was last used"""
+
+    def __init__(self, key, pipeline, render, generation=0):
+        self.key = key
+        self.filename = os.path.basename(key)
+        self.pipeline = pipeline
+        self.render = render
+        self.generation = generation  # Book file version it was opened at (see Coordinator)
+        self.last_used = time.monotonic()
+
+    def memory_usage(self):
+        return self.pipeline.memory_usage()
+
+    def is_rendering(self):
+        return self.render.state == RENDER_RUNNING
+
+    def close(self):
+        """Stop the render job (its saved state is kept) and release the pipeline"""
+        self.render.stop()
+        self.pipeline.cleanup()
+
+
+class PipelineRegistry:
+    """
+    Open pipelines keyed by book path, shared by every session listening to that book
+
+    Switching back to a book that is still open keeps its processed pages,
+    queues and caches. Books are closed when:
+        - they have not been used for idle_timeout seconds,
+        - more than max_books are open (least recently used first), or
+        - the open books' estimated memory exceeds memory_budget bytes
+          (least recently used first).
+    The book being opened is never evicted, and books with a running render
+    job are only evicted to respect max_books.
+
+    A client without a session (e.g. a script that does not keep cookies)
+    gets the book a session loaded last, as with the single global book
+    before the registry.
+
+    With a coordinator, each session's book is also shared with the other
+    worker processes, so a session whose requests land on another worker
+    gets its book reopened there. Closing a book (before replacing or
+    deleting its file) bumps its generation, and every worker drops its
+    copy opened at an older generation on the next request.
+
+    Args:
+        cache_dir: Cache folder passed to every pipeline
+        max_books: Maximum number of open books
+        idle_timeout: Seconds after which an unused book is closed (None to disable)
+        memory_budget: Bytes of page text and audio the open books may hold (None to disable)
+        pipeline_factory: Callable(book_path, cache_dir) -> pipeline (defaults to ProcessingPipeline)
+        coordinator: Coordinator shared with other worker processes (optional)
+    """
+
+    def __init__(self, cache_dir='cache', max_books=4, idle_timeout=1800, memory_budget=None,
+                 pipeline_factory=None, coordinator=None):
+        self.cache_dir = cache_dir
+        self.max_books = max(1, max_books)
+        self.idle_timeout = idle_timeout
+        self.memory_budget = memory_budget
+        self.coordinator = coordinator
+        if pipeline_factory is None:
+            def pipeline_factory(book_path, cache_dir):
+                return ProcessingPipeline(book_path, cache_dir, coordinator=coordinator)
+        self.pipeline_factory = pipeline_factory
+
+        self._entries = {}  # book key -> BookEntry
+        self._sessions = {}  # session id -> book key (None once that book was closed)
+        self._latest = None  # Key of the book a session loaded last
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def book_key(book_path):
+        return os.path.abspath(book_path)
+
+    def open(self, book_path, session_id=None):
+        """
+        Get the entry for a book, opening its pipeline if needed
+
+        Args:
+            book_path: Book file
+            session_id: Session now listening to this book (optional)
+
+        Returns:
+            (entry, created)
+        """
+        key = self.book_key(book_path)
+        generation = self._generation(key)
+        closed = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation != generation:
+                print(f"Closing {entry.filename}: replaced in another worker")
+                closed.append(self._entries.pop(key))
+                entry = None
+            created = entry is None
+            if created:
+                pipeline = self.pipeline_factory(book_path, self.cache_dir)
+                render = RenderJob(pipeline)
+                entry = BookEntry(key, pipeline, render, generation)
+                self._entries[key] = entry
+            entry.last_used = time.monotonic()
+            if session_id is not None:
+                self._sessions[session_id] = key
+                self._latest = key
+            closed += self._evict(keep=key)
+
+        self._close_entries(closed)
+        if session_id is not None and self.coordinator is not None:
+            self.coordinator.set_session_book(session_id, key)
+        if created:
+            print(f"Opened {entry.filename} ({len(self)} books open)")
+            entry.render.auto_resume()
+        return entry, created
+
+    def get(self, book_path):
+        """Entry for a book if it is open and current (marks it used), else None"""
+        key = self.book_key(book_path)
+        generation = self._generation(key)
+        stale = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation != generation:
+                print(f"Closing {entry.filename}: replaced in another worker")
+                stale = self._entries.pop(key)
+                entry = None
+            if entry is not None:
+                entry.last_used = time.monotonic()
+        self._close_entries([stale] if stale else [])
+        return entry
+
+    def _generation(self, key):
+        """Current generation of a book file (always 0 without a coordinator)"""
+        if self.coordinator is None:
+            return 0
+        return self.coordinator.book_generation(key)
+
+    def for_session(self, session_id):
+        """
+        Entry of the book a session is listening to, or None
+
+        A session that loaded its book in another worker process (or whose
+        book was evicted here) gets the book reopened. A session that never
+        loaded a book gets the book loaded last by any session.
+        """
+        with self._lock:
+            known = session_id in self._sessions
+            key = self._sessions.get(session_id)
+        if key is not None:
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+        # Still mapped here means the book was replaced in another worker
+        if key is None and self.coordinator is not None:
+            key = self.coordinator.session_book(session_id)
+        mapped = known or key is not None
+        if not mapped:
+            key = self._latest_book()
+        if key is None or not os.path.exists(key):
+            return None
+        entry, _ = self.open(key, session_id if mapped else None)
+        return entry
+
+    def _latest_book(self):
+        """Key of the book a session loaded last, in any worker with a coordinator (or None)"""
+        if self.coordinator is not None:
+            return self.coordinator.latest_session_book()
+        with self._lock:
+            return self._latest
+
+    def close(self, book_path):
+        """
+        Close a book after its file was replaced or deleted
+
+        Other workers close their copy on their next request for it.
+
+        Returns:
+            True if the book was open in this process
+        """
+        with self._lock:
+            entry = self._entries.pop(self.book_key(book_path), None)
+            self._forget_sessions([entry.key] if entry else [])
+            if self._latest == self.book_key(book_path):
+                self._latest = None
+        if self.coordinator is not None:
+            self.coordinator.forget_book(self.book_key(book_path))
+            self.coordinator.bump_book_generation(self.book_key(book_path))
+        self._close_entries([entry] if entry else [])
+        return entry is not None
+
+    def sweep(self):
+        """Close idle and over-budget books; returns the number closed"""
+        with self._lock:
+            closed = self._evict()
+        self._close_entries(closed)
+        return len(closed)
+
+    def _evict(self, keep=None):
+        """Remove entries that must be closed (lock held); the caller closes them outside the lock"""
+        now = time.monotonic()
+        candidates = sorted(
+            (entry for entry in self._entries.values() if entry.key != keep),
+            key=lambda entry: entry.last_used
+        )
+        evicted = []
+
+        def remove(entry, reason):
+            del self._entries[entry.key]
+            candidates.remove(entry)
+            evicted.append(entry)
+            print(f"Closing {entry.filename}: {reason}")
+
+        if self.idle_timeout is not None:
+            for entry in list(candidates):
+                if now - entry.last_used > self.idle_timeout and not entry.is_rendering():
+                    remove(entry, 'idle')
+
+        if self.memory_budget is not None:
+            usage = {entry.key: entry.memory_usage() for entry in self._entries.values()}
+            for entry in list(candidates):
+                if sum(usage.values()) <= self.memory_budget:
+                    break
+                if not entry.is_rendering():
+                    usage.pop(entry.key)
+                    remove(entry, 'memory budget')
+
+        # Least recently used first; rendering books only when nothing else is left
+        for entry in sorted(candidates, key=lambda entry: (entry.is_rendering(), entry.last_used)):
+            if len(self._entries) <= self.max_books:
+                break
+            remove(entry, 'too many open books')
+
+        self._forget_sessions([entry.key for entry in evicted])
+        return evicted
+
+    def _update_weights(self):
+        """Weight each book's prefetch share by its number of listening sessions (lock held)"""
+        listeners = {}
+        for key in self._sessions.values():
+            if key is not None:
+                listeners[key] = listeners.get(key, 0) + 1
+        for key, entry in self._entries.items():
+            entry.pipeline.weight = max(1, listeners.get(key, 0))
+
+    def _forget_sessions(self, keys):
+        """Unmap sessions from closed books and reweigh the rest (lock held)"""
+        for session_id, key in self._sessions.items():
+            if key in keys:
+                self._sessions[session_id] = None
+        self._update_weights()
+
+    def _close_entries(self, entries):
+        for entry in entries:
+            try:
+                entry.close()
+            except Exception as e:
+                print(f"Error closing {entry.filename}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_status(self):
+        """Open books, their sessions and estimated memory"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'open_books': [
+                    {
+                        'filename': entry.filename,
+                        'sessions': sum(1 for key in self._sessions.values() if key == entry.key),
+                        'idle_seconds': round(now - entry.last_used, 1),
+                        'memory_bytes': entry.memory_usage(),
+                        'rendering': entry.is_rendering()
+                    }
+                    for entry in sorted(self._entries.values(), key=lambda entry: -entry.last_used)
+                ],
+                'max_books': self.max_books,
+                'memory_budget': self.memory_budget
+            }
+
+    def close_all(self):
+        """Close every open book"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._sessions.clear()
+            self._latest = None
+        self._close_entries(entries)
@@ -0,0 +1,276 @@
+"""
+Render Job Module
+Resumable whole-book pre-rendering on top of the processing pipeline
+"""
+import json
+import os
+import threading
+import time
+
+
+# Render job states
+RENDER_IDLE = 'idle'
+RENDER_RUNNING = 'running'
+RENDER_PAUSED = 'paused'
+RENDER_DONE = 'done'
+RENDER_FAILED = 'failed'
+
+
+class RenderJob:
+    """
+    Renders every page of a book in the background
+
+    Each worker takes batch_pages pages at a time and translates them with
+    pipeline.translate_pages, packing several pages into each translation
+    request. The pages then go through pipeline.get_page one by one, so they
+    share the process-wide rate limits, join pages the reader is already
+    waiting for, and land in the book's page manifest. The manifest is the record of which pages are
+    done; a small checkpoint file in <cache_dir>/render/<book hash>.json
+    keeps the job state and failures, so a job that was running when the
+    process died is picked up again by auto_resume() and skips finished pages.
+    Rendered pages are released from memory once recorded (except the few
+    near the reader), so rendering a whole book does not hold it in RAM.
+
+    Args:
+        pipeline: ProcessingPipeline of the book to render
+        workers: Pages rendered at the same time
+        batch_pages: Pages each worker translates together
+    """
+
+    def __init__(self, pipeline, workers=2, batch_pages=8):
+        self.pipeline = pipeline
+        self.workers = workers
+        self.batch_pages = max(1, batch_pages)
+
+        self.state = RENDER_IDLE
+        self.total_pages = None
+        self.completed = 0
+        self.failed = {}  # page_num -> error message
+        self.error = None
+        self.current_pages = set()
+
+        self._lock = threading.Lock()
+        self._running = threading.Event()  # Cleared while paused
+        self._stopped = False
+        self._threads = []
+        self._checkpoint_path = None
+        self._run_started = None
+        self._run_completed = 0
+
+    @property
+    def checkpoint_path(self):
+        """Checkpoint file for this book (hashes the book on first use)"""
+        if self._checkpoint_path is None:
+            book_hash = self.pipeline.parser.book_hash()
+            self._checkpoint_path = os.path.join(self.pipeline.cache_dir, 'render', f"{book_hash}.json")
+        return self._checkpoint_path
+
+    def _load_checkpoint(self):
+        """Read the saved job state, or None if there is none"""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading render checkpoint: {e}")
+            return None
+
+    def _save_checkpoint(self):
+        """Write the job state atomically (lock held)"""
+        checkpoint = {
+            'book': os.path.basename(self.pipeline.book_path),
+            'state': self.state,
+            'total_pages': self.total_pages,
+            'completed': self.completed,
+            'failed': {str(page): error for page, error in self.failed.items()},
+            'error': self.error,
+            'updated_at': time.time()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+            tmp_path = self.checkpoint_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except Exception as e:
+            print(f"Error writing render checkpoint: {e}")
+
+    def start(self):
+        """
+        Start (or restart) rendering the book; pages finished earlier are skipped
+
+        Returns:
+            False if the job is already running
+        """
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                if self.state == RENDER_PAUSED:
+                    self._set_state(RENDER_RUNNING)
+                    self._running.set()
+                    return True
+                return False
+            self._stopped = False
+            self.failed = {}
+            self.error = None
+            self._set_state(RENDER_RUNNING)
+            self._running.set()
+            self._threads = [threading.Thread(target=self._run, name='render-job', daemon=True)]
+            self._threads[0].start()
+        print(f"Render job started: {os.path.basename(self.pipeline.book_path)}")
+        return True
+
+    def pause(self):
+        """Pause after the pages being rendered now; returns False if not running"""
+        with self._lock:
+            if self.state != RENDER_RUNNING:
+                return False
+            self._running.clear()
+            self._set_state(RENDER_PAUSED)
+        print("Render job paused")
+        return True
+
+    def resume(self):
+        """Resume a paused job, or restart one that was interrupted"""
+        with self._lock:
+            if self.state == RENDER_PAUSED and any(thread.is_alive() for thread in self._threads):
+                self._set_state(RENDER_RUNNING)
+                self._running.set()
+                print("Render job resumed")
+                return True
+        return self.start()
+
+    def auto_resume(self):
+        """Restart the job in the background if its checkpoint says it was running"""
+        def check():
+            checkpoint = self._load_checkpoint()
+            if not checkpoint:
+                return
+            with self._lock:
+                self.total_pages = checkpoint.get('total_pages')
+                self.completed = checkpoint.get('completed', 0)
+                self.failed = {int(page): error for page, error in checkpoint.get('failed', {}).items()}
+                if checkpoint.get('state') != RENDER_RUNNING:
+                    self.state = checkpoint.get('state', RENDER_IDLE)
+                    return
+            print(f"Resuming interrupted render job ({self.completed}/{self.total_pages} pages done)")
+            self.start()
+
+        threading.Thread(target=check, name='render-resume', daemon=True).start()
+
+    def stop(self):
+        """Stop the workers without changing the saved state (e.g. when the book is unloaded)"""
+        with self._lock:
+            self._stopped = True
+            self._running.set()  # Wake paused workers so they exit
+            threads = list(self._threads)
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1)
+
+    def _set_state(self, state):
+        """Change state and checkpoint it (lock held)"""
+        self.state = state
+        self._save_checkpoint()
+
+    def _run(self):
+        """Render every page not yet recorded as finished"""
+        try:
+            total_pages = self.pipeline.parser.get_total_pages()
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+                self._set_state(RENDER_FAILED)
+            print(f"Render job failed: {e}")
+            return
+
+        pending = [page for page in range(total_pages) if not self.pipeline.is_page_recorded(page)]
+        with self._lock:
+            self.total_pages = total_pages
+            self.completed = total_pages - len(pending)
+            self._run_started = time.monotonic()
+            self._run_completed = 0
+            self._save_checkpoint()
+
+        pending.reverse()  # Pop from the end, so pages render in book order
+        workers = [
+            threading.Thread(target=self._work, args=(pending,), name=f'render-worker-{i}', daemon=True)
+            for i in range(max(1, self.workers))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with self._lock:
+            if not self._stopped:
+                self._set_state(RENDER_DONE)
+                print(f"Render job done: {self.completed}/{self.total_pages} pages, {len(self.failed)} failed")
+
+    def _work(self, pending):
+        """Worker loop: take the next batch of pages, translate it, then render its pages, waiting while paused"""
+        while True:
+            self._running.wait()
+            with self._lock:
+                if self._stopped or not pending:
+                    return
+                batch = [pending.pop() for _ in range(min(self.batch_pages, len(pending)))]
+
+            try:
+                self.pipeline.translate_pages(batch)
+            except Exception as e:
+                print(f"Render batch translation error: {e}")  # Each page retries on its own
+
+            for page_num in batch:
+                self._running.wait()
+                with self._lock:
+                    if self._stopped:
+                        return
+                    self.current_pages.add(page_num)
+                self._render_page(page_num)
+
+    def _render_page(self, page_num):
+        """Render one page and record the outcome"""
+        try:
+            # Rendering ahead is prefetch work: it yields API quota to listeners
+            with self.pipeline.prefetch_work():
+                result = self.pipeline.get_page(page_num)
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+
+        if result['status'] == 'completed':
+            # Rendered pages live on disk; keep only the ones near the reader in memory
+            self.pipeline.release_page(page_num)
+
+        with self._lock:
+            self.current_pages.discard(page_num)
+            if result['status'] == 'completed':
+                self.completed += 1
+                self._run_completed += 1
+                self.failed.pop(page_num, None)
+            elif not self._stopped:
+                self.failed[page_num] = result.get('error', 'Processing failed')
+            self._save_checkpoint()
+
+    def get_status(self):
+        """Get job progress, throughput and estimated time left"""
+        with self._lock:
+            pages_per_minute = None
+            eta_seconds = None
+            if self._run_started is not None and self._run_completed:
+                elapsed = time.monotonic() - self._run_started
+                pages_per_minute = round(self._run_completed / elapsed * 60, 1)
+                if self.total_pages is not None and self.state == RENDER_RUNNING:
+                    remaining = self.total_pages - self.completed - len(self.failed)
+                    eta_seconds = round(max(remaining, 0) * elapsed / self._run_completed)
+            return {
+                'state': self.state,
+                'total_pages': self.total_pages,
+                'completed': self.completed,
+                'failed': len(self.failed),
+                'failed_pages': sorted(self.failed),
+                'current_pages': sorted(self.current_pages),
+                'pages_per_minute': pages_per_minute,
+                'eta_seconds': eta_seconds,
+                'error': self.error
+            }
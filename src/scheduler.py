@@ -0,0 +1,167 @@
+"""
+Page Scheduler Module
+Priority queue of page work with reprioritization, cancellation and a size bound
+"""
+import heapq
+import itertools
+import threading
+
+
+class PageScheduler:
+    """
+    Runs queued pages on worker threads, lowest priority number first
+
+    A page is queued at most once; submitting it again only changes its
+    priority. Queued pages can be cancelled (e.g. when the reader seeks
+    elsewhere), and when more than max_queued pages are waiting the
+    lowest-priority ones are dropped. Pages already handed to a worker are
+    not interrupted.
+
+    Args:
+        handler: Called with page_num on a worker thread
+        workers: Number of worker threads
+        max_queued: Maximum number of pages waiting in the queue
+        on_drop: Optional callback(page_num) for pages cancelled or dropped
+        name: Prefix for worker thread names
+    """
+
+    def __init__(self, handler, workers=2, max_queued=16, on_drop=None, name='page'):
+        self.handler = handler
+        self.max_queued = max_queued
+        self.on_drop = on_drop
+
+        self._heap = []  # [priority, seq, page_num, valid]
+        self._entries = {}  # page_num -> live heap entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'{name}-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, page_num, priority, block=False):
+        """
+        Queue a page, or change the priority of an already queued page
+
+        Args:
+            page_num: Page to queue
+            priority: Lower runs first
+            block: Wait for room instead of dropping when the queue is full
+                (backpressure between pipeline stages)
+
+        Returns:
+            True if the page is queued, False if it was dropped to respect max_queued
+        """
+        dropped = []
+        with self._cond:
+            if block:
+                while (len(self._entries) >= self.max_queued and page_num not in self._entries
+                       and not self._shutdown):
+                    self._cond.wait()
+            if self._shutdown:
+                return False
+            entry = self._entries.get(page_num)
+            if entry is not None:
+                if entry[0] == priority:
+                    return True
+                entry[3] = False
+            entry = [priority, next(self._seq), page_num, True]
+            self._entries[page_num] = entry
+            heapq.heappush(self._heap, entry)
+
+            while len(self._entries) > self.max_queued:
+                worst = max(self._entries.values())
+                worst[3] = False
+                del self._entries[worst[2]]
+                dropped.append(worst[2])
+            self._cond.notify_all()
+
+        self._notify_dropped(dropped)
+        return page_num not in dropped
+
+    def reprioritize(self, page_num, priority):
+        """Change the priority of a page if it is queued; returns True if it was"""
+        with self._cond:
+            entry = self._entries.get(page_num)
+            if entry is None:
+                return False
+            entry[3] = False
+            entry = [priority, next(self._seq), page_num, True]
+            self._entries[page_num] = entry
+            heapq.heappush(self._heap, entry)
+            return True
+
+    def cancel_where(self, predicate):
+        """
+        Cancel every queued page for which predicate(page_num) is true
+
+        Returns:
+            List of cancelled pages
+        """
+        with self._cond:
+            cancelled = [page_num for page_num in self._entries if predicate(page_num)]
+            for page_num in cancelled:
+                self._entries.pop(page_num)[3] = False
+            self._cond.notify_all()
+        self._notify_dropped(cancelled)
+        return cancelled
+
+    def cancel(self, page_num):
+        """Cancel one queued page; returns True if it was queued"""
+        return bool(self.cancel_where(lambda queued: queued == page_num))
+
+    def queued(self):
+        """Queued pages in the order they will run"""
+        with self._cond:
+            return [entry[2] for entry in sorted(self._entries.values())]
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def _notify_dropped(self, pages):
+        if self.on_drop:
+            for page_num in pages:
+                self.on_drop(page_num)
+
+    def _next(self):
+        """Block until a page is available; None once shut down"""
+        with self._cond:
+            while True:
+                if self._shutdown:
+                    return None
+                while self._heap and not self._heap[0][3]:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    entry = heapq.heappop(self._heap)
+                    del self._entries[entry[2]]
+                    self._cond.notify_all()  # Room for blocked submitters
+                    return entry[2]
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            page_num = self._next()
+            if page_num is None:
+                return
+            try:
+                self.handler(page_num)
+            except Exception as e:
+                print(f"Scheduler error for page {page_num}: {e}")
+
+    def shutdown(self, wait=False):
+        """Stop the workers; queued pages are dropped"""
+        with self._cond:
+            self._shutdown = True
+            dropped = list(self._entries)
+            self._entries.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        self._notify_dropped(dropped)
+        if wait:
+            for thread in self._threads:
+                thread.join()
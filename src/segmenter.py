@@ -0,0 +1,138 @@
+"""
+Sentence Segmenter Module
+Single-pass, abbreviation-aware sentence spans shared by pagination,
+translation chunking and TTS segmentation
+"""
+import re
+
+
+# Terminal punctuation (incl. Devanagari danda), closing quotes/brackets, then whitespace or end
+_SENTENCE_END = re.compile(r'[.!?…।॥]+[\'"’”»)\]]*(?=\s|$)')
+
+# Clause punctuation, used to break sentences that are too long for one chunk
+_CLAUSE_END = re.compile(r'[,;:—–]+[\'"’”»)\]]*(?=\s)')
+
+_WORD = re.compile(r'\S+')
+
+# Words whose trailing period does not end a sentence (compared lowercase, period removed)
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'e.g', 'i.e',
+    'gen', 'col', 'capt', 'lt', 'sgt', 'rev', 'hon', 'fig', 'vol', 'pp', 'approx'
+})
+
+_OPENERS = '\'"(‘“['
+
+
+def _is_abbreviation(text, start, dot):
+    """Check whether the single period at `dot` follows an abbreviation or an initial"""
+    word_start = dot
+    while word_start > start and not text[word_start - 1].isspace():
+        word_start -= 1
+    word = text[word_start:dot].lstrip(_OPENERS)
+    if len(word) == 1:
+        return word.isupper()  # Initials such as "J. K. Rowling"
+    return word.lower() in ABBREVIATIONS
+
+
+def _continues_lowercase(text, pos, end):
+    """Check whether the next word starts lowercase ('"Why?" she asked', '5 p.m. today')"""
+    while pos < end and text[pos].isspace():
+        pos += 1
+    return pos < end and text[pos].islower()
+
+
+def _strip_span(text, start, end):
+    """Shrink [start, end) to exclude surrounding whitespace; None if nothing is left"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if end > start else None
+
+
+def iter_sentence_spans(text, start=0, end=None):
+    """
+    Yield (start, end) offsets of each sentence in text[start:end]
+
+    Spans exclude surrounding whitespace and keep their terminal punctuation,
+    so text[s:e] is the sentence itself. No substrings are created.
+    """
+    if end is None:
+        end = len(text)
+    pos = start
+    for match in _SENTENCE_END.finditer(text, start, end):
+        if match.end() - match.start() == 1 and text[match.start()] == '.' \
+                and _is_abbreviation(text, pos, match.start()):
+            continue
+        if _continues_lowercase(text, match.end(), end):
+            continue
+        span = _strip_span(text, pos, match.end())
+        if span:
+            yield span
+        pos = match.end()
+    span = _strip_span(text, pos, end)
+    if span:
+        yield span
+
+
+def split_sentences(text):
+    """Split text into sentence strings"""
+    return [text[s:e] for s, e in iter_sentence_spans(text)]
+
+
+def _split_long(text, start, end, max_chars):
+    """Break one over-long sentence at clause punctuation, then words, then hard cuts"""
+    pieces = []
+    pos = start
+    for match in _CLAUSE_END.finditer(text, start, end):
+        span = _strip_span(text, pos, match.end())
+        if span:
+            pieces.append(span)
+        pos = match.end()
+    span = _strip_span(text, pos, end)
+    if span:
+        pieces.append(span)
+
+    for piece_start, piece_end in pieces:
+        if piece_end - piece_start <= max_chars:
+            yield piece_start, piece_end
+            continue
+        for word in _WORD.finditer(text, piece_start, piece_end):
+            for cut in range(word.start(), word.end(), max_chars):
+                yield cut, min(cut + max_chars, word.end())
+
+
+def chunk_spans(text, max_chars):
+    """
+    Pack consecutive sentences into chunks of at most max_chars characters
+
+    Sentences longer than max_chars are split at clause punctuation, then at
+    word boundaries. Each chunk is a contiguous span of the original text.
+
+    Returns:
+        List of (start, end) offsets
+    """
+    chunks = []
+    chunk_start = chunk_end = None
+    for sentence_start, sentence_end in iter_sentence_spans(text):
+        if sentence_end - sentence_start <= max_chars:
+            pieces = ((sentence_start, sentence_end),)
+        else:
+            pieces = _split_long(text, sentence_start, sentence_end, max_chars)
+
+        for piece_start, piece_end in pieces:
+            if chunk_start is not None and piece_end - chunk_start <= max_chars:
+                chunk_end = piece_end
+                continue
+            if chunk_start is not None:
+                chunks.append((chunk_start, chunk_end))
+            chunk_start, chunk_end = piece_start, piece_end
+
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def chunk_text(text, max_chars):
+    """Split text into sentence-aligned chunks of at most max_chars characters"""
+    return [text[s:e] for s, e in chunk_spans(text, max_chars)]
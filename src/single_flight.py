@@ -0,0 +1,63 @@
+"""
+Single-Flight Module
+Coalesces concurrent work for the same cache key onto one in-flight future
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    In-flight map of cache key -> Future
+
+    The first caller for a key becomes the leader and does the work; callers
+    arriving while it runs wait on the leader's future instead of repeating
+    the API call. The key is released once the result is set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def claim(self, key):
+        """
+        Claim a key
+
+        Returns:
+            (future, is_leader). The leader must call resolve() for the key.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def resolve(self, key, result=None, error=None):
+        """Release a claimed key, waking every waiter with the result or error"""
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once per key at a time; concurrent callers share its result"""
+        future, is_leader = self.claim(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result=result)
+        return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
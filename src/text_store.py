@@ -0,0 +1,140 @@
+"""
+Page Text Store Module
+Persists extracted page text and a page offset index keyed by book content hash
+"""
+from array import array
+import hashlib
+import json
+import os
+
+
+# Bump when the on-disk layout or the pagination rules change
+STORE_VERSION = 5
+
+
+def hash_file(file_path, block_size=1024 * 1024):
+    """Generate a content hash for a book file"""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageTextStore:
+    """
+    On-disk store of extracted page text for one book
+
+    Layout in <cache_dir>/pages/:
+        <hash>.v<N>.txt  UTF-8 page texts concatenated into one blob
+        <hash>.v<N>.idx  array of page start offsets into the blob (+ end offset)
+        <hash>.v<N>.json optional metadata (e.g. the EPUB chapter to page map)
+
+    The index is written last, so its presence means the store is complete.
+    """
+
+    def __init__(self, cache_dir, book_hash):
+        self.store_dir = os.path.join(cache_dir, 'pages')
+        base = os.path.join(self.store_dir, f"{book_hash}.v{STORE_VERSION}")
+        self.index_path = base + '.idx'
+        self.blob_path = base + '.txt'
+        self.meta_path = base + '.json'
+        self.meta = {}
+        self._offsets = None
+        self._blob = None
+
+    @property
+    def is_loaded(self):
+        return self._offsets is not None
+
+    @property
+    def page_count(self):
+        return len(self._offsets) - 1
+
+    def load(self):
+        """
+        Load the page index and open the text blob
+
+        Returns:
+            True if a complete store was found on disk
+        """
+        if self.is_loaded:
+            return True
+        if not os.path.exists(self.index_path) or not os.path.exists(self.blob_path):
+            return False
+
+        try:
+            offsets = array('Q')
+            with open(self.index_path, 'rb') as f:
+                offsets.frombytes(f.read())
+
+            # Reject truncated or mismatched files instead of serving wrong text
+            if len(offsets) < 2 or offsets[-1] != os.path.getsize(self.blob_path):
+                print(f"Ignoring stale page store: {self.index_path}")
+                return False
+
+            if os.path.exists(self.meta_path):
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    self.meta = json.load(f)
+
+            self._blob = open(self.blob_path, 'rb')
+            self._offsets = offsets
+            return True
+        except Exception as e:
+            print(f"Error loading page store: {e}")
+            return False
+
+    def write(self, pages, meta=None):
+        """
+        Write page texts to disk and load the new store
+
+        Args:
+            pages: Iterable of page text strings, in page order (may be a generator)
+            meta: Optional JSON-serializable metadata saved alongside the pages
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        offsets = array('Q', [0])
+
+        blob_tmp = self.blob_path + '.tmp'
+        index_tmp = self.index_path + '.tmp'
+        try:
+            with open(blob_tmp, 'wb') as f:
+                for text in pages:
+                    data = text.encode('utf-8')
+                    f.write(data)
+                    offsets.append(offsets[-1] + len(data))
+
+            with open(index_tmp, 'wb') as f:
+                f.write(offsets.tobytes())
+
+            if meta is not None:
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, ensure_ascii=False)
+        except Exception:
+            for path in (blob_tmp, index_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+        os.replace(blob_tmp, self.blob_path)
+        os.replace(index_tmp, self.index_path)
+
+        self.close()
+        self.load()
+
+    def read_page(self, page_num):
+        """Read the text of one page (callers serialize access)"""
+        if page_num < 0 or page_num >= self.page_count:
+            raise ValueError(f"Page {page_num} out of range")
+        start = self._offsets[page_num]
+        end = self._offsets[page_num + 1]
+        self._blob.seek(start)
+        return self._blob.read(end - start).decode('utf-8')
+
+    def close(self):
+        """Close the text blob"""
+        if self._blob is not None:
+            self._blob.close()
+        self._blob = None
+        self._offsets = None
+        self.meta = {}
@@ -0,0 +1,231 @@
+"""
+Translation Cache Module
+SQLite-backed translation cache with indexed lookups and write-behind commits
+"""
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import weakref
+
+
+class _ConnectionHolder:
+    """A thread's connection; closed when the holder is freed with the thread's locals"""
+
+    __slots__ = ('conn', 'pid', 'close', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+        self.close = weakref.finalize(self, conn.close)
+
+
+class ThreadConnections:
+    """
+    One sqlite connection per thread, closed when its thread ends
+
+    Short-lived threads (e.g. one per request in the dev server) do not leak
+    connections: only live threads hold one. Connections are not reused
+    across fork; the child opens its own.
+
+    Args:
+        connect: Callable returning a new connection; it must pass
+            check_same_thread=False, since a connection may be closed from
+            another thread than the one that used it
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._local = threading.local()
+        self._open = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Get the calling thread's connection"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None and holder.pid != os.getpid():
+            # Inherited across fork: never close it here, it belongs to the parent
+            holder.close.detach()
+            holder = None
+        if holder is None:
+            holder = _ConnectionHolder(self._connect())
+            self._local.holder = holder
+            with self._lock:
+                self._open.add(holder)
+        return holder.conn
+
+    def __len__(self):
+        """Number of open connections"""
+        with self._lock:
+            return sum(1 for holder in self._open if holder.close.alive)
+
+    def close_all(self):
+        """Close every thread's connection"""
+        with self._lock:
+            holders = [holder for holder in self._open if holder.pid == os.getpid()]
+        for holder in holders:
+            try:
+                holder.close()
+            except Exception as e:
+                print(f"Error closing database connection: {e}")
+
+
+class TranslationCache:
+    """
+    Persistent key -> translated text cache
+
+    Reads are indexed point lookups on per-thread connections (WAL mode lets
+    them run alongside a writer). Writes are buffered in memory and committed
+    in batches, either when flush_size entries are pending or flush_interval
+    seconds after the first pending write.
+    """
+
+    def __init__(self, cache_dir='cache', flush_size=50, flush_interval=2.0):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'translations.db')
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._readers = ThreadConnections(self._connect_reader)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+        # Single writer connection, shared across threads under self._lock
+        self._writer = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._writer.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'key TEXT PRIMARY KEY, text TEXT NOT NULL) WITHOUT ROWID'
+        )
+        self._writer.commit()
+
+        self._import_json(os.path.join(cache_dir, 'translations.json'))
+
+    def _import_json(self, json_path):
+        """One-time import of a legacy translations.json cache"""
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            with self._lock:
+                self._writer.executemany(
+                    'INSERT OR IGNORE INTO translations (key, text) VALUES (?, ?)',
+                    entries.items()
+                )
+                self._writer.commit()
+            os.replace(json_path, json_path + '.imported')
+            print(f"Imported {len(entries)} translations from {json_path}")
+        except Exception as e:
+            print(f"Error importing translation cache: {e}")
+
+    def _connect_reader(self):
+        """Open a read connection"""
+        # Read-write but never create: a reader outliving the cache dir must not recreate it
+        uri = pathlib.Path(self.db_path).absolute().as_uri() + '?mode=rw'
+        return sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+
+    def _reader(self):
+        """Get this thread's read connection (closed when the thread ends)"""
+        return self._readers.get()
+
+    def get(self, key):
+        """Get a cached translation, or None"""
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        row = self._reader().execute(
+            'SELECT text FROM translations WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys):
+        """Look up several keys at once; returns {key: text} for the ones cached"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._pending:
+                    found[key] = self._pending[key]
+        remaining = [key for key in keys if key not in found]
+        conn = self._reader()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(remaining), 500):
+            batch = remaining[i:i + 500]
+            rows = conn.execute(
+                'SELECT key, text FROM translations WHERE key IN (%s)' % ','.join('?' * len(batch)),
+                batch
+            )
+            found.update(rows)
+        return found
+
+    def put(self, key, text):
+        """Cache a translation (committed by the next flush)"""
+        with self._lock:
+            self._pending[key] = text
+            flush_now = len(self._pending) >= self.flush_size
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Commit all pending writes in one transaction"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending = self._pending
+            try:
+                self._writer.executemany(
+                    'INSERT OR REPLACE INTO translations (key, text) VALUES (?, ?)',
+                    pending.items()
+                )
+                self._writer.commit()
+                self._pending = {}
+            except Exception as e:
+                self._writer.rollback()
+                print(f"Error saving translation cache: {e}")
+
+    def __len__(self):
+        self.flush()
+        return self._reader().execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+
+    def clear(self):
+        """Delete every cached translation"""
+        with self._lock:
+            self._pending = {}
+            self._writer.execute('DELETE FROM translations')
+            self._writer.commit()
+
+    def close(self):
+        """Flush pending writes and close all connections"""
+        self.flush()
+        self._readers.close_all()
+        with self._lock:
+            self._writer.close()
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(cache_dir='cache'):
+    """
+    Get the process-wide cache for a directory
+
+    Services in the same process share one instance, so a translation still
+    in the write-behind buffer is visible to all of them.
+    """
+    path = os.path.abspath(cache_dir)
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = TranslationCache(cache_dir)
+        return _shared[path]
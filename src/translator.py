@@ -3,19 +3,33 @@ Translation Service Module
 Translates English text to Hindi using deep-translator with caching
 """
 from deep_translator import GoogleTranslator
-import json
-import os
 import hashlib
+import os
+import re
 import time
 import ssl
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.poolmanager import PoolManager
 
+from concurrent.futures import ThreadPoolExecutor
+
+from fair_share import submit_with_context
+from rate_limiter import get_limiter
+from segmenter import chunk_text, iter_sentence_spans
+from single_flight import SingleFlight
+from translation_cache import shared_cache
+
 # Disable SSL verification warnings
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Maximum characters per translation request
+MAX_REQUEST_CHARS = 4500
+
+# Blank line between paragraphs
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
 
 class SSLAdapter(HTTPAdapter):
     """Custom adapter to disable SSL verification"""
@@ -29,6 +43,9 @@ class SSLAdapter(HTTPAdapter):
 class TranslationService:
     """Handles English to Hindi translation with caching"""
     
+    # Sentences being translated right now, shared by every pipeline in the process
+    _in_flight = SingleFlight()
+    
     def __init__(self, cache_dir='cache'):
         # Create session with SSL disabled
         session = requests.Session()
@@ -42,54 +59,25 @@ class TranslationService:
         
         self.session = session
         self.cache_dir = cache_dir
-        self.cache_file = os.path.join(cache_dir, 'translations.json')
-        self.cache = self._load_cache()
+        self.cache = shared_cache(cache_dir)
+        self.limiter = get_limiter('translate')
+        self.max_concurrency = int(os.environ.get('TRANSLATE_CONCURRENCY', 4))
         
-    def _load_cache(self):
-        """Load translation cache from file"""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading cache: {e}")
-                return {}
-        return {}
-    
-    def _save_cache(self):
-        """Save translation cache to file"""
-        try:
-            os.makedirs(self.cache_dir, exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving cache: {e}")
-    
     def _get_cache_key(self, text):
         """Generate cache key for text"""
         return hashlib.md5(text.encode('utf-8')).hexdigest()
     
+    def cache_key(self, text):
+        """Cache key a page's translation is stored under"""
+        return self._get_cache_key(text)
+    
+    def get_cached(self, cache_key):
+        """Cached translation for a cache key, or None (never calls the API)"""
+        return self.cache.get(cache_key)
+    
     def _chunk_text(self, text, max_chunk_size=4500):
-        """Split text into smaller chunks for translation"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for word in words:
-            word_size = len(word) + 1  # +1 for space
-            if current_size + word_size > max_chunk_size and current_chunk:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_size = word_size
-            else:
-                current_chunk.append(word)
-                current_size += word_size
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
+        """Split text into sentence-aligned chunks for translation"""
+        return chunk_text(text, max_chunk_size)
     
     def translate(self, text, retry_count=3):
         """
@@ -102,39 +90,145 @@ class TranslationService:
         Returns:
             Translated Hindi text
         """
-        if not text or not text.strip():
-            return ""
+        return self.translate_batch([text], retry_count)[0]
+    
+    def _segment(self, text):
+        """
+        Split text into paragraphs of whitespace-normalized sentences
         
-        # Check cache first
-        cache_key = self._get_cache_key(text)
-        if cache_key in self.cache:
-            print(f"Cache hit for text (length: {len(text)})")
-            return self.cache[cache_key]
-        
-        # Split into chunks if text is too long
-        if len(text) > 4500:
-            print(f"Text too long ({len(text)} chars), splitting into chunks...")
-            chunks = self._chunk_text(text)
-            translated_chunks = []
-            for i, chunk in enumerate(chunks):
-                print(f"Translating chunk {i+1}/{len(chunks)}")
-                translated_chunk = self._translate_single(chunk, retry_count)
-                translated_chunks.append(translated_chunk)
-            translated_text = ' '.join(translated_chunks)
+        Returns:
+            List of paragraphs, each a list of sentence strings
+        """
+        paragraphs = []
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            sentences = [' '.join(paragraph[s:e].split()) for s, e in iter_sentence_spans(paragraph)]
+            if sentences:
+                paragraphs.append(sentences)
+        return paragraphs
+    
+    def _translate_sentences(self, sentences, retry_count=3):
+        """
+        Translate sentences through the translation memory
+        
+        Sentences already in the cache are reused (from any page or book);
+        only the missing ones are sent to the API, then cached individually.
+        Sentences another thread is already translating are waited on, not
+        requested again.
+        
+        Returns:
+            Dict of sentence -> translated sentence
+        """
+        unique = list(dict.fromkeys(sentences))
+        keys = {sentence: self._get_cache_key(sentence) for sentence in unique}
+        found = self.cache.get_many(keys.values())
+        
+        translations = {}
+        missing = []
+        for sentence in unique:
+            if keys[sentence] in found:
+                translations[sentence] = found[keys[sentence]]
+            else:
+                missing.append(sentence)
+        print(f"Translation memory: {len(unique) - len(missing)}/{len(unique)} sentences cached")
+        
+        claimed, waiting = [], {}
+        for sentence in missing:
+            future, is_leader = self._in_flight.claim(keys[sentence])
+            if is_leader:
+                claimed.append(sentence)
+            else:
+                waiting[sentence] = future
+        
+        try:
+            # Another thread may have finished these between the lookup and the claim
+            found = self.cache.get_many(keys[sentence] for sentence in claimed)
+            to_translate = [sentence for sentence in claimed if keys[sentence] not in found]
+            for sentence in claimed:
+                if keys[sentence] in found:
+                    translations[sentence] = found[keys[sentence]]
+            
+            for sentence, translated in zip(to_translate, self._translate_segments(to_translate, retry_count)):
+                translations[sentence] = translated
+                self.cache.put(keys[sentence], translated)
+        except Exception as e:
+            for sentence in claimed:
+                self._in_flight.resolve(keys[sentence], error=e)
+            raise
+        for sentence in claimed:
+            self._in_flight.resolve(keys[sentence], result=translations[sentence])
+        
+        if waiting:
+            print(f"Waiting on {len(waiting)} sentences already being translated")
+        for sentence, future in waiting.items():
+            translations[sentence] = future.result()
+        return translations
+    
+    def _translate_segments(self, segments, retry_count=3):
+        """
+        Translate segments in as few requests as possible
+        
+        Segments are packed one per line into requests of up to MAX_REQUEST_CHARS.
+        Segments longer than that are chunked, one request per chunk. Requests
+        run concurrently, up to max_concurrency at a time.
+        
+        Returns:
+            List of translations, in the same order as segments
+        """
+        pieces = [None] * len(segments)  # Per segment: translated chunks
+        requests_plan = []  # (slots, texts): one request, slot = (segment index, chunk index)
+        slots, texts, size = [], [], 0
+        for i, segment in enumerate(segments):
+            if len(segment) > MAX_REQUEST_CHARS:
+                chunks = self._chunk_text(segment, MAX_REQUEST_CHARS)
+                print(f"Segment too long ({len(segment)} chars), translating {len(chunks)} chunks")
+                pieces[i] = [None] * len(chunks)
+                requests_plan.extend(([(i, c)], [chunk]) for c, chunk in enumerate(chunks))
+                continue
+            if texts and size + 1 + len(segment) > MAX_REQUEST_CHARS:
+                requests_plan.append((slots, texts))
+                slots, texts, size = [], [], 0
+            pieces[i] = [None]
+            slots.append((i, 0))
+            texts.append(segment)
+            size += len(segment) + 1
+        if texts:
+            requests_plan.append((slots, texts))
+        
+        def run(request):
+            return self._translate_packed(request[1], retry_count)
+        
+        if len(requests_plan) > 1 and self.max_concurrency > 1:
+            # Requests keep the caller's work context (on-demand vs prefetch, which book)
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(requests_plan))) as pool:
+                futures = [submit_with_context(pool, run, request) for request in requests_plan]
+                outputs = [future.result() for future in futures]
         else:
-            translated_text = self._translate_single(text, retry_count)
+            outputs = [run(request) for request in requests_plan]
         
-        # Cache the result
-        self.cache[cache_key] = translated_text
-        self._save_cache()
+        for (request_slots, _), translated in zip(requests_plan, outputs):
+            for (i, c), text in zip(request_slots, translated):
+                pieces[i][c] = text
+        return [' '.join(chunk_translations) for chunk_translations in pieces]
+    
+    def _translate_packed(self, segments, retry_count=3):
+        """Translate newline-free segments in one request, one segment per line"""
+        if not segments:
+            return []
+        if len(segments) == 1:
+            return [self._translate_single(segments[0], retry_count)]
         
-        return translated_text
+        lines = self._translate_single('\n'.join(segments), retry_count).split('\n')
+        if len(lines) != len(segments):
+            print(f"Line count mismatch ({len(lines)} != {len(segments)}), translating segments one by one")
+            return [self._translate_single(segment, retry_count) for segment in segments]
+        return [line.strip() for line in lines]
     
     def _translate_single(self, text, retry_count=3):
         """Translate a single chunk of text"""
         # Translate with retry logic
         for attempt in range(retry_count):
             try:
+                self.limiter.acquire()
                 print(f"Translating text (length: {len(text)}, attempt: {attempt + 1})")
                 
                 # Manual translation using requests without SSL verification
@@ -166,31 +260,69 @@ class TranslationService:
                 else:
                     raise Exception(f"Translation failed after {retry_count} attempts: {str(e)}")
     
-    def translate_batch(self, texts):
+    def translate_batch(self, texts, retry_count=3):
         """
-        Translate multiple texts
+        Translate multiple texts with as few API requests as possible
+        
+        Missing sentences from every text are packed together into shared
+        requests, then each text is assembled and cached on its own.
         
         Args:
             texts: List of English texts
+            retry_count: Number of retry attempts on failure
             
         Returns:
             List of translated Hindi texts
         """
-        translations = []
-        for text in texts:
-            translated = self.translate(text)
-            translations.append(translated)
-        return translations
+        results = [''] * len(texts)
+        keys = {}
+        for i, text in enumerate(texts):
+            if text and text.strip():
+                keys[i] = self._get_cache_key(text)
+        
+        # Check cache first
+        found = self.cache.get_many(set(keys.values()))
+        pending = {}
+        for i, key in keys.items():
+            if key in found:
+                print(f"Cache hit for text (length: {len(texts[i])})")
+                results[i] = found[key]
+            else:
+                pending[i] = self._segment(texts[i])
+        
+        if pending:
+            # Assemble each text from the sentence-level translation memory
+            translations = self._translate_sentences(
+                [sentence for paragraphs in pending.values() for paragraph in paragraphs for sentence in paragraph],
+                retry_count
+            )
+            for i, paragraphs in pending.items():
+                results[i] = '\n\n'.join(
+                    ' '.join(translations[sentence] for sentence in paragraph)
+                    for paragraph in paragraphs
+                )
+                self.cache.put(keys[i], results[i])
+        
+        return results
     
     def clear_cache(self):
         """Clear translation cache"""
-        self.cache = {}
-        if os.path.exists(self.cache_file):
-            os.remove(self.cache_file)
+        self.cache.clear()
         print("Translation cache cleared")
+    
+    def flush(self):
+        """Commit pending cache writes, so other processes sharing the cache see them"""
+        self.cache.flush()
+    
+    def close(self):
+        """Flush pending cache writes (the shared cache stays open for other services)"""
+        self.cache.flush()
 
 
 def translate_text(text, cache_dir='cache'):
     """Convenience function to translate text"""
     service = TranslationService(cache_dir)
-    return service.translate(text)
+    try:
+        return service.translate(text)
+    finally:
+        service.close()
@@ -8,14 +8,74 @@ import hashlib
 import time
 from io import BytesIO
 
+from rate_limiter import get_limiter
+from segmenter import chunk_text
+from single_flight import SingleFlight
+
+
+# MPEG audio Layer III tables (kbps / Hz), indexed by header fields
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# gTTS serves 32 kbps MP3; used when the frames cannot be parsed
+_DEFAULT_BITRATE = 32000
+
+
+def mp3_duration(data):
+    """
+    Playback length of MP3 data in seconds, from its Layer III frame headers
+    
+    Falls back to assuming 32 kbps if no frames are found.
+    """
+    pos = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        # Skip the ID3v2 tag (syncsafe size)
+        pos = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    
+    seconds = 0.0
+    end = len(data) - 4
+    while pos <= end:
+        if data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+            pos += 1
+            continue
+        version = (data[pos + 1] >> 3) & 3
+        layer = (data[pos + 1] >> 1) & 3
+        bitrate_index = data[pos + 2] >> 4
+        rate_index = (data[pos + 2] >> 2) & 3
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        padding = (data[pos + 2] >> 1) & 1
+        seconds += samples / sample_rate
+        pos += samples // 8 * bitrate // sample_rate + padding
+    
+    if seconds == 0.0:
+        return len(data) * 8 / _DEFAULT_BITRATE
+    return seconds
+
+
+def _tokenize(text):
+    """Split text into sentence-aligned pieces, one per gTTS request"""
+    return chunk_text(text, gTTS.GOOGLE_TTS_MAX_CHARS)
+
 
 class TTSEngine:
     """Text-to-Speech engine for Hindi audio generation"""
     
+    # Audio being synthesized right now, shared by every pipeline in the process
+    _in_flight = SingleFlight()
+    
     def __init__(self, cache_dir='cache'):
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
         self.memory_cache = {}  # In-memory cache for audio data
+        self.limiter = get_limiter('tts')
         print("TTS Engine initialized with gTTS")
     
     def _get_cache_key(self, text):
@@ -26,6 +86,18 @@ class TTSEngine:
         """Get full path for cached audio file"""
         return os.path.join(self.cache_dir, f"{cache_key}.mp3")
     
+    def cache_key(self, text):
+        """Cache key a text's audio is stored under"""
+        return self._get_cache_key(text)
+    
+    def get_audio_path(self, cache_key):
+        """Path of the cached audio file for a cache key"""
+        return self._get_audio_path(cache_key)
+    
+    def has_audio(self, cache_key):
+        """Check whether audio for a cache key is cached in memory or on disk"""
+        return cache_key in self.memory_cache or os.path.exists(self._get_audio_path(cache_key))
+    
     def generate_audio(self, text, page_num=None):
         """
         Generate audio from Hindi text
@@ -47,6 +119,7 @@ class TTSEngine:
             if cache_key not in self.memory_cache and not os.path.exists(audio_path):
                 # Generate minimal silent audio (1 second of silence)
                 tts = gTTS(text=".", lang='hi', slow=False)
+                self.limiter.acquire()
                 audio_fp = BytesIO()
                 tts.write_to_fp(audio_fp)
                 audio_data = audio_fp.getvalue()
@@ -81,7 +154,19 @@ class TTSEngine:
                 self.memory_cache[cache_key] = f.read()
             return audio_path
         
-        # Generate audio
+        # Generate audio (concurrent callers for the same text share one request)
+        return self._in_flight.do(cache_key, self._synthesize, text, cache_key, audio_path)
+    
+    def _synthesize(self, text, cache_key, audio_path):
+        """Generate audio with gTTS, store it in memory and on disk"""
+        # Another thread may have finished this audio before we claimed it
+        if cache_key in self.memory_cache:
+            return audio_path
+        if os.path.exists(audio_path):
+            with open(audio_path, 'rb') as f:
+                self.memory_cache[cache_key] = f.read()
+            return audio_path
+        
         try:
             os.makedirs(self.cache_dir, exist_ok=True)
             
@@ -93,12 +178,13 @@ class TTSEngine:
             
             for attempt in range(max_retries):
                 try:
-                    # Add initial delay to avoid rate limiting (especially on Render)
-                    if attempt == 0 and os.environ.get('RENDER'):
-                        time.sleep(3)  # 3 second delay before first attempt on Render
+                    # gTTS makes one request per chunk; take a token for each, one at
+                    # a time so a page a listener is waiting for can go in between
+                    for _ in _tokenize(text):
+                        self.limiter.acquire()
                     
                     # Use gTTS to generate audio in memory
-                    tts = gTTS(text=text, lang='hi', slow=False)
+                    tts = gTTS(text=text, lang='hi', slow=False, tokenizer_func=_tokenize)
                     
                     # Save to memory buffer
                     audio_buffer = BytesIO()
@@ -166,6 +252,26 @@ class TTSEngine:
         
         return None
     
+    def memory_usage(self):
+        """Bytes of audio held in the memory cache"""
+        return sum(len(data) for data in list(self.memory_cache.values()))
+    
+    def release_audio(self, text):
+        """Drop text's audio from the memory cache (the file on disk is kept)"""
+        self.memory_cache.pop(self._get_cache_key(text), None)
+    
+    def get_audio_duration(self, text):
+        """
+        Get the playback length of the cached audio for text
+        
+        Returns:
+            Duration in seconds, or None if no audio is cached
+        """
+        audio = self.get_audio_data(text)
+        if audio is None:
+            return None
+        return mp3_duration(audio.getvalue())
+    
     def generate_batch(self, texts):
         """
         Generate audio for multiple texts
@@ -177,18 +283,11 @@ class TTSEngine:
             List of paths to generated audio files
         """
         audio_paths = []
-        # Increase delay on Render to avoid rate limits
-        delay_between = 3 if os.environ.get('RENDER') else 1
-        
+        # Requests are paced by the shared rate limiter
         for i, text in enumerate(texts):
             try:
                 audio_path = self.generate_audio(text, page_num=i)
                 audio_paths.append(audio_path)
-                
-                # Add delay between requests to avoid rate limiting
-                if i < len(texts) - 1:  # Don't delay after the last one
-                    time.sleep(delay_between)
-                    
             except Exception as e:
                 print(f"Error generating audio for text {i}: {e}")
                 audio_paths.append(None)
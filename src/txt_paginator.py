@@ -0,0 +1,281 @@
+"""
+Streaming TXT Paginator Module
+Scans a UTF-8 text file through mmap in one pass and indexes pages as byte offsets
+"""
+from array import array
+import mmap
+import re
+
+from segmenter import iter_sentence_spans
+
+
+# Break into small pages (200-250 words max for faster processing)
+MAX_WORDS_PER_PAGE = 250
+
+# Fast start: the first pages are a few sentences so the first audio is ready
+# sooner, then pages grow to the full budget
+FAST_START_WORDS = (40, 120)
+
+# Page flags: how a page's units are joined and whether it cuts a long paragraph
+SEP_PARAGRAPH = 0   # Units joined with a blank line
+SEP_SPACE = 1       # Units joined with a space (page closed mid sentence-split)
+WORDS = 2           # Continuous text: words joined with single spaces
+HEAD_PARTIAL = 4    # First unit continues a long paragraph from the previous page
+TAIL_PARTIAL = 8    # Last unit is cut off; the paragraph continues on the next page
+
+# Paragraph break: two line endings in a row (same pairing as universal newlines + split('\n\n'))
+_PARAGRAPH_BREAK = re.compile(rb'(?:\r\n|\r(?!\n)|\n)(?:\r\n|\r(?!\n)|\n)')
+
+# Runs of any character str.split() treats as whitespace, as UTF-8 bytes
+_WHITESPACE_RUN = re.compile(
+    rb'(?:[\t\n\x0b\x0c\r\x1c-\x1f ]|\xc2[\x85\xa0]|\xe1\x9a\x80'
+    rb'|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)+'
+)
+
+def page_budget(page_num, fast_start=True):
+    """Word budget for a page"""
+    if fast_start and page_num < len(FAST_START_WORDS):
+        return FAST_START_WORDS[page_num]
+    return MAX_WORDS_PER_PAGE
+
+
+def _translate_newlines(text):
+    """Apply universal-newline translation (as text-mode open() does)"""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class TxtPageIndex:
+    """Compact page index: (start, end) byte offsets plus a flag byte per page"""
+
+    def __init__(self):
+        self.starts = array('Q')
+        self.ends = array('Q')
+        self.flags = array('B')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end, flags):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.flags.append(flags)
+
+    def decode(self, buf, page_num):
+        """
+        Decode one page's text from the source buffer
+
+        Args:
+            buf: The bytes-like object the index was built from
+            page_num: Page number to decode
+
+        Returns:
+            Page text, identical to what the in-memory paginator produced
+        """
+        if page_num < 0 or page_num >= len(self):
+            raise ValueError(f"Page {page_num} out of range")
+
+        raw = _translate_newlines(buf[self.starts[page_num]:self.ends[page_num]].decode('utf-8'))
+        flags = self.flags[page_num]
+
+        if flags & WORDS:
+            return ' '.join(raw.split())
+
+        paragraphs = [p.strip() for p in raw.split('\n\n') if p.strip()]
+        units = []
+        for i, para in enumerate(paragraphs):
+            sentence_split = (
+                (i == 0 and flags & HEAD_PARTIAL)
+                or (i == len(paragraphs) - 1 and flags & TAIL_PARTIAL)
+                or len(para.split()) > MAX_WORDS_PER_PAGE
+            )
+            if sentence_split:
+                units.extend(para[start:end] for start, end in iter_sentence_spans(para))
+            else:
+                units.append(para)
+
+        separator = ' ' if flags & SEP_SPACE else '\n\n'
+        return separator.join(units)
+
+
+class _PageBuilder:
+    """Accumulates units into pages, mirroring the original grouping rules"""
+
+    def __init__(self, index, fast_start=True):
+        self.index = index
+        self.fast_start = fast_start
+        self.start = None
+        self.end = None
+        self.word_count = 0
+        self.head_partial = False
+        self.tail_partial = False
+
+    def budget(self):
+        """Word budget of the page being built"""
+        return page_budget(len(self.index), self.fast_start)
+
+    def add(self, start, end, words, separator, head_partial=False, tail_partial=False):
+        """Add one unit (paragraph or sentence); close the page first if it overflows"""
+        if self.word_count + words > self.budget() and self.start is not None:
+            self.flush(separator)
+            self.head_partial = head_partial
+        elif self.start is None:
+            self.head_partial = head_partial
+
+        if self.start is None:
+            self.start = start
+        self.end = end
+        self.word_count += words
+        self.tail_partial = tail_partial
+
+    def flush(self, separator):
+        if self.start is None:
+            return
+        flags = separator
+        if self.head_partial:
+            flags |= HEAD_PARTIAL
+        if self.tail_partial:
+            flags |= TAIL_PARTIAL
+        self.index.add(self.start, self.end, flags)
+        self.start = None
+        self.word_count = 0
+
+
+def _iter_paragraphs(buf):
+    """Yield raw (byte_start, byte_end) spans of paragraphs that are not blank"""
+    pos = 0
+    size = len(buf)
+    while pos <= size:
+        match = _PARAGRAPH_BREAK.search(buf, pos)
+        end = match.start() if match else size
+        blank = _WHITESPACE_RUN.match(buf, pos, end)
+        if end > pos and not (blank and blank.end() == end):
+            yield pos, end
+        if not match:
+            break
+        pos = match.end()
+
+
+def _paginate_words(buf, start, end, index, fast_start=True):
+    """Continuous text: cut pages every MAX_WORDS_PER_PAGE words (fewer for fast-start pages)"""
+    page_start = None
+    word_start = start
+    word_count = 0
+    budget = page_budget(len(index), fast_start)
+    for match in _WHITESPACE_RUN.finditer(buf, start, end):
+        if match.start() > word_start:
+            if page_start is None:
+                page_start = word_start
+            word_count += 1
+            if word_count == budget:
+                index.add(page_start, match.start(), WORDS)
+                page_start = None
+                word_count = 0
+                budget = page_budget(len(index), fast_start)
+        word_start = match.end()
+    if end > word_start:
+        if page_start is None:
+            page_start = word_start
+        word_count += 1
+    if word_count:
+        index.add(page_start, end, WORDS)
+
+
+def _paginate_paragraph(builder, buf, raw_start, raw_end):
+    """Feed one paragraph to the page builder, splitting it by sentences if too long"""
+    raw = buf[raw_start:raw_end].decode('utf-8')
+    para = raw.strip()
+    byte_start = raw_start + len(raw[:len(raw) - len(raw.lstrip())].encode('utf-8'))
+
+    # Fast-start pages have smaller budgets, so shorter paragraphs can be split here too
+    para_words = len(para.split())
+    if para_words <= builder.budget():
+        builder.add(byte_start, byte_start + len(para.encode('utf-8')), para_words, SEP_PARAGRAPH)
+        return
+
+    sentences = list(iter_sentence_spans(para))
+    last = len(sentences) - 1
+    if raw.isascii():
+        # Char offsets are byte offsets; skip the per-sentence re-encoding
+        for i, (start, end) in enumerate(sentences):
+            builder.add(byte_start + start, byte_start + end, len(para[start:end].split()), SEP_SPACE,
+                        head_partial=i > 0, tail_partial=i < last)
+        return
+
+    byte_pos = byte_start
+    char_pos = 0
+    for i, (start, end) in enumerate(sentences):
+        byte_pos += len(para[char_pos:start].encode('utf-8'))
+        sentence = para[start:end]
+        sentence_bytes = len(sentence.encode('utf-8'))
+        builder.add(byte_pos, byte_pos + sentence_bytes, len(sentence.split()), SEP_SPACE,
+                    head_partial=i > 0, tail_partial=i < last)
+        byte_pos += sentence_bytes
+        char_pos = end
+
+
+def iter_paginate(buf, fast_start=True, step=64):
+    """
+    Build a page index for UTF-8 text in a bytes-like buffer (bytes or mmap),
+    yielding the growing index every `step` paragraphs
+
+    Pages already in the index are final, so callers can serve them while
+    the rest of the file is scanned. The last yield holds every page. Only
+    one paragraph is decoded at a time (continuous text is scanned as bytes);
+    page text is decoded on demand by TxtPageIndex.decode.
+
+    Args:
+        buf: UTF-8 text
+        fast_start: Make the first pages small (FAST_START_WORDS) to cut
+            time-to-first-audio; numbering is still fixed by the text alone
+        step: Paragraphs to scan between yields
+    """
+    index = TxtPageIndex()
+    builder = _PageBuilder(index, fast_start)
+
+    first = None
+    paragraph_count = 0
+    for span in _iter_paragraphs(buf):
+        paragraph_count += 1
+        if paragraph_count == 1:
+            # A single paragraph means continuous text; wait for a second one
+            first = span
+            continue
+        if first is not None:
+            _paginate_paragraph(builder, buf, *first)
+            first = None
+        _paginate_paragraph(builder, buf, *span)
+        if paragraph_count % step == 0:
+            yield index
+
+    if paragraph_count == 0:
+        index.add(0, 0, SEP_PARAGRAPH)  # Empty page for empty files
+    elif paragraph_count == 1:
+        _paginate_words(buf, first[0], first[1], index, fast_start)
+    else:
+        builder.flush(SEP_PARAGRAPH)
+    yield index
+
+
+def paginate(buf, fast_start=True):
+    """Build the complete page index for UTF-8 text in one pass (see iter_paginate)"""
+    for index in iter_paginate(buf, fast_start):
+        pass
+    return index
+
+
+def open_txt(file_path):
+    """
+    Open a TXT file for paginated reading
+
+    Returns:
+        (file, buffer) - the buffer is an mmap, or b'' for empty files
+    """
+    file = open(file_path, 'rb')
+    try:
+        buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        buf = b''  # mmap cannot map an empty file
+    except Exception:
+        file.close()
+        raise
+    return file, buf
@@ -1,6 +1,6 @@
 // Main application JavaScript
 let currentPage = 0;
-let totalPages = 0;
+let totalPages = 0; // null while the server is still counting pages
 let currentFilename = '';
 let audioElement = null;
 let isIOS = false;
@@ -105,7 +105,7 @@ function setupiOSBackgroundAudio() {
             // Update media session metadata for background controls
             if (navigator.mediaSession && currentFilename) {
                 navigator.mediaSession.metadata = new MediaMetadata({
-                    title: `Page ${currentPage + 1} of ${totalPages}`,
+                    title: `Page ${currentPage + 1} of ${pageCountLabel()}`,
                     artist: 'AI Audiobook Translator',
                     album: currentFilename,
                     artwork: [
@@ -254,7 +254,7 @@ async function handleFile(file) {
             currentFilename = data.filename;
             totalPages = data.total_pages;
             
-            uploadStatus.textContent = `✓ Uploaded: ${data.filename} (${data.total_pages} pages)`;
+            uploadStatus.textContent = `✓ Uploaded: ${data.filename} (${pageCountLabel()} pages)`;
             uploadStatus.classList.add('success');
             
             // Load first page
@@ -262,7 +262,8 @@ async function handleFile(file) {
                 uploadSection.classList.add('hidden');
                 playerSection.classList.remove('hidden');
                 bookTitle.textContent = data.filename;
-                totalPagesSpan.textContent = totalPages;
+                totalPagesSpan.textContent = pageCountLabel();
+                waitForPageCount();
                 loadPage(0);
             }, 1000);
             
@@ -277,7 +278,7 @@ async function handleFile(file) {
 
 // Load Page
 async function loadPage(pageNum) {
-    if (pageNum < 0 || pageNum >= totalPages) {
+    if (pageNum < 0 || (totalPages !== null && pageNum >= totalPages)) {
         console.log('Page out of range');
         return;
     }
@@ -290,7 +291,7 @@ async function loadPage(pageNum) {
     processingMessage.textContent = `Processing page ${pageNum + 1}...`;
     
     try {
-        const response = await fetch(`/process/${pageNum}`);
+        const response = await fetch(`/books/${encodeURIComponent(currentFilename)}/process/${pageNum}`);
         const data = await response.json();
         
         if (response.ok && data.success) {
@@ -363,7 +364,7 @@ function playAudio() {
                 // Update media session metadata for iOS background controls
                 if (isIOS && navigator.mediaSession && currentFilename) {
                     navigator.mediaSession.metadata = new MediaMetadata({
-                        title: `Page ${currentPage + 1} of ${totalPages}`,
+                        title: `Page ${currentPage + 1} of ${pageCountLabel()}`,
                         artist: 'AI Audiobook Translator',
                         album: currentFilename,
                         artwork: [
@@ -419,9 +420,44 @@ function previousPage() {
     }
 }
 
+// Page count for display ('…' while the book is still being indexed)
+function pageCountLabel() {
+    return totalPages === null ? '…' : totalPages;
+}
+
+// Whether there is a page after the current one (assumed while the count is unknown)
+function hasNextPage() {
+    return totalPages === null || currentPage < totalPages - 1;
+}
+
+// Poll the server until the book is indexed, then show the page count
+async function waitForPageCount() {
+    const filename = currentFilename;
+    while (totalPages === null && filename === currentFilename) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        try {
+            const response = await fetch(`/books/${encodeURIComponent(filename)}/status`);
+            const data = await response.json();
+            if (!response.ok || filename !== currentFilename) {
+                return;
+            }
+            if (data.indexing === 'failed') {
+                return;
+            }
+            if (data.total_pages !== null && data.total_pages !== undefined) {
+                totalPages = data.total_pages;
+                totalPagesSpan.textContent = totalPages;
+            }
+        } catch (error) {
+            console.log('Page count poll failed:', error.message);
+            return;
+        }
+    }
+}
+
 // Next Page
 function nextPage() {
-    if (currentPage < totalPages - 1) {
+    if (hasNextPage()) {
         loadPage(currentPage + 1);
     }
 }
@@ -432,7 +468,7 @@ function handleAudioEnded() {
     playPauseBtn.title = 'Play';
     
     // Auto-advance to next page
-    if (currentPage < totalPages - 1) {
+    if (hasNextPage()) {
         setTimeout(() => {
             nextPage();
         }, 500);
@@ -549,7 +585,8 @@ async function loadBookFromShelf(filename) {
             
             // Update UI
             bookTitle.textContent = currentFilename;
-            totalPagesSpan.textContent = totalPages;
+            totalPagesSpan.textContent = pageCountLabel();
+            waitForPageCount();
             
             // Show player, hide upload
             uploadSection.classList.add('hidden');
@@ -17,7 +17,7 @@ print("=" * 60)
 
 # Initialize pipeline
 pipeline = ProcessingPipeline(file_path, cache_dir)
-print(f"Total pages: {pipeline.total_pages}")
+print(f"Total pages: {pipeline.parser.get_total_pages()}")
 
 # Process page 0
 print("\nProcessing page 0...")
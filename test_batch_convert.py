@@ -0,0 +1,70 @@
+"""
+Test headless batch conversion (API calls are faked)
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import batch_convert
+from translator import TranslationService
+from tts import TTSEngine
+
+
+def fake_audio(self, text, page_num=None):
+    """Stand-in for TTS that writes a small cached audio file"""
+    audio_path = self.get_audio_path(self.cache_key(text))
+    os.makedirs(self.cache_dir, exist_ok=True)
+    with open(audio_path, 'wb') as f:
+        f.write(b'\x00' * 64)
+    return audio_path
+
+
+def test_convert_folder_and_resume():
+    """Every page of every book gets an audio file; a second run skips them"""
+    originals = TranslationService._translate_single, TTSEngine.generate_audio
+    TranslationService._translate_single = lambda self, text, retry_count=3: text.upper()
+    TTSEngine.generate_audio = fake_audio
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            books_dir = os.path.join(tmp_dir, 'books')
+            os.makedirs(books_dir)
+            for name, paragraphs in (('one.txt', 3), ('two.txt', 5)):
+                with open(os.path.join(books_dir, name), 'w', encoding='utf-8') as f:
+                    f.write('\n\n'.join(f'Chapter {i}. ' + ' '.join(['word'] * 200) for i in range(paragraphs)))
+            with open(os.path.join(books_dir, 'notes.md'), 'w') as f:
+                f.write('not a book')
+
+            output_dir = os.path.join(tmp_dir, 'audio')
+            cache_dir = os.path.join(tmp_dir, 'cache')
+            args = [books_dir, '--output', output_dir, '--cache-dir', cache_dir, '--threads', '3']
+            assert batch_convert.main(args) == 0
+
+            report = batch_convert.convert_books(batch_convert.find_books(books_dir), output_dir, cache_dir)
+            assert [book['book'] for book in report['books']] == ['one.txt', 'two.txt']
+            for book in report['books']:
+                files = sorted(os.listdir(book['output_dir']))
+                assert len(files) == book['pages'] == book['skipped']
+                assert files[0] == 'page_0001.mp3'
+            assert report['totals']['completed'] == report['totals']['failed'] == 0
+            assert os.path.exists(os.path.join(output_dir, 'report.json'))
+    finally:
+        TranslationService._translate_single, TTSEngine.generate_audio = originals
+    print(f"✓ {report['totals']['pages']} pages converted, then skipped on rerun")
+
+
+def test_rate_limits_split_between_processes():
+    """Each process gets an equal share of the configured rate"""
+    os.environ['TTS_RATE_LIMIT'] = '3'
+    try:
+        env = batch_convert.split_rate_limits(3)
+        assert float(env['TTS_RATE_LIMIT']) == 1.0
+        assert int(env['TTS_BURST']) >= 1
+    finally:
+        del os.environ['TTS_RATE_LIMIT']
+    print("✓ Rate limits split between processes")
+
+
+if __name__ == '__main__':
+    test_convert_folder_and_resume()
+    test_rate_limits_split_between_processes()
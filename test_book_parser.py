@@ -0,0 +1,144 @@
+"""
+Test BookParser's page text cache, open document handles and parallel extraction
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import PyPDF2
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from parser import BookParser
+
+
+def write_txt(path, pages):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join(f'Page {i} starts here. ' + ' '.join(['word'] * 240) + '.' for i in range(pages)))
+
+
+def write_pdf(path, pages, broken=()):
+    """Write a PDF with one line of text per page; pages in broken fail to extract"""
+    font = DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica')
+    })
+    writer = PyPDF2.PdfWriter()
+    for i in range(pages):
+        page = PyPDF2.PageObject.create_blank_page(width=300, height=200)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(f'BT /F1 12 Tf 20 100 Td (Text of page {i}) Tj ET'.encode('ascii'))
+        page[NameObject('/Contents')] = NumberObject(0) if i in broken else content
+        writer.add_page(page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def collect_pages(parser, **kwargs):
+    """Pages iter_pages yields, and the error it stops with (or None)"""
+    pages = []
+    try:
+        for page in parser.iter_pages(**kwargs):
+            pages.append(page)
+    except Exception as e:
+        return pages, str(e)
+    return pages, None
+
+
+def test_page_cache_bounded():
+    """Extracted page text is kept for the most recently used pages only"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        book_path = os.path.join(tmp_dir, 'book.txt')
+        write_txt(book_path, 8)
+        parser = BookParser(book_path, page_cache_size=3)
+        for i in range(5):
+            parser.extract_page(i)
+        assert list(parser._page_cache) == [2, 3, 4]
+
+        parser.extract_page(2)  # Most recently used again
+        parser.extract_page(5)
+        assert list(parser._page_cache) == [4, 2, 5]
+        assert parser._page_cache[2] == parser._extract_uncached(2)
+        parser.close()
+        assert not parser._page_cache
+    print("✓ Page text cache bounded to the most recent pages")
+
+
+def test_close_releases_handles():
+    """close() releases the mmap, PDF file and page store, and later requests never reopen them"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        txt_path = os.path.join(tmp_dir, 'book.txt')
+        write_txt(txt_path, 4)
+        parser = BookParser(txt_path)
+        assert parser.extract_page(1).startswith('Page 1')
+        txt_file = parser._txt_file
+        parser.close()
+        assert txt_file.closed and parser._txt_buffer is None
+
+        # A page request still running when the book is closed
+        for request in (lambda: parser.extract_page(2), lambda: parser.page_exists(3)):
+            try:
+                request()
+                assert False, "Closed parser served a page"
+            except ValueError:
+                pass
+        parser.build_index()
+        assert parser._txt_file is None and parser._indexer is None
+
+        pdf_path = os.path.join(tmp_dir, 'book.pdf')
+        write_pdf(pdf_path, 3)
+        parser = BookParser(pdf_path)
+        assert parser.get_total_pages() == 3 and parser.extract_page(0) == 'Text of page 0'
+        pdf_file = parser._pdf_file
+        parser.close()
+        assert pdf_file.closed
+        try:
+            parser.extract_page(1)
+            assert False, "Closed parser served a page"
+        except ValueError:
+            pass
+        assert parser._pdf_file is None and parser._pdf_reader is None
+
+        # The page store is not reopened either
+        parser = BookParser(txt_path, os.path.join(tmp_dir, 'cache'))
+        parser.build_text_store()
+        assert parser.has_text_store()
+        parser.close()
+        assert not parser.has_text_store() and parser._store is None
+    print("✓ Handles released on close and never reopened")
+
+
+def test_parallel_matches_serial():
+    """Process-pool extraction yields the serial pages, in order, and fails at the same page"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'book.pdf')
+        write_pdf(pdf_path, 7)
+        with BookParser(pdf_path) as parser:
+            serial = collect_pages(parser)
+        with BookParser(pdf_path) as parser:
+            parallel = collect_pages(parser, parallel=True, max_workers=2, chunk_size=3)
+        assert [page['page_num'] for page in parallel[0]] == list(range(7))
+        assert parallel == serial
+        assert serial[0][6]['text'] == 'Text of page 6'
+
+        # Page 4 fails in the middle of the second chunk
+        broken_path = os.path.join(tmp_dir, 'broken.pdf')
+        write_pdf(broken_path, 7, broken={4})
+        with BookParser(broken_path) as parser:
+            serial = collect_pages(parser)
+        with BookParser(broken_path) as parser:
+            parallel = collect_pages(parser, parallel=True, max_workers=2, chunk_size=3)
+        assert [page['page_num'] for page in serial[0]] == [0, 1, 2, 3]
+        assert serial[1].startswith('Error extracting PDF page 4')
+        assert parallel == serial
+    print("✓ Parallel extraction matches serial, including a failing page")
+
+
+if __name__ == '__main__':
+    test_page_cache_bounded()
+    test_close_releases_handles()
+    test_parallel_matches_serial()
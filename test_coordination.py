@@ -0,0 +1,284 @@
+"""
+Test state shared between worker processes (sessions, secret key, page claims)
+"""
+import sys
+import os
+import io
+import multiprocessing
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from coordination import SHARED_DONE, SHARED_RUNNING, Coordinator
+from parser import BookParser
+from pipeline import ProcessingPipeline
+from registry import PipelineRegistry
+
+
+def other_process(cache_dir, **kwargs):
+    """Coordinator that claims pages as if it were another worker process"""
+    coordinator = Coordinator(cache_dir, **kwargs)
+    coordinator._host = 'other-worker'
+    return coordinator
+
+
+def wait_for_store(entry, timeout=10):
+    """Wait until a pipeline's background indexing has written the page store"""
+    deadline = time.monotonic() + timeout
+    while not entry.pipeline.parser.has_text_store():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.02)
+
+
+def test_sessions_and_secret_key_shared():
+    """Every worker signs sessions with one key and sees every session's book"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        first, second = Coordinator(cache_dir), Coordinator(cache_dir)
+        key = first.secret_key()
+        assert len(key) == 32 and second.secret_key() == key
+
+        first.set_session_book('alice', '/books/a.txt')
+        assert second.session_book('alice') == '/books/a.txt'
+        second.forget_book('/books/a.txt')
+        assert first.session_book('alice') is None
+        first.close()
+        second.close()
+    print("✓ Secret key and sessions shared")
+
+
+def test_page_claims():
+    """One process runs a page at a time; claims end on finish, release or lease expiry"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        mine = Coordinator(cache_dir)
+        theirs = other_process(cache_dir, lease_seconds=0.2, poll_interval=0.01)
+
+        assert mine.claim_page('book', 0)
+        assert mine.claim_page('book', 0)  # Re-entrant
+        assert not theirs.claim_page('book', 0)
+        assert not theirs.wait_for_page('book', 0, timeout=0.05)
+        mine.finish_page('book', 0, SHARED_DONE)
+        assert theirs.wait_for_page('book', 0, timeout=0.05)
+        assert theirs.page_state('book', 0) == (SHARED_DONE, None)
+
+        # A worker that dies keeps its claim only until the lease runs out
+        dead = other_process(cache_dir, lease_seconds=0.2)
+        dead._host = 'dead-worker'
+        assert dead.claim_page('book', 1)
+        dead.close()  # Stops renewing, as if the process had died
+        assert mine.page_state('book', 1) == (SHARED_RUNNING, dead.owner)
+        assert not mine.claim_page('book', 1)
+        time.sleep(0.25)
+        assert mine.claim_page('book', 1)
+
+        mine.release_book('book')
+        assert theirs.page_state('book', 1) == (None, None)
+        assert theirs.page_counts('book') == {'running': 0, 'done': 1, 'failed': 0}
+        mine.close()
+        theirs.close()
+    print("✓ Page claims exclusive, released and expiring")
+
+
+def test_claims_renewed_while_running():
+    """A page that runs longer than the lease stays claimed while its process is alive"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        mine = Coordinator(cache_dir, lease_seconds=0.3)
+        theirs = other_process(cache_dir)
+
+        assert mine.claim_page('book', 0)
+        time.sleep(1.0)  # Several leases
+        assert not theirs.claim_page('book', 0)
+        mine.finish_page('book', 0, SHARED_DONE)
+        assert mine.renew_claims() == 0
+        mine.close()
+        theirs.close()
+    print("✓ Claims renewed past the lease while running")
+
+
+def test_short_lived_threads_release_connections():
+    """A request thread's connection is closed when the thread ends"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        coordinator = Coordinator(os.path.join(tmp_dir, 'cache'))
+        coordinator.set_session_book('alice', '/books/a.txt')
+
+        def request():
+            assert coordinator.session_book('alice') == '/books/a.txt'
+
+        # One thread per request, as in the threaded dev server
+        for _ in range(300):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        assert len(coordinator._connections) <= 1
+        coordinator.close()
+        assert len(coordinator._connections) == 0
+    print("✓ 300 request threads, no leaked connections")
+
+
+def test_registry_reopens_session_book():
+    """A session's book is reopened by a worker that did not load it"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        book_path = os.path.join(tmp_dir, 'book.txt')
+        with open(book_path, 'w', encoding='utf-8') as f:
+            f.write('Book.\n\n' + ' '.join(['word'] * 100))
+        worker_a = PipelineRegistry(cache_dir, coordinator=Coordinator(cache_dir))
+        worker_b = PipelineRegistry(cache_dir, coordinator=Coordinator(cache_dir))
+
+        wait_for_store(worker_a.open(book_path, 'alice')[0])
+        entry = worker_b.for_session('alice')
+        assert entry is not None and entry.filename == 'book.txt'
+        wait_for_store(entry)
+        # No session (e.g. a script without cookies): the book loaded last
+        assert worker_b.for_session('bob') is entry
+
+        worker_a.close(book_path)  # Deleted: no worker reopens it
+        worker_b.close_all()
+        assert worker_b.for_session('alice') is None
+        assert worker_b.for_session('bob') is None
+        worker_a.close_all()
+    print("✓ Session's book reopened in another worker")
+
+
+def test_replaced_book_dropped_by_other_workers():
+    """After one worker replaces a book's file, the others reopen it instead of serving the old text"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        book_path = os.path.join(tmp_dir, 'book.txt')
+        with open(book_path, 'w', encoding='utf-8') as f:
+            f.write('Old book.\n\n' + ' '.join(['old'] * 100))
+        worker_a = PipelineRegistry(cache_dir, coordinator=Coordinator(cache_dir))
+        worker_b = PipelineRegistry(cache_dir, coordinator=Coordinator(cache_dir))
+        wait_for_store(worker_a.open(book_path, 'alice')[0])
+        old_entry, _ = worker_b.open(book_path, 'bob')
+        assert worker_b.get(book_path) is old_entry
+        wait_for_store(old_entry)
+
+        # Upload in worker A: swap the file in, then close the book everywhere
+        with open(book_path + '.part', 'w', encoding='utf-8') as f:
+            f.write('New book.\n\n' + ' '.join(['new'] * 100))
+        os.replace(book_path + '.part', book_path)
+        worker_a.close(book_path)
+
+        assert worker_b.get(book_path) is None
+        entry = worker_b.for_session('bob')
+        assert entry is not None and entry is not old_entry
+        assert entry.pipeline.parser.extract_page(0).startswith('New book')
+        wait_for_store(entry)
+        assert worker_b.get(book_path) is entry  # Current now: not reopened again
+        worker_a.close_all()
+        worker_b.close_all()
+    print("✓ Replaced book reopened by the other worker")
+
+
+def test_upload_replaces_file_atomically():
+    """A re-upload swaps in a new file instead of truncating the one other workers have open"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The app opens its caches on import: keep them out of the working tree
+        cache_folder = os.environ.get('CACHE_FOLDER')
+        os.environ['CACHE_FOLDER'] = os.path.join(tmp_dir, 'cache')
+        try:
+            import app as server
+        finally:
+            if cache_folder is None:
+                del os.environ['CACHE_FOLDER']
+            else:
+                os.environ['CACHE_FOLDER'] = cache_folder
+
+        upload_folder = server.app.config['UPLOAD_FOLDER']
+        start_speculative = ProcessingPipeline.start_speculative
+        try:
+            server.app.config['UPLOAD_FOLDER'] = tmp_dir
+            # No speculative processing (it would call the translation API)
+            ProcessingPipeline.start_speculative = lambda self, *args, **kwargs: None
+            client = server.app.test_client()
+
+            def upload(text):
+                data = {'file': (io.BytesIO(text.encode('utf-8')), 'book.txt')}
+                response = client.post('/upload', data=data, content_type='multipart/form-data')
+                assert response.status_code == 200, response.get_json()
+
+            upload('First version.\n\n' + ' '.join(['one'] * 50))
+            book_path = os.path.join(tmp_dir, 'book.txt')
+            with open(book_path, 'rb') as old_file:
+                upload('Second version.\n\n' + ' '.join(['two'] * 50))
+                # The old inode is intact for whoever still reads it
+                assert old_file.read().startswith(b'First version.')
+            with open(book_path, 'rb') as f:
+                assert f.read().startswith(b'Second version.')
+            assert sorted(os.listdir(tmp_dir)) == ['book.txt', 'cache']
+        finally:
+            server.registry.close_all()
+            server.coordinator.close()
+            ProcessingPipeline.start_speculative = start_speculative
+            server.app.config['UPLOAD_FOLDER'] = upload_folder
+    print("✓ Re-upload replaced the file atomically")
+
+
+def _serve_pages(book_path, cache_dir, log_path, pages):
+    """Worker process: request pages with faked translation and audio, logging every API call"""
+    pipeline = ProcessingPipeline(book_path, cache_dir, coordinator=Coordinator(cache_dir, poll_interval=0.02))
+
+    def log(line):
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def fake_translate(text, retry_count=3):
+        log('translate')
+        return text.upper()
+
+    def fake_synthesize(text, cache_key, audio_path):
+        log('tts')
+        time.sleep(0.2)
+        with open(audio_path, 'wb') as f:
+            f.write(b'\xff\xf3' + b'\x00' * 100)
+        return audio_path
+
+    pipeline.translator._translate_single = fake_translate
+    pipeline.tts._synthesize = fake_synthesize
+    for page_num in pages:
+        assert pipeline.get_page(page_num)['status'] == 'completed'
+    pipeline.cleanup()
+
+
+def test_workers_never_duplicate_a_page():
+    """Two processes asking for the same pages process each page once"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        book_path = os.path.join(tmp_dir, 'book.txt')
+        with open(book_path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(f'Page {i} starts here. ' + ' '.join(['word'] * 200) + '.' for i in range(4)))
+        log_path = os.path.join(tmp_dir, 'calls.log')
+        Coordinator(cache_dir).close()  # Create the db before the workers start
+
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_serve_pages, args=(book_path, cache_dir, log_path, [0, 1, 2]))
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+        assert all(worker.exitcode == 0 for worker in workers)
+
+        with open(log_path, 'r', encoding='utf-8') as f:
+            calls = f.read().split()
+        assert calls.count('tts') == 3
+        parser, coordinator = BookParser(book_path, cache_dir), Coordinator(cache_dir)
+        assert coordinator.page_counts(parser.book_hash()) == {'running': 0, 'done': 3, 'failed': 0}
+        coordinator.close()
+        parser.close()
+    print(f"✓ 2 workers x 3 pages: {calls.count('tts')} audio and {calls.count('translate')} translation calls")
+
+
+if __name__ == '__main__':
+    test_sessions_and_secret_key_shared()
+    test_page_claims()
+    test_claims_renewed_while_running()
+    test_short_lived_threads_release_connections()
+    test_registry_reopens_session_book()
+    test_replaced_book_dropped_by_other_workers()
+    test_upload_replaces_file_atomically()
+    test_workers_never_duplicate_a_page()
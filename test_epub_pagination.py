@@ -0,0 +1,110 @@
+"""
+Test EPUB chapter pagination and the chapter map
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from ebooklib import epub
+
+from parser import BookParser
+from txt_paginator import FAST_START_WORDS, MAX_WORDS_PER_PAGE
+
+
+CHAPTERS = [
+    ('Chapter One', 1500),  # Long: split into several pages
+    ('Chapter Two', 30),    # Short: one page
+    ('Chapter Three', 900),
+]
+
+
+def write_epub(path):
+    """EPUB with one XHTML file per chapter, all listed in the table of contents"""
+    book = epub.EpubBook()
+    book.set_identifier('test-book')
+    book.set_title('Test Book')
+    book.set_language('en')
+
+    items = []
+    for num, (title, words) in enumerate(CHAPTERS, start=1):
+        sentences = [f'Sentence {i} of chapter {num} has a few more words.' for i in range(words // 10)]
+        paragraphs = [' '.join(sentences[i:i + 8]) for i in range(0, len(sentences), 8)]
+        chapter = epub.EpubHtml(title=title, file_name=f'chap{num}.xhtml', lang='en')
+        chapter.content = f'<h1>{title}</h1>' + ''.join(f'<p>{p}</p>' for p in paragraphs)
+        book.add_item(chapter)
+        items.append(chapter)
+
+    book.toc = [epub.Link(item.file_name, item.title, f'c{num}') for num, item in enumerate(items, start=1)]
+    book.add_item(epub.EpubNcx())
+    book.spine = items
+    epub.write_epub(path, book)
+
+
+def test_long_chapters_split_into_pages():
+    """Chapters are split into pages of at most ~250 words, after small fast-start pages"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'book.epub')
+        write_epub(path)
+        parser = BookParser(path)
+        chapters = parser.get_chapters()
+        first = chapters[0]
+        assert first['page_count'] > 1500 // MAX_WORDS_PER_PAGE
+
+        counts = [len(parser.extract_page(page).split())
+                  for page in range(first['start_page'], first['start_page'] + first['page_count'])]
+        assert all(0 < count <= MAX_WORDS_PER_PAGE for count in counts)
+        assert counts[0] <= FAST_START_WORDS[0] + 20
+        # Full pages past the fast start are close to the budget
+        assert all(count >= MAX_WORDS_PER_PAGE * 0.8 for count in counts[len(FAST_START_WORDS):-1])
+        assert sum(counts) >= 1500
+        parser.close()
+    print(f"✓ 1500-word chapter split into {len(counts)} pages: {counts}")
+
+
+def test_chapter_map():
+    """get_chapters() maps TOC titles to each chapter's first page"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'book.epub')
+        write_epub(path)
+        parser = BookParser(path)
+        chapters = [chapter for chapter in parser.get_chapters() if chapter['title']]
+        assert [chapter['title'] for chapter in chapters] == [title for title, _ in CHAPTERS]
+
+        all_chapters = parser.get_chapters()
+        for chapter, following in zip(all_chapters, all_chapters[1:]):
+            assert following['start_page'] == chapter['start_page'] + chapter['page_count']
+        assert sum(chapter['page_count'] for chapter in all_chapters) == parser.get_total_pages()
+
+        for chapter in chapters:
+            assert parser.extract_page(chapter['start_page']).startswith(chapter['title'])
+        assert chapters[1]['page_count'] == 1
+        parser.close()
+    print(f"✓ Chapter map: {[(c['title'], c['start_page']) for c in chapters]}")
+
+
+def test_chapter_map_survives_text_store():
+    """A reload served from the page store keeps the same pages and chapter map"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'book.epub')
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        write_epub(path)
+        parser = BookParser(path, cache_dir)
+        chapters = parser.get_chapters()
+        pages = [parser.extract_page(i) for i in range(parser.get_total_pages())]
+        parser.build_text_store()
+        parser.close()
+
+        reloaded = BookParser(path, cache_dir)
+        assert reloaded.has_text_store()
+        assert reloaded.get_chapters() == chapters
+        assert reloaded.get_total_pages() == len(pages)
+        assert [reloaded.extract_page(i) for i in range(len(pages))] == pages
+        reloaded.close()
+    print(f"✓ {len(chapters)} chapters and {len(pages)} pages restored from the page store")
+
+
+if __name__ == '__main__':
+    test_long_chapters_split_into_pages()
+    test_chapter_map()
+    test_chapter_map_survives_text_store()
@@ -0,0 +1,203 @@
+"""
+Test fair sharing of API quota between listeners
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from fair_share import FairQueue, LatencyTracker, Work, current_work, submit_with_context, work_context
+from fake_pipeline import make_pipeline, write_book
+from pipeline import ProcessingPipeline
+
+
+def _run_waiters(queue, works, hold=0.01, promote=()):
+    """
+    Start one thread per Work while a holder blocks the queue; return the order turns were granted
+
+    Works in promote are switched to on-demand once every waiter is queued.
+    """
+    order = []
+    release = threading.Event()
+    entered = threading.Event()
+
+    def holder():
+        with queue.turn(Work('holder')):
+            entered.set()
+            release.wait()
+
+    def waiter(name, work):
+        with queue.turn(work):
+            order.append(name)
+            time.sleep(hold)
+
+    first = threading.Thread(target=holder)
+    first.start()
+    entered.wait()
+    threads = []
+    for name, work in works:
+        thread = threading.Thread(target=waiter, args=(name, work))
+        thread.start()
+        threads.append(thread)
+        # Let each waiter enqueue before the next, so arrival order is known
+        while sum(queue.waiting()) < len(threads):
+            time.sleep(0.001)
+    for work in promote:
+        work.on_demand = True
+    release.set()
+    for thread in [first] + threads:
+        thread.join()
+    return order
+
+
+def test_on_demand_goes_first():
+    """A listener's page jumps ahead of queued prefetch"""
+    queue = FairQueue()
+    order = _run_waiters(queue, [
+        ('prefetch-1', Work('a', on_demand=False)),
+        ('prefetch-2', Work('a', on_demand=False)),
+        ('listener', Work('b', on_demand=True)),
+    ])
+    assert order[0] == 'listener'
+    assert order[1:] == ['prefetch-1', 'prefetch-2']
+    assert queue.waiting() == (0, 0)
+    print("✓ On-demand work served before prefetch")
+
+
+def test_promoted_waiter_goes_first():
+    """Prefetch work a listener starts waiting for jumps ahead of the other prefetch"""
+    queue = FairQueue()
+    promoted = Work('b', on_demand=False)
+    order = _run_waiters(queue, [
+        ('prefetch-a', Work('a', on_demand=False)),
+        ('prefetch-b', promoted),
+    ], promote=[promoted])
+    assert order == ['prefetch-b', 'prefetch-a']
+    assert queue.waiting() == (0, 0)
+    print("✓ Promoted prefetch served as on-demand")
+
+
+def test_prefetch_round_robin_between_books():
+    """One book's long prefetch queue cannot starve another book"""
+    queue = FairQueue()
+    works = [(f'a{i}', Work('a', on_demand=False)) for i in range(4)]
+    works += [(f'b{i}', Work('b', on_demand=False)) for i in range(2)]
+    order = _run_waiters(queue, works)
+    assert order[:4] == ['a0', 'b0', 'a1', 'b1']
+    assert order[4:] == ['a2', 'a3']
+
+    # A book with two listeners gets twice the turns
+    queue = FairQueue()
+    works = [(f'a{i}', Work('a', on_demand=False, weight=2)) for i in range(4)]
+    works += [(f'b{i}', Work('b', on_demand=False)) for i in range(2)]
+    order = _run_waiters(queue, works)
+    assert [name[0] for name in order[:3]].count('a') == 2
+    assert [name[0] for name in order[:6]].count('b') == 2
+    print("✓ Prefetch shared round-robin between books, weighted by listeners")
+
+
+def test_work_context_propagation():
+    """Prefetch class is inherited by nested contexts and by executor tasks"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    assert current_work().on_demand
+    with work_context('book', on_demand=False):
+        with work_context('book', weight=3):
+            assert not current_work().on_demand
+            assert current_work().weight == 3
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert not submit_with_context(pool, lambda: current_work().on_demand).result()
+            assert pool.submit(lambda: current_work().on_demand).result()
+    assert current_work().on_demand
+    print("✓ Work context propagates to nested blocks and pool tasks")
+
+
+def test_latency_percentiles():
+    """p50/p95 per key and overall"""
+    tracker = LatencyTracker(window=100)
+    for i in range(1, 101):
+        tracker.record('s1', i / 100)
+    tracker.record('s2', 5.0)
+    summary = tracker.summary()
+    assert summary['keys']['s1'] == {'count': 100, 'p50': 0.5, 'p95': 0.95}
+    assert summary['keys']['s2']['p95'] == 5.0
+    assert summary['overall']['count'] == 101
+    assert LatencyTracker.percentile([], 95) is None
+    tracker.forget('s2')
+    assert 's2' not in tracker.summary()['keys']
+    print("✓ Latency percentiles per session")
+
+
+def test_prefetch_cap():
+    """A book never has more than prefetch_cap pages queued ahead, even as prefetch adapts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        book_path = write_book(tmp_dir, 10)
+        runs = []
+        pipeline = make_pipeline(book_path, runs=runs, tts_delay=0.05, prefetch_count=2, prefetch_cap=2)
+
+        pipeline.get_page_with_prefetch(0)
+        status = pipeline.get_status()
+        assert status['prefetch_cap'] == 2
+        assert status['prefetch_outstanding'] <= 2
+        time.sleep(0.5)
+        assert sorted(runs) == [0, 1, 2]
+
+        # Slow pages ask for a deeper window; adaptive depth stays within the cap
+        pipeline._record_timing(30.0, 1.0)
+        assert pipeline.prefetch_count == 2
+        pipeline.cleanup()
+
+        # An explicit prefetch_count is never silently cut by a smaller cap
+        try:
+            ProcessingPipeline(book_path, os.path.join(tmp_dir, 'cache'), prefetch_count=12, prefetch_cap=2)
+            assert False, "prefetch_count above prefetch_cap accepted"
+        except ValueError:
+            pass
+    print("✓ Prefetch capped per book")
+
+
+def test_prefetch_page_promoted_when_requested():
+    """A prefetched page's remaining API calls become on-demand once a listener waits for it"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(write_book(tmp_dir, 4), prefetch_count=1)
+        classes = []
+        in_tts = threading.Event()
+        listener_waiting = threading.Event()
+
+        def fake_audio(text, page_num=None):
+            # Two TTS requests: one before the listener asks for the page, one after
+            classes.append(current_work().on_demand)
+            in_tts.set()
+            listener_waiting.wait(5)
+            classes.append(current_work().on_demand)
+            return os.path.join(tmp_dir, f'{page_num}.mp3')
+
+        pipeline.tts.generate_audio = fake_audio
+        pipeline.prefetch_pages(1)
+        assert in_tts.wait(5)
+        listener = threading.Thread(target=pipeline.get_page, args=(1,))
+        listener.start()
+        while 1 not in pipeline.expedited:
+            time.sleep(0.01)
+        listener_waiting.set()
+        listener.join(5)
+        assert classes == [False, True]
+        # The stage forgets the page's Work just after the listener is woken
+        deadline = time.monotonic() + 5
+        while pipeline.page_work and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not pipeline.expedited and not pipeline.page_work
+        pipeline.cleanup()
+    print("✓ Prefetched page promoted to on-demand when requested")
+
+
+if __name__ == '__main__':
+    test_on_demand_goes_first()
+    test_promoted_waiter_goes_first()
+    test_prefetch_round_robin_between_books()
+    test_work_context_propagation()
+    test_latency_percentiles()
+    test_prefetch_cap()
+    test_prefetch_page_promoted_when_requested()
@@ -0,0 +1,54 @@
+"""
+Test fast EPUB chapter text extraction
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from html_text import extract_text
+
+
+CHAPTER = b"""<?xml version="1.0" encoding="utf-8"?>
+<html><head><title>Chapter 1</title>
+<style>p { margin: 0 }</style>
+<script>if (a < b) { go(); }</script></head>
+<body><!-- note -->
+<h1>The Boy</h1>
+<p class="x" title="a > b">His name was <em>Santiago</em>. Dusk&nbsp;was falling &amp; the sheep slept.</p>
+<p>Second
+   paragraph.</p>
+</body></html>"""
+
+
+def test_blocks_and_skipped_content():
+    """Block elements become paragraphs; script, style and comments are dropped"""
+    text = extract_text(CHAPTER)
+    print(text)
+    assert text.split('\n\n') == [
+        'Chapter 1',
+        'The Boy',
+        'His name was Santiago. Dusk was falling & the sheep slept.',
+        'Second paragraph.',
+    ]
+    print("✓ Paragraph breaks kept, script/style skipped")
+
+
+def test_matches_beautifulsoup():
+    """Same characters as BeautifulSoup's get_text(), ignoring whitespace"""
+    fast = extract_text(CHAPTER)
+    soup = extract_text(CHAPTER, engine='bs4')
+    assert ''.join(fast.split()) == ''.join(soup.split())
+    print("✓ Output equivalent to BeautifulSoup")
+
+
+def test_non_utf8_falls_back():
+    """Markup that is not UTF-8 is handled by BeautifulSoup"""
+    text = extract_text('<p>Café</p>'.encode('latin-1'))
+    assert text.startswith('Caf')
+    print("✓ Non-UTF-8 input falls back to BeautifulSoup")
+
+
+if __name__ == '__main__':
+    test_blocks_and_skipped_content()
+    test_matches_beautifulsoup()
+    test_non_utf8_falls_back()
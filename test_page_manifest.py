@@ -0,0 +1,76 @@
+"""
+Test the durable per-book page manifest
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from page_manifest import ENTRY_COMPLETED, ENTRY_FAILED, PageManifest
+
+
+def test_replay_after_restart():
+    """Entries survive a reopen; the last entry for a page wins and a torn line is skipped"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manifest = PageManifest(cache_dir, 'book')
+        manifest.load()
+        manifest.record(0, ENTRY_FAILED, error='boom')
+        manifest.record(0, ENTRY_COMPLETED, text_hash='t0', audio_key='a0', audio_duration=3.5)
+        manifest.record(1, ENTRY_COMPLETED, text_hash='t1', audio_key='a1', audio_duration=4.0)
+        manifest.record(2, ENTRY_FAILED, error='boom')
+        manifest.close()
+        with open(manifest.path, 'a', encoding='utf-8') as f:
+            f.write('{"page": 3, "status": "comp')  # Crash mid-write
+
+        manifest = PageManifest(cache_dir, 'book')
+        assert manifest.load() == 3
+        assert manifest.get(0)['audio_duration'] == 3.5
+        assert manifest.pages() == [0, 1]
+        assert manifest.pages(ENTRY_FAILED) == [2]
+        assert manifest.get(3) is None
+        manifest.close()
+    print("✓ Manifest replayed after restart")
+
+
+def test_compaction():
+    """Superseded lines are dropped when the log is reloaded"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manifest = PageManifest(cache_dir, 'book')
+        for _ in range(5):
+            manifest.record(0, ENTRY_COMPLETED, text_hash='t0')
+        manifest.close()
+
+        manifest = PageManifest(cache_dir, 'book')
+        assert manifest.load() == 1
+        with open(manifest.path, encoding='utf-8') as f:
+            assert len(f.readlines()) == 1
+        assert manifest.get(0)['text_hash'] == 't0'
+    print("✓ Manifest compacted on load")
+
+
+def test_compaction_by_another_process():
+    """Records appended after another process compacts the log are not lost"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        writer = PageManifest(cache_dir, 'book')
+        for _ in range(5):
+            writer.record(0, ENTRY_COMPLETED, text_hash='t0')
+
+        # Another worker opens the book and compacts the shared log
+        other = PageManifest(cache_dir, 'book')
+        assert other.load() == 1
+        writer.record(1, ENTRY_COMPLETED, text_hash='t1')
+        other.record(2, ENTRY_COMPLETED, text_hash='t2')
+        writer.close()
+        other.close()
+
+        reloaded = PageManifest(cache_dir, 'book')
+        assert reloaded.load() == 3
+        assert reloaded.get(1)['text_hash'] == 't1'
+        reloaded.close()
+    print("✓ Appends survive another process's compaction")
+
+
+if __name__ == '__main__':
+    test_replay_after_restart()
+    test_compaction()
+    test_compaction_by_another_process()
@@ -7,6 +7,18 @@ import time
 
 BASE_URL = 'http://localhost:5000'
 
+def wait_for_page_count(timeout=30):
+    """Poll /status until the server has counted the book's pages (None on timeout or failure)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = requests.get(f'{BASE_URL}/status', timeout=10).json()
+        if data.get('total_pages') is not None:
+            return data['total_pages']
+        if data.get('indexing') == 'failed':
+            return None
+        time.sleep(0.5)
+    return None
+
 def test_txt_upload_and_processing():
     """Test TXT file upload and verify pagination"""
     
@@ -52,11 +64,16 @@ will be automatically split into manageable chunks.
         
         if response.status_code == 200:
             data = response.json()
-            total_pages = data.get('total_pages', 0)
+            total_pages = data.get('total_pages')
             print(f"\n✓ Upload successful!")
+            if total_pages is None:
+                # Still indexing in the background
+                total_pages = wait_for_page_count()
             print(f"  Total pages created: {total_pages}")
             
-            if total_pages > 1:
+            if total_pages is None:
+                print(f"  ⚠️  Page count not known yet")
+            elif total_pages > 1:
                 print(f"  ✓ Text correctly split into multiple pages")
             else:
                 print(f"  ⚠️  Only 1 page created (expected 2+)")
@@ -0,0 +1,103 @@
+"""
+Test shared token-bucket rate limiter
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from rate_limiter import TokenBucket, configured_limit, get_limiter
+import tts
+
+
+def test_rate_is_enforced():
+    """After the burst is spent, acquisitions are paced at the configured rate"""
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(25):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    print(f"25 tokens in {elapsed:.2f}s")
+    assert 0.35 <= elapsed < 1.0  # (25 - 5) / 50 = 0.4s
+    print("✓ Rate enforced after burst")
+
+
+def test_shared_across_threads():
+    """Concurrent callers share one budget"""
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    def worker():
+        for _ in range(10):
+            bucket.acquire()
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    assert elapsed >= 0.35  # 39 tokens beyond the burst at 100/s
+    print(f"✓ 40 tokens across 4 threads in {elapsed:.2f}s")
+
+
+def test_registry_returns_same_limiter():
+    """Every service in the process gets the same bucket per API"""
+    os.environ['EXAMPLE_RATE_LIMIT'] = '7'
+    limiter = get_limiter('example')
+    assert limiter is get_limiter('example')
+    assert limiter.rate == 7.0
+    print("✓ Process-wide limiter configured from environment")
+
+
+def test_typical_page_wait():
+    """A 250-word Hindi page waits a few seconds for TTS tokens, locally and on Render"""
+    sentence = 'लड़का शाम को गाँव पहुँचा और उसने रात पुराने पेड़ के नीचे बिताई जहाँ उसकी भेड़ें आराम से सो रही थीं।'
+    page = ' '.join([sentence] * 13)  # About 250 words
+    chunks = len(tts._tokenize(page))
+    assert 10 <= chunks <= 20
+
+    render = os.environ.pop('RENDER', None)
+    try:
+        local_rate, burst = configured_limit('tts')
+        os.environ['RENDER'] = 'true'
+        render_rate, _ = configured_limit('tts')
+    finally:
+        os.environ.pop('RENDER')
+        if render is not None:
+            os.environ['RENDER'] = render
+    # A fresh bucket covers `burst` chunks; the rest are paced
+    assert (chunks - burst) / local_rate <= 3
+    assert (chunks - burst) / render_rate <= 7
+
+    class FakeGTTS:
+        GOOGLE_TTS_MAX_CHARS = tts.gTTS.GOOGLE_TTS_MAX_CHARS
+
+        def __init__(self, text, **kwargs):
+            pass
+
+        def write_to_fp(self, fp):
+            fp.write(b'audio')
+
+    real_gtts = tts.gTTS
+    tts.gTTS = FakeGTTS
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            engine = tts.TTSEngine(cache_dir)
+            engine.limiter = TokenBucket(local_rate, burst, fair=True)
+            start = time.monotonic()
+            engine.generate_audio(page)
+            elapsed = time.monotonic() - start
+    finally:
+        tts.gTTS = real_gtts
+    assert elapsed <= 3.5
+    print(f"✓ Typical page ({chunks} TTS chunks) waited {elapsed:.1f}s locally")
+
+
+if __name__ == '__main__':
+    test_rate_is_enforced()
+    test_shared_across_threads()
+    test_registry_returns_same_limiter()
+    test_typical_page_wait()
@@ -0,0 +1,82 @@
+"""
+Test the multi-book pipeline registry
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from registry import PipelineRegistry
+
+
+def write_books(tmp_dir, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(tmp_dir, f'book{i}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'Book {i}.\n\n' + ' '.join(['word'] * 100))
+        paths.append(path)
+    return paths
+
+
+def test_reopen_keeps_pipeline_and_lru_eviction():
+    """An open book is reused; the least recently used book is closed past max_books"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        books = write_books(tmp_dir, 3)
+        registry = PipelineRegistry(os.path.join(tmp_dir, 'cache'), max_books=2)
+        first, created = registry.open(books[0], 'alice')
+        assert created
+        assert registry.open(books[0], 'bob') == (first, False)
+        registry.open(books[1], 'carol')
+        registry.get(books[0])  # book0 is now more recent than book1
+        registry.open(books[2], 'dave')
+        assert len(registry) == 2
+        assert registry.get(books[1]) is None
+        assert registry.for_session('carol') is None
+        assert registry.for_session('alice') is first
+        registry.close_all()
+    print("✓ Open books reused, LRU book closed")
+
+
+def test_idle_and_memory_eviction():
+    """Idle books and books over the memory budget are closed, never the one being opened"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        books = write_books(tmp_dir, 3)
+        registry = PipelineRegistry(os.path.join(tmp_dir, 'cache'), max_books=5,
+                                    idle_timeout=60, memory_budget=10_000)
+        old, _ = registry.open(books[0])
+        old.last_used -= 120
+        registry.open(books[1])
+        assert registry.get(books[0]) is None
+
+        big, _ = registry.open(books[1])
+        big.pipeline.processed_pages[0] = {'original_text': 'x' * 5000, 'translated_text': ''}
+        registry.open(books[2])
+        assert registry.get(books[1]) is None and registry.get(books[2]) is not None
+        registry.close_all()
+    print("✓ Idle and over-budget books closed")
+
+
+def test_sessionless_client_gets_latest_book():
+    """A client without a session uses the book a session loaded last"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        books = write_books(tmp_dir, 2)
+        registry = PipelineRegistry(os.path.join(tmp_dir, 'cache'))
+        assert registry.for_session('script') is None
+        registry.open(books[0], 'alice')
+        second, _ = registry.open(books[1], 'bob')
+        registry.open(books[0])  # Book-scoped request: not a session's pick
+        assert registry.for_session('script') is second
+        assert registry.for_session('alice').filename == 'book0.txt'
+
+        registry.close(books[1])  # Deleted
+        assert registry.for_session('script') is None
+        registry.close_all()
+    print("✓ Sessionless client gets the latest book")
+
+
+if __name__ == '__main__':
+    test_reopen_keeps_pipeline_and_lru_eviction()
+    test_idle_and_memory_eviction()
+    test_sessionless_client_gets_latest_book()
@@ -0,0 +1,141 @@
+"""
+Test the resumable whole-book render job (API calls are faked)
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from fake_pipeline import make_pipeline, write_book
+from render_job import RENDER_DONE, RENDER_PAUSED, RenderJob
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.02)
+
+
+def test_render_whole_book_then_skip_on_restart():
+    """Every page is rendered once; a restarted job finds nothing left to do"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = []
+        pipeline = make_pipeline(write_book(tmp_dir, numbered=True), runs=runs, audio_bytes=64)
+        job = RenderJob(pipeline)
+        assert job.start()
+        wait_for(lambda: job.get_status()['state'] == RENDER_DONE)
+        total = job.get_status()['total_pages']
+        assert sorted(runs) == list(range(total))
+        with open(job.checkpoint_path, encoding='utf-8') as f:
+            assert json.load(f)['completed'] == total
+        job.stop()
+        pipeline.cleanup()
+
+        runs = []
+        pipeline = make_pipeline(write_book(tmp_dir, numbered=True), runs=runs, audio_bytes=64)
+        job = RenderJob(pipeline)
+        job.start()
+        wait_for(lambda: job.get_status()['state'] == RENDER_DONE)
+        assert runs == [] and job.get_status()['completed'] == total
+        job.stop()
+        pipeline.cleanup()
+    print(f"✓ {total} pages rendered once")
+
+
+def test_pause_and_auto_resume():
+    """A paused job stops taking pages; a job interrupted while running resumes on the next load"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = []
+        pipeline = make_pipeline(write_book(tmp_dir, numbered=True), runs=runs, tts_delay=0.05, audio_bytes=64)
+        job = RenderJob(pipeline, workers=1)
+        job.start()
+        wait_for(lambda: runs)
+        job.pause()
+        assert job.get_status()['state'] == RENDER_PAUSED
+        time.sleep(0.15)
+        done_while_paused = len(runs)
+        time.sleep(0.15)
+        assert len(runs) == done_while_paused
+        job.resume()
+        wait_for(lambda: len(runs) > done_while_paused)
+
+        # Simulate a crash while running: the checkpoint still says running
+        job.stop()
+        pipeline.cleanup()
+        runs_before = set(runs)
+
+        runs = []
+        pipeline = make_pipeline(write_book(tmp_dir, numbered=True), runs=runs, audio_bytes=64)
+        job = RenderJob(pipeline)
+        job.auto_resume()
+        wait_for(lambda: job.get_status()['state'] == RENDER_DONE)
+        total = job.get_status()['total_pages']
+        assert not runs_before & set(runs)
+        assert job.get_status()['completed'] == total
+        job.stop()
+        pipeline.cleanup()
+    print("✓ Paused, resumed and auto-resumed")
+
+
+def test_render_packs_translations():
+    """Each worker translates its batch of pages in packed requests instead of one request per page"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        requests = []
+
+        def fake_translate(text, retry_count=3):
+            requests.append(text)
+            return text.upper()
+
+        pipeline = make_pipeline(write_book(tmp_dir, 16, numbered=True), translate=fake_translate, audio_bytes=64)
+        job = RenderJob(pipeline, workers=1, batch_pages=8)
+        job.start()
+        wait_for(lambda: job.get_status()['state'] == RENDER_DONE)
+        total = job.get_status()['total_pages']
+        assert job.get_status()['completed'] == total
+        assert len(requests) < total // 2  # Page by page would take one request per page
+        assert all(pipeline.get_page(i)['translated_text'].startswith(f'PARAGRAPH {i}.') for i in range(total))
+        job.stop()
+        pipeline.cleanup()
+    print(f"✓ {total} pages translated in {len(requests)} requests")
+
+
+def test_render_memory_stays_bounded():
+    """Rendered pages are released from memory, except the ones near the reader"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = []
+        pipeline = make_pipeline(write_book(tmp_dir, 30, numbered=True), runs=runs, audio_bytes=20_000)
+        pipeline.get_page(0)
+        page_bytes = pipeline.memory_usage()
+
+        job = RenderJob(pipeline)
+        peak = 0
+        job.start()
+        while job.get_status()['state'] != RENDER_DONE:
+            peak = max(peak, pipeline.memory_usage())
+            time.sleep(0.005)
+        total = job.get_status()['total_pages']
+        assert total >= 30
+
+        # Pages 0..prefetch_count stay; the rest are released as they finish
+        kept = pipeline.prefetch_count + 1
+        assert peak <= (kept + job.workers + 1) * page_bytes * 1.5
+        assert len(pipeline.processed_pages) <= kept
+        assert pipeline.memory_usage() <= kept * page_bytes * 1.5
+
+        # A released page is served from disk without rendering it again
+        runs_before = len(runs)
+        assert pipeline.get_page(total - 1)['status'] == 'completed'
+        assert len(runs) == runs_before
+        job.stop()
+        pipeline.cleanup()
+    print(f"✓ {total}-page render peaked at {peak // 1024} KiB in memory")
+
+
+if __name__ == '__main__':
+    test_render_whole_book_then_skip_on_restart()
+    test_pause_and_auto_resume()
+    test_render_packs_translations()
+    test_render_memory_stays_bounded()
@@ -0,0 +1,57 @@
+"""
+Test priority page scheduler
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from scheduler import PageScheduler
+
+
+def test_priority_order_and_reprioritize():
+    """Pages run nearest-first; resubmitting changes priority without duplicating"""
+    ran = []
+    gate = threading.Event()
+
+    def handler(page_num):
+        gate.wait()
+        ran.append(page_num)
+
+    scheduler = PageScheduler(handler, workers=1)
+    scheduler.submit(100, 0)  # Occupies the worker until the gate opens
+    time.sleep(0.05)
+    for page_num, priority in ((5, 3), (6, 4), (7, 1), (5, 0)):
+        scheduler.submit(page_num, priority)
+    assert scheduler.queued() == [5, 7, 6]
+    gate.set()
+    time.sleep(0.1)
+    assert ran == [100, 5, 7, 6]
+    scheduler.shutdown(wait=True)
+    print("✓ Nearest pages first, no duplicates")
+
+
+def test_cancel_and_bound():
+    """Seeking cancels stale pages; the queue never grows past max_queued"""
+    dropped = []
+    gate = threading.Event()
+    scheduler = PageScheduler(lambda page_num: gate.wait(), workers=1, max_queued=3,
+                              on_drop=dropped.append)
+    scheduler.submit(0, 0)
+    time.sleep(0.05)
+    for page_num in (4, 5, 6):
+        scheduler.submit(page_num, page_num - 4)
+    assert scheduler.cancel_where(lambda page_num: page_num < 200) == [4, 5, 6]
+    for page_num in range(200, 210):
+        scheduler.submit(page_num, page_num - 200)
+    assert scheduler.queued() == [200, 201, 202]
+    assert dropped[:3] == [4, 5, 6] and len(dropped) == 10
+    gate.set()
+    scheduler.shutdown(wait=True)
+    print("✓ Stale pages cancelled, queue bounded")
+
+
+if __name__ == '__main__':
+    test_priority_order_and_reprioritize()
+    test_cancel_and_bound()
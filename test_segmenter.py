@@ -0,0 +1,49 @@
+"""
+Test shared sentence segmenter
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from segmenter import chunk_text, iter_sentence_spans, split_sentences
+
+
+def test_sentence_boundaries():
+    """Abbreviations, initials and lowercase continuations do not end sentences"""
+    text = 'Mr. Smith met J. K. Rowling at 5 p.m. today. "Was it fun?" she asked!  यह ठीक है। Done'
+    sentences = split_sentences(text)
+    print(sentences)
+    assert sentences == [
+        'Mr. Smith met J. K. Rowling at 5 p.m. today.',
+        '"Was it fun?" she asked!',
+        'यह ठीक है।',
+        'Done',
+    ]
+    for start, end in iter_sentence_spans(text):
+        assert text[start:end] == text[start:end].strip()
+    print("✓ Sentence spans are correct")
+
+
+def test_chunks_break_at_sentences():
+    """Chunks stay under the limit and only break between sentences when possible"""
+    text = ' '.join(['This is sentence number %d.' % i for i in range(200)])
+    chunks = chunk_text(text, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith('.') for chunk in chunks)
+    assert ' '.join(chunks) == text
+    print(f"✓ {len(chunks)} sentence-aligned chunks")
+
+
+def test_long_sentence_is_split():
+    """A sentence longer than the limit falls back to clause and word breaks"""
+    text = ', '.join(['clause with several words'] * 40) + '.'
+    chunks = chunk_text(text, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert ''.join(''.join(chunks).split()) == ''.join(text.split())
+    print(f"✓ Long sentence split into {len(chunks)} chunks")
+
+
+if __name__ == '__main__':
+    test_sentence_boundaries()
+    test_chunks_break_at_sentences()
+    test_long_sentence_is_split()
@@ -0,0 +1,79 @@
+"""
+Test single-flight coalescing of identical translation and TTS work
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from single_flight import SingleFlight
+from translator import TranslationService
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers for the same key wait on the leader; errors reach every waiter"""
+    flight = SingleFlight()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return value * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', work, 21)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [21]
+    assert results == [42] * 5
+    assert len(flight) == 0
+
+    def fail():
+        raise ValueError('boom')
+
+    try:
+        flight.do('k', fail)
+        assert False, 'error not raised'
+    except ValueError:
+        pass
+    assert len(flight) == 0
+    print("✓ 5 callers, 1 call; errors propagate and release the key")
+
+
+def test_same_page_translated_once():
+    """Two services (two users, or get_page + prefetch) translating one page make one request"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+
+        def fake_translate(text, retry_count=3):
+            requests_made.append(text)
+            time.sleep(0.1)
+            return text.upper()
+
+        services = [TranslationService(cache_dir) for _ in range(2)]
+        for service in services:
+            service._translate_single = fake_translate
+
+        page = 'The boy arrived at dusk. He slept under the sycamore.'
+        results = []
+        threads = [threading.Thread(target=lambda s=service: results.append(s.translate(page)))
+                   for service in services]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [page.upper()] * 2
+        assert len(requests_made) == 1
+        for service in services:
+            service.close()
+    print("✓ Concurrent translations of one page coalesced")
+
+
+if __name__ == '__main__':
+    test_concurrent_callers_share_one_call()
+    test_same_page_translated_once()
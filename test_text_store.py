@@ -0,0 +1,68 @@
+"""
+Test persisted page text store
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from parser import BookParser
+
+
+def _write_book(path, paragraph, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join([paragraph] * count))
+
+
+def test_store_round_trip():
+    """Stored pages match freshly parsed pages and survive a reload"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        book = os.path.join(work_dir, 'store_test.txt')
+        cache_dir = os.path.join(work_dir, 'cache')
+        _write_book(book, ' '.join(['This is a test sentence with multiple words.'] * 60), 4)
+
+        expected = [page['text'] for page in BookParser(book).extract_all_pages()]
+
+        parser = BookParser(book, cache_dir)
+        assert not parser.has_text_store()
+        parser.build_text_store()
+        assert parser.has_text_store()
+        parser.close()
+
+        reloaded = BookParser(book, cache_dir)
+        assert reloaded.has_text_store()
+        assert reloaded.get_total_pages() == len(expected)
+        assert [reloaded.extract_page(i) for i in range(len(expected))] == expected
+        reloaded.close()
+        print(f"✓ {len(expected)} pages served from store")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def test_store_invalidated_on_change():
+    """Editing the book file stops the old store from being used"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        book = os.path.join(work_dir, 'store_change.txt')
+        cache_dir = os.path.join(work_dir, 'cache')
+        _write_book(book, 'Original paragraph text.', 3)
+
+        parser = BookParser(book, cache_dir)
+        parser.build_text_store()
+        parser.close()
+
+        _write_book(book, 'Edited paragraph text.', 3)
+        edited = BookParser(book, cache_dir)
+        assert not edited.has_text_store()
+        assert 'Edited' in edited.extract_page(0)
+        edited.close()
+        print("✓ Store invalidated after file change")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    test_store_round_trip()
+    test_store_invalidated_on_change()
@@ -0,0 +1,95 @@
+"""
+Test SQLite translation cache
+"""
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from translation_cache import TranslationCache
+
+
+def test_write_behind_and_persistence():
+    """Pending writes are readable at once and survive a reopen after close"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TranslationCache(cache_dir, flush_size=10, flush_interval=60)
+        cache.put('a', 'नमस्ते')
+        assert cache.get('a') == 'नमस्ते'
+        assert cache.get('missing') is None
+        cache.close()
+
+        cache = TranslationCache(cache_dir)
+        assert cache.get('a') == 'नमस्ते'
+        cache.close()
+    print("✓ Buffered writes persisted on close")
+
+
+def test_concurrent_writers():
+    """Several threads writing at once lose no entries"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TranslationCache(cache_dir, flush_size=7)
+
+        def worker(n):
+            for i in range(50):
+                cache.put(f'{n}-{i}', f'text {n} {i}')
+                assert cache.get(f'{n}-{i}') == f'text {n} {i}'
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(cache) == 200
+        cache.close()
+    print("✓ 200 concurrent writes committed")
+
+
+def test_short_lived_readers_release_connections():
+    """A reader thread's connection is closed when the thread ends"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TranslationCache(cache_dir, flush_size=1)
+        cache.put('a', 'नमस्ते')
+
+        def read():
+            assert cache.get('a') == 'नमस्ते'
+
+        # One thread per request, as in the threaded dev server
+        for _ in range(300):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        assert len(cache._readers) <= 1
+        if os.path.isdir('/proc/self/fd'):
+            fds = len(os.listdir('/proc/self/fd'))
+            for _ in range(100):
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+            assert len(os.listdir('/proc/self/fd')) <= fds + 2
+        cache.close()
+        assert len(cache._readers) == 0
+    print("✓ 300 reader threads, no leaked connections")
+
+
+def test_json_import():
+    """A legacy translations.json is imported once and renamed"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        json_path = os.path.join(cache_dir, 'translations.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'k1': 'एक', 'k2': 'दो'}, f, ensure_ascii=False)
+
+        cache = TranslationCache(cache_dir)
+        assert cache.get('k1') == 'एक' and cache.get('k2') == 'दो'
+        assert not os.path.exists(json_path)
+        assert os.path.exists(json_path + '.imported')
+        cache.close()
+    print("✓ Legacy JSON cache imported")
+
+
+if __name__ == '__main__':
+    test_write_behind_and_persistence()
+    test_concurrent_writers()
+    test_short_lived_readers_release_connections()
+    test_json_import()
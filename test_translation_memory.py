@@ -0,0 +1,125 @@
+"""
+Test sentence-level translation memory (no network: the API call is faked)
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from rate_limiter import TokenBucket
+from translator import TranslationService
+
+
+PAGE = """Chapter 1
+
+The boy's name was Santiago. Dusk was falling as he arrived.
+He decided to sleep there."""
+
+
+def make_service(cache_dir, requests_made):
+    """TranslationService whose API call upper-cases text and records each request"""
+    service = TranslationService(cache_dir)
+
+    def fake_translate(text, retry_count=3):
+        requests_made.append(text)
+        return text.upper()
+
+    service._translate_single = fake_translate
+    return service
+
+
+def test_page_assembled_from_sentences():
+    """Missing sentences go out in one packed request; paragraphs are kept"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+        service = make_service(cache_dir, requests_made)
+        translated = service.translate(PAGE)
+        print(translated)
+        assert translated == ("CHAPTER 1\n\nTHE BOY'S NAME WAS SANTIAGO. "
+                              "DUSK WAS FALLING AS HE ARRIVED. HE DECIDED TO SLEEP THERE.")
+        assert len(requests_made) == 1
+        service.close()
+    print("✓ Page translated with one request")
+
+
+def test_edited_page_reuses_sentences():
+    """Re-paginated or edited text only sends the sentences that changed"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+        service = make_service(cache_dir, requests_made)
+        service.translate(PAGE)
+        requests_made.clear()
+
+        edited = PAGE.replace('Dusk was falling', 'Night was falling') + '\n\nChapter 1'
+        service.translate(edited)
+        assert requests_made == ['Night was falling as he arrived.']
+        service.close()
+    print("✓ Only the edited sentence was translated")
+
+
+def test_line_mismatch_falls_back():
+    """If the packed response loses a line break, sentences are sent one by one"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+        service = make_service(cache_dir, requests_made)
+
+        def merge_lines(text, retry_count=3):
+            requests_made.append(text)
+            return text.replace('\n', ' ')
+
+        service._translate_single = merge_lines
+        assert service.translate('One. Two. Three.') == 'One. Two. Three.'
+        assert requests_made[1:] == ['One.', 'Two.', 'Three.']
+        service.close()
+    print("✓ Mismatched response handled per sentence")
+
+
+def test_batch_packs_pages():
+    """Several pages share one request and each page is cached on its own"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+        service = make_service(cache_dir, requests_made)
+        pages = [f'Page {i} begins. It has text number {i}.' for i in range(20)]
+        translated = service.translate_batch(pages + [''])
+        assert len(requests_made) == 1
+        assert translated[:20] == [page.upper() for page in pages]
+        assert translated[20] == ''
+
+        requests_made.clear()
+        assert service.translate(pages[7]) == pages[7].upper()
+        assert requests_made == []
+        service.close()
+    print("✓ 20 pages translated with one request")
+
+
+def test_long_text_chunks_run_concurrently():
+    """Requests for one long page overlap, up to the concurrency limit"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        requests_made = []
+        service = make_service(cache_dir, requests_made)
+        service.limiter = TokenBucket(rate=1000, capacity=100)
+        active = []
+        peak = []
+
+        def slow_translate(text, retry_count=3):
+            active.append(text)
+            peak.append(len(active))
+            time.sleep(0.05)
+            active.remove(text)
+            return text.upper()
+
+        service._translate_single = slow_translate
+        text = ' '.join(f'Sentence number {i} is here.' for i in range(1000))
+        assert service.translate(text) == text.upper()
+        assert max(peak) > 1
+        service.close()
+    print(f"✓ Up to {max(peak)} requests in flight")
+
+
+if __name__ == '__main__':
+    test_page_assembled_from_sentences()
+    test_edited_page_reuses_sentences()
+    test_line_mismatch_falls_back()
+    test_batch_packs_pages()
+    test_long_text_chunks_run_concurrently()
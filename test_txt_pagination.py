@@ -3,9 +3,12 @@ Test TXT file pagination with large text
 """
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from parser import BookParser
+from segmenter import split_sentences
+from txt_paginator import FAST_START_WORDS, MAX_WORDS_PER_PAGE, paginate
 
 def test_large_text():
     """Test that large TXT files are broken into small pages"""
@@ -55,5 +58,100 @@ def test_large_text():
         print("⚠️  Large text was not split properly")
     print(f"{'='*60}\n")
 
+def _reference_pages(content):
+    """In-memory pagination rules, kept as the reference for the mmap paginator"""
+    content = content.strip()
+    if not content:
+        return [""]
+    pages = []
+    paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+    if len(paragraphs) <= 1:
+        words = content.split()
+        return [' '.join(words[i:i + 250]) for i in range(0, len(words), 250)]
+    current_page, word_count = [], 0
+    for para in paragraphs:
+        if len(para.split()) > 250:
+            units = split_sentences(para)
+            separator = ' '
+        else:
+            units, separator = [para], '\n\n'
+        for unit in units:
+            if not unit:
+                continue
+            if word_count + len(unit.split()) > 250 and current_page:
+                pages.append(separator.join(current_page))
+                current_page, word_count = [], 0
+            current_page.append(unit)
+            word_count += len(unit.split())
+    if current_page:
+        pages.append('\n\n'.join(current_page))
+    return pages
+
+
+def test_mmap_paginator_matches_reference():
+    """Byte-offset pages decode to the same text as the in-memory rules (full-size pages)"""
+    long_para = ' '.join(['Mr. Smith met J. K. Rowling here. Is this two? "Yes!" she said…'] * 40)
+    samples = [
+        '',
+        '   \n\n  ',
+        ' '.join(['word'] * 600),
+        'First paragraph.\r\n\r\nSecond\r\nparagraph.\r\rThird.',
+        '\n\n'.join([long_para, 'Short one.', long_para, 'नमस्ते दुनिया।\u3000 Tail.']),
+        '\n\n\n'.join(['Para with\xa0nbsp. ' * 30] * 12),
+    ]
+    for sample in samples:
+        data = sample.encode('utf-8')
+        index = paginate(data, fast_start=False)
+        pages = [index.decode(data, i) for i in range(len(index))]
+        expected = _reference_pages(sample.replace('\r\n', '\n').replace('\r', '\n'))
+        assert pages == expected, f"Mismatch for sample starting {sample[:30]!r}"
+    print(f"✓ mmap paginator matches reference on {len(samples)} samples")
+
+
+def test_fast_start_pages():
+    """The first pages are small, later pages full size, and no text is lost or reordered"""
+    long_para = ' '.join(['The boy walked on. He was tired and the road was long.'] * 60)
+    samples = [
+        '\n\n'.join([long_para, 'Short one.', long_para]),
+        '\n\n'.join(['A short paragraph of a few words here.'] * 80),
+        ' '.join(['word'] * 600),
+    ]
+    for sample in samples:
+        data = sample.encode('utf-8')
+        index = paginate(data)
+        pages = [index.decode(data, i) for i in range(len(index))]
+        counts = [len(page.split()) for page in pages]
+        assert counts[0] <= FAST_START_WORDS[0]
+        assert counts[1] <= FAST_START_WORDS[1]
+        assert max(counts) <= MAX_WORDS_PER_PAGE
+        assert ' '.join(pages).split() == sample.split()
+        assert [index.decode(data, i) for i in range(len(index))] == pages
+    print(f"✓ Fast-start pages on {len(samples)} samples")
+
+
+def test_progressive_index():
+    """Early pages are served before the whole file is indexed; the final count matches a full pass"""
+    text = '\n\n'.join(f'Paragraph {i} has a handful of words in it.' for i in range(2000))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'big.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        expected = paginate(text.encode('utf-8'))
+        
+        parser = BookParser(path)
+        assert parser.extract_page(0) == expected.decode(text.encode('utf-8'), 0)
+        status = parser.index_status()
+        assert not status['complete'] and 0 < status['pages_indexed'] < len(expected)
+        assert parser.page_exists(len(expected) - 1)
+        assert not parser.page_exists(len(expected))
+        assert parser.get_total_pages() == len(expected)
+        assert parser.index_status() == {'pages_indexed': len(expected), 'complete': True}
+        parser.close()
+    print(f"✓ Progressive index reached {len(expected)} pages")
+
+
 if __name__ == '__main__':
     test_large_text()
+    test_mmap_paginator_matches_reference()
+    test_fast_start_pages()
+    test_progressive_index()